@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+N_BOOT = 10_000
+BLOCK_LEN = 4      # months; ~n^(1/3) for the 24-month regimes
+CHUNK_SIZE = 1_000  # replicates per task, each with its own seeded stream
+SEED = 20240101
+
+
+def block_indices(rng: np.random.Generator, size: int, n: int, block_len: int = BLOCK_LEN) -> np.ndarray:
+    """
+    Row indices of `size` moving-block resamples of an n-row sample:
+    ceil(n / block_len) blocks of consecutive rows, random starts, cut to n.
+    """
+    n_blocks = -(-n // block_len)
+    starts = rng.integers(0, n - block_len + 1, size=(size, n_blocks))
+    idx = starts[:, :, None] + np.arange(block_len)
+    return idx.reshape(size, -1)[:, :n]
+
+
+def ols_slope(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Slope of y ~ const + x along the last axis, for any leading batch
+    shape, as one batched solve of the 2x2 normal equations. NaN where x
+    is constant (e.g. a resample of a rarely repriced category).
+    """
+    y, x = np.broadcast_arrays(y, x)
+    n = np.full(y.shape[:-1], y.shape[-1], dtype=float)
+    sx = x.sum(axis=-1)
+    xtx = np.stack([np.stack([n, sx], axis=-1),
+                    np.stack([sx, (x * x).sum(axis=-1)], axis=-1)], axis=-2)
+    xty = np.stack([y.sum(axis=-1), (x * y).sum(axis=-1)], axis=-1)
+
+    det = np.linalg.det(xtx)
+    ok = det > 1e-12 * xtx[..., 0, 0] * xtx[..., 1, 1]
+    xtx[~ok] = np.eye(2)
+    slope = np.linalg.solve(xtx, xty[..., None])[..., 1, 0]
+    return np.where(ok, slope, np.nan)
+
+
+def _replicate_chunk(seed: np.random.SeedSequence, size: int, samples: dict, block_len: int) -> dict:
+    """
+    Slopes for `size` replicates of every sample. Each sample is a pair
+    (Y, x): Y is (n, K) targets and x is (n,) or (n, K) regressors, whose
+    rows are resampled together.
+    """
+    rng = np.random.default_rng(seed)
+    out = {}
+    for name, (Y, x) in samples.items():
+        idx = block_indices(rng, size, len(Y), block_len)  # (size, n)
+        Yb = np.moveaxis(Y[idx], 1, -1)                     # (size, K, n)
+        xb = x[idx]
+        xb = xb[:, None, :] if xb.ndim == 2 else np.moveaxis(xb, 1, -1)
+        out[name] = ols_slope(Yb, xb)                       # (size, K)
+    return out
+
+
+def block_bootstrap(samples: dict, n_boot: int = N_BOOT, block_len: int = BLOCK_LEN,
+                    seed: int = SEED, workers=None) -> dict:
+    """
+    Moving-block bootstrap of ols_slope() for each {name: (Y, x)} sample;
+    returns {name: (n_boot, K) replicate slopes}.
+
+    Replicates run in fixed chunks of CHUNK_SIZE, each drawing from its own
+    SeedSequence child, spread over a process pool. The draws depend on
+    seed and n_boot only, never on the number of workers.
+    """
+    sizes = [CHUNK_SIZE] * (n_boot // CHUNK_SIZE)
+    if n_boot % CHUNK_SIZE:
+        sizes.append(n_boot % CHUNK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        chunks = [_replicate_chunk(s, k, samples, block_len) for s, k in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            chunks = list(pool.map(_replicate_chunk, seeds, sizes,
+                                   [samples] * len(sizes), [block_len] * len(sizes)))
+
+    return {name: np.concatenate([c[name] for c in chunks]) for name in samples}
@@ -0,0 +1,215 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
+
+OUT_BREAKS = Path("analysis/outputs/13_breaks.csv")
+
+TRIM = 0.15       # minimum segment length, as a share of the sample
+MAX_BREAKS = 3
+
+# 95% critical value for the Bai (1997) break-date interval
+BAI_C95 = 11.0
+
+EQUATIONS = {
+    "beta": "infl_mom(t) ~ const + fx_mom(t)",
+    "rho": "infl_mom(t) ~ const + infl_mom(t-1)",
+}
+
+def segment_ssr(y, X, min_len: int) -> np.ndarray:
+    """
+    SSR of OLS y ~ const + X on rows i..j (inclusive) for every segment,
+    as an (n, n) matrix; +inf for segments shorter than min_len.
+
+    Every segment's cross-products are a difference of cumulative sums,
+    so the whole matrix is one batched least-squares pass.
+    """
+    y = np.asarray(y, dtype=float)
+    X = np.asarray(X, dtype=float).reshape(len(y), -1)
+    n = len(y)
+
+    # Centring keeps the cumulative sums well conditioned; SSR is unchanged
+    Z = np.column_stack([np.ones(n), X - X.mean(axis=0)])
+    yc = y - y.mean()
+
+    def cum(a):
+        return np.concatenate([np.zeros((1,) + a.shape[1:]), np.cumsum(a, axis=0)])
+
+    c_zz = cum(Z[:, :, None] * Z[:, None, :])
+    c_zy = cum(Z * yc[:, None])
+    c_yy = cum(yc * yc)
+
+    i, j = np.triu_indices(n, k=min_len - 1)
+    A = c_zz[j + 1] - c_zz[i]
+    b = c_zy[j + 1] - c_zy[i]
+    # pinv rather than solve: a rarely repriced category can have a
+    # constant regressor over a whole segment
+    coef = (np.linalg.pinv(A) @ b[..., None])[..., 0]
+    ssr = c_yy[j + 1] - c_yy[i] - np.einsum("si,si->s", b, coef)
+
+    out = np.full((n, n), np.inf)
+    out[i, j] = np.maximum(ssr, 0.0)
+    return out
+
+def optimal_breaks(ssr: np.ndarray, max_breaks: int) -> list:
+    """
+    Global SSR minimisers for 0..max_breaks breaks by dynamic programming
+    over the segment SSR matrix (Bai & Perron 2003).
+
+    Returns [(total_ssr, [b_1, ...])] indexed by the number of breaks, where
+    b is the first row of each new regime.
+    """
+    n = ssr.shape[0]
+    cost = [ssr[0]]   # cost[m][j]: best SSR of rows 0..j with m breaks
+    back = [None]
+    for m in range(1, max_breaks + 1):
+        # candidate[b - 1, j] = cost[m-1][b-1] + ssr[b, j]
+        candidate = cost[-1][:-1, None] + ssr[1:, :]
+        arg = np.argmin(candidate, axis=0)
+        cost.append(candidate[arg, np.arange(n)])
+        back.append(arg + 1)
+
+    out = []
+    for m in range(max_breaks + 1):
+        total = cost[m][n - 1]
+        breaks = []
+        j = n - 1
+        for mm in range(m, 0, -1):
+            b = back[mm][j]
+            breaks.append(int(b))
+            j = b - 1
+        out.append((total, breaks[::-1]))
+    return out
+
+def bai_interval(y, X, breaks: list, c: float = BAI_C95) -> list:
+    """
+    (lo, hi) row bounds of the Bai (1997) interval for each break:
+    b +/- c * sigma^2 / (d' Q d), with d the coefficient shift across the
+    break, Q the regressor second moments of the two adjacent regimes and
+    sigma^2 the pooled residual variance.
+
+    When d' Q d is not positive (the coefficients do not change across the
+    break, or the regressors are constant over the regimes) the break date
+    is not identified and the interval is the whole sample.
+    """
+    y = np.asarray(y, dtype=float)
+    Z = np.column_stack([np.ones(len(y)), np.asarray(X, dtype=float).reshape(len(y), -1)])
+    edges = [0] + list(breaks) + [len(y)]
+
+    coefs, ssr = [], 0.0
+    for a, b in zip(edges[:-1], edges[1:]):
+        coef = np.linalg.lstsq(Z[a:b], y[a:b], rcond=None)[0]
+        coefs.append(coef)
+        ssr += float(((y[a:b] - Z[a:b] @ coef) ** 2).sum())
+    sigma2 = ssr / (len(y) - len(coefs) * Z.shape[1])
+
+    out = []
+    for r, b in enumerate(breaks):
+        d = coefs[r + 1] - coefs[r]
+        rows = Z[edges[r]:edges[r + 2]]
+        Q = rows.T @ rows / len(rows)
+        shift = float(d @ Q @ d)
+        same = np.allclose(coefs[r + 1], coefs[r], rtol=1e-9, atol=1e-12)
+        half = c * sigma2 / shift if shift > 0 and not same else np.inf
+        if not np.isfinite(half):
+            out.append((0, len(y) - 1))
+            continue
+        half = int(np.ceil(half))
+        out.append((max(b - half, 0), min(b + half, len(y) - 1)))
+    return out
+
+def detect_breaks(y, X, max_breaks: int = MAX_BREAKS, trim: float = TRIM) -> dict:
+    """
+    Bai-Perron breaks in all coefficients of y ~ const + X. The number of
+    breaks minimises BIC = n log(SSR/n) + ((m+1)k + m) log(n).
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    k = 1 + np.asarray(X).reshape(n, -1).shape[1]
+    min_len = max(int(np.ceil(trim * n)), k + 1)
+    max_breaks = min(max_breaks, n // min_len - 1)
+
+    fits = optimal_breaks(segment_ssr(y, X, min_len), max_breaks)
+    bic = [n * np.log(total / n) + ((m + 1) * k + m) * np.log(n) for m, (total, _) in enumerate(fits)]
+    m = int(np.argmin(bic))
+    breaks = fits[m][1]
+    return {"n_breaks": m, "breaks": breaks, "ci": bai_interval(y, X, breaks), "bic": bic[m]}
+
+def equation_data(df, col: str, equation: str):
+    """Dates, y and X of one equation on its complete rows."""
+    s = pd.DataFrame({"date": df["date"], "y": df[col]})
+    s["x"] = df["fx_mom_pct"] if equation == "beta" else df[col].shift(1)
+    s = s.dropna()
+    return s["date"].to_numpy(), s["y"].to_numpy(), s["x"].to_numpy()
+
+def break_table(data) -> pd.DataFrame:
+    """One row per detected break (or per series/equation with none), for every category_cols series."""
+    df = data.category_mom_fx
+    rows = []
+    for col in data.category_cols:
+        for equation in EQUATIONS:
+            dates, y, x = equation_data(df, col, equation)
+            fit = detect_breaks(y, x)
+            base = {"series": col, "equation": equation, "n_breaks": fit["n_breaks"], "bic": fit["bic"]}
+            if not fit["breaks"]:
+                rows.append({**base, "break": 0})
+            for r, (b, (lo, hi)) in enumerate(zip(fit["breaks"], fit["ci"]), start=1):
+                rows.append({**base, "break": r, "break_date": dates[b],
+                             "ci_lo": dates[lo], "ci_hi": dates[hi]})
+
+    out = pd.DataFrame(rows)
+    for c in ("break_date", "ci_lo", "ci_hi"):
+        out[c] = pd.to_datetime(out[c])
+    return out
+
+def load_breaks(data=None) -> pd.DataFrame:
+    """The break table written by this stage; detected on the spot if it is missing."""
+    if OUT_BREAKS.exists():
+        return pd.read_csv(OUT_BREAKS, parse_dates=["break_date", "ci_lo", "ci_hi"])
+    return break_table(data or Datasets())
+
+def series_breaks(breaks: pd.DataFrame, series: str, equation: str) -> pd.DataFrame:
+    sel = breaks[(breaks["series"] == series) & (breaks["equation"] == equation)]
+    return sel.dropna(subset=["break_date"]).sort_values("break_date")
+
+def detected_regimes(breaks: pd.DataFrame, series: str, equation: str, start, end) -> dict:
+    """{label: (start, end)} of the regimes between a series' detected breaks."""
+    starts = [pd.Timestamp(start)] + list(series_breaks(breaks, series, equation)["break_date"])
+    ends = [s - pd.Timedelta(days=1) for s in starts[1:]] + [pd.Timestamp(end)]
+    return {
+        f"Detected {i} ({a:%Y-%m}–{b:%Y-%m})": (a.strftime("%Y-%m-%d"), b.strftime("%Y-%m-%d"))
+        for i, (a, b) in enumerate(zip(starts, ends), start=1)
+    }
+
+def add_break_overlay(ax, breaks: pd.DataFrame, series: str, equation: str, color="black", label=None):
+    """Detected break dates (solid) with their 95% Bai intervals (shaded)."""
+    for i, (_, row) in enumerate(series_breaks(breaks, series, equation).iterrows()):
+        ax.axvspan(row["ci_lo"], row["ci_hi"], color=color, alpha=0.08, linewidth=0)
+        ax.axvline(row["break_date"], color=color, linewidth=1.2, label=label if i == 0 else None)
+
+def web_breaks(breaks: pd.DataFrame, series: str, equation: str) -> list:
+    """add_break_overlay() marks for a web chart bundle: [{"x", "lo", "hi"}] as "YYYY-MM"."""
+    return [{"x": f"{row.break_date:%Y-%m}", "lo": f"{row.ci_lo:%Y-%m}", "hi": f"{row.ci_hi:%Y-%m}"}
+            for row in series_breaks(breaks, series, equation).itertuples()]
+
+def main(data=None):
+    OUT_BREAKS.parent.mkdir(parents=True, exist_ok=True)
+
+    data = data or Datasets()
+    out = break_table(data)
+    out.to_csv(OUT_BREAKS, index=False, date_format="%Y-%m-%d")
+
+    print("Bai-Perron breaks (BIC-selected, 95% Bai intervals):")
+    for (series, equation), g in out.groupby(["series", "equation"], sort=False):
+        dates = ", ".join(
+            f"{r.break_date:%Y-%m} [{r.ci_lo:%Y-%m}, {r.ci_hi:%Y-%m}]"
+            for r in g.dropna(subset=["break_date"]).itertuples()
+        ) or "none"
+        print(f"  {series:<20} {equation:<5} {dates}")
+    print("Saved:", OUT_BREAKS)
+
+if __name__ == "__main__":
+    main()
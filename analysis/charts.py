@@ -0,0 +1,247 @@
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from content_hash import CACHE_DIR, file_digest, forced, locked  # noqa: E402
+
+# Spec digest of every chart last written, by output path; stages running in
+# parallel update it under MANIFEST_LOCK
+MANIFEST_PATH = CACHE_DIR / "charts.json"
+MANIFEST_LOCK = CACHE_DIR / "charts.lock"
+
+# Worker processes for render(); with one, charts are drawn in this process
+JOBS = os.cpu_count() or 1
+
+# Web bundles (what a chart plots, as JSON for the site's client-side
+# renderer, reports/site/docs/assets/web-charts.js) keep this many
+# significant digits; months are "YYYY-MM" and NaN is null
+WEB_DIGITS = 4
+
+
+@dataclass
+class Chart:
+    """
+    One figure declared as data plus style.
+
+    draw(fig, data, style) plots on a blank figure and must be a module-
+    level function, so worker processes can look it up. figsize and layout
+    in `style` go to the figure, dpi and bbox_inches to savefig; the rest
+    is for draw. The PNG goes to path and is copied to every path in copies.
+
+    With web(data, style), also a module-level function, the chart gets a
+    JSON bundle next to each PNG (same name, .json) for the web renderer.
+    """
+    path: Path
+    draw: Callable
+    data: dict
+    style: dict = field(default_factory=dict)
+    copies: tuple = ()
+    web: Callable = None
+
+
+def _feed(h, value) -> None:
+    if isinstance(value, pd.DataFrame):
+        h.update(repr(list(value.columns)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        _feed(h, value.to_numpy())
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        h.update(f"{value.dtype}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in value:
+            h.update(repr(key).encode())
+            _feed(h, value[key])
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for v in value:
+            _feed(h, v)
+    else:
+        h.update(repr(value).encode())
+
+
+def _code_files(draw: Callable) -> list:
+    """The file defining draw and those defining the functions it calls by name."""
+    files = {inspect.getsourcefile(draw)}
+    for name in draw.__code__.co_names:
+        obj = draw.__globals__.get(name)
+        if inspect.isfunction(obj):
+            files.add(inspect.getsourcefile(obj))
+    return sorted(files)
+
+
+def digest(chart: Chart) -> str:
+    """Hash of the chart's data arrays, style and drawing code."""
+    h = hashlib.sha256(f"matplotlib {matplotlib.__version__}\n{chart.draw.__qualname__}\n".encode())
+    for draw in (chart.draw, chart.web):
+        for path in _code_files(draw) if draw else ():
+            h.update(file_digest(path).encode())
+    _feed(h, chart.data)
+    _feed(h, chart.style)
+    return h.hexdigest()
+
+
+def _load_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        try:
+            return json.loads(MANIFEST_PATH.read_text())
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def _outputs(chart: Chart) -> list:
+    paths = [Path(chart.path), *map(Path, chart.copies)]
+    return paths + [p.with_suffix(".json") for p in paths] if chart.web else paths
+
+
+def _draw(chart: Chart) -> None:
+    style = chart.style
+    fig = plt.figure(figsize=style.get("figsize"), layout=style.get("layout"))
+    chart.draw(fig, chart.data, style)
+    fig.savefig(chart.path, dpi=style.get("dpi", 200), bbox_inches=style.get("bbox_inches"))
+    plt.close(fig)
+    if chart.web:
+        bundle = json.dumps(chart.web(chart.data, style), separators=(",", ":"), allow_nan=False)
+        Path(chart.path).with_suffix(".json").write_text(bundle)
+    for copy in chart.copies:
+        shutil.copyfile(chart.path, copy)
+        if chart.web:
+            shutil.copyfile(Path(chart.path).with_suffix(".json"), Path(copy).with_suffix(".json"))
+
+
+def render(charts: list, jobs: int = JOBS, force: bool = None) -> list:
+    """
+    Draw the charts whose digest differs from the manifest (or whose files
+    are missing) across `jobs` Agg worker processes. Returns the paths drawn.
+
+    force redraws every chart; by default it follows run_all.py --force.
+    """
+    if force is None:
+        force = forced()
+    manifest = _load_manifest()
+    todo = []
+    for chart in charts:
+        d = digest(chart)
+        outputs = _outputs(chart)
+        if force or manifest.get(str(chart.path)) != d or not all(p.exists() for p in outputs):
+            todo.append((chart, d))
+            for p in outputs:
+                p.parent.mkdir(parents=True, exist_ok=True)
+
+    if jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(min(jobs, len(todo)), mp_context=mp.get_context("fork")) as pool:
+            list(pool.map(_draw, [chart for chart, _ in todo]))
+    else:
+        for chart, _ in todo:
+            _draw(chart)
+
+    if todo:
+        # Re-read under the lock: stages running in parallel share the manifest
+        with locked(MANIFEST_LOCK):
+            manifest = _load_manifest()
+            manifest.update({str(chart.path): d for chart, d in todo})
+            tmp = MANIFEST_PATH.with_name(f"{MANIFEST_PATH.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+            tmp.replace(MANIFEST_PATH)
+
+    for chart in charts:
+        status = "Saved:" if any(chart is c for c, _ in todo) else "Unchanged:"
+        print(status, chart.path)
+    return [chart.path for chart, _ in todo]
+
+
+def draw_lines(fig, data, style):
+    """data: x and {label: y} series; style: title, xlabel, ylabel, linewidth, legend."""
+    ax = fig.subplots()
+    for label, y in data["series"].items():
+        ax.plot(data["x"], y, label=label, linewidth=style.get("linewidth"))
+    ax.set_title(style.get("title", ""))
+    ax.set_xlabel(style.get("xlabel", ""))
+    ax.set_ylabel(style.get("ylabel", ""))
+    if style.get("legend"):
+        ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+
+def draw_band(fig, data, style):
+    """data: x, y and its lo / hi band; style: title, xlabel, ylabel."""
+    ax = fig.subplots()
+    ax.plot(data["x"], data["y"])
+    ax.fill_between(data["x"], data["lo"], data["hi"], alpha=0.2)
+    ax.axhline(0, linewidth=1)
+    ax.set_title(style.get("title", ""))
+    ax.set_xlabel(style.get("xlabel", ""))
+    ax.set_ylabel(style.get("ylabel", ""))
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+
+def web_x(x) -> list:
+    """Dates as "YYYY-MM" (the plots are monthly); anything else as plain numbers."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return pd.DatetimeIndex(x).strftime("%Y-%m").tolist()
+    return web_y(x)
+
+
+def web_y(y, digits: int = WEB_DIGITS) -> list:
+    """Values to `digits` significant digits, NaN as None (null)."""
+    y = np.asarray(y, dtype=float)
+    return [float(f"{v:.{digits}g}") if np.isfinite(v) else None for v in y.ravel().tolist()]
+
+
+def web_frames(frames: dict, key: str) -> dict:
+    """
+    A panel's x and lines, each with its lo / hi band, from {label: DataFrame
+    of date, key, key_lo, key_hi}. A line only carries its own x if it
+    differs from the first one's.
+    """
+    panel = {"x": None, "lines": []}
+    for label, f in frames.items():
+        x = web_x(f["date"])
+        line = {"label": label, "y": web_y(f[key]), "lo": web_y(f[f"{key}_lo"]), "hi": web_y(f[f"{key}_hi"])}
+        if panel["x"] is None:
+            panel["x"] = x
+        elif x != panel["x"]:
+            line["x"] = x
+        panel["lines"].append(line)
+    return panel
+
+
+def web_lines(data, style):
+    """Bundle of a draw_lines() chart."""
+    return {"panels": [{
+        "x": web_x(data["x"]),
+        "xlabel": style.get("xlabel"),
+        "ylabel": style.get("ylabel"),
+        "lines": [{"label": label, "y": web_y(y)} for label, y in data["series"].items()],
+        "legend": bool(style.get("legend")),
+    }]}
+
+
+def web_band(data, style):
+    """Bundle of a draw_band() chart."""
+    return {"panels": [{
+        "x": web_x(data["x"]),
+        "xlabel": style.get("xlabel"),
+        "ylabel": style.get("ylabel"),
+        "zero": True,
+        "lines": [{"y": web_y(data["y"]), "lo": web_y(data["lo"]), "hi": web_y(data["hi"])}],
+    }]}
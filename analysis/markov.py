@@ -0,0 +1,263 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from charts import Chart, render
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
+
+OUT_DIR = Path("analysis/outputs")
+OUT_PARAMS = OUT_DIR / "14_markov_switching.csv"
+OUT_PROBS = OUT_DIR / "14_markov_regime_probs.csv"
+OUT_CHART = OUT_DIR / "14_markov_regime_probs.png"
+
+# infl_mom(t) ~ const + fx_mom(t) + infl_mom(t-1), as in regression_baselines.py,
+# with every coefficient and the error variance switching between two states
+N_RESTARTS = 50
+MAX_ITER = 300
+TOL = 1e-8
+SEED = 20240101
+
+# Keeps a state from collapsing onto a handful of identical months
+# (rarely repriced categories), as a share of the series variance
+MIN_VAR_SHARE = 0.01
+
+# A start only counts as a regime fit if each state covers this share of
+# the months and is expected to last at least 1 / (1 - MIN_STAY) months;
+# otherwise one "state" is just absorbing outlier months
+MIN_SHARE = 0.10
+MIN_STAY = 0.5
+
+def _normal_pdf(resid, var):
+    return np.exp(-0.5 * resid * resid / var) / np.sqrt(2 * np.pi * var)
+
+def hamilton_filter(dens, P, pi0):
+    """
+    Filtered state probabilities for a batch of models.
+
+    dens is (B, T, 2) observation densities, P is (B, 2, 2) with
+    P[b, i, j] = Pr(s_t = j | s_{t-1} = i), pi0 is (B, 2). The recursion
+    runs over time once, with every model in the batch updated together.
+    Returns (filtered, predicted, loglik).
+    """
+    B, T, _ = dens.shape
+    filtered = np.empty((B, T, 2))
+    predicted = np.empty((B, T, 2))
+    loglik = np.zeros(B)
+    prob = pi0
+    for t in range(T):
+        predicted[:, t] = prob
+        joint = prob * dens[:, t]
+        lik = joint.sum(axis=1)
+        loglik += np.log(lik)
+        filtered[:, t] = joint / lik[:, None]
+        prob = np.einsum("bi,bij->bj", filtered[:, t], P)
+    return filtered, predicted, loglik
+
+def kim_smoother(filtered, predicted, P):
+    """
+    Smoothed probabilities Pr(s_t | all data), (B, T, 2), and the
+    summed transition probabilities sum_t Pr(s_t = i, s_{t+1} = j | all
+    data), (B, 2, 2), by the Kim (1994) backward recursion.
+    """
+    B, T, _ = filtered.shape
+    smoothed = np.empty_like(filtered)
+    smoothed[:, -1] = filtered[:, -1]
+    trans = np.zeros((B, 2, 2))
+    for t in range(T - 2, -1, -1):
+        ratio = smoothed[:, t + 1] / predicted[:, t + 1]                  # (B, 2)
+        joint = filtered[:, t, :, None] * P * ratio[:, None, :]           # (B, 2, 2)
+        smoothed[:, t] = joint.sum(axis=2)
+        trans += joint
+    return smoothed, trans
+
+def fit_em(Y, X, n_restarts: int = N_RESTARTS, max_iter: int = MAX_ITER, tol: float = TOL,
+           seed: int = SEED) -> dict:
+    """
+    Two-state switching regression y_k(t) = X_k(t) b_{k,s} + e, e ~ N(0, s2_{k,s}),
+    for K series at once, by EM from n_restarts random starts each.
+
+    Y is (T, K); X is (T, K, p) without the constant. All K x n_restarts
+    models are filtered, smoothed and re-estimated as one batch; a model
+    leaves the batch as soon as its own log-likelihood converges.
+
+    The best admissible start per series (highest log-likelihood among
+    those whose states each cover MIN_SHARE of the months with p_stay >=
+    MIN_STAY) is returned; a series with no admissible start keeps its
+    best start, flagged in "admissible". State 1 is the one with the
+    larger FX coefficient (X[..., 0]).
+    """
+    Y = np.asarray(Y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    T, K = Y.shape
+    Z = np.concatenate([np.ones((T, K, 1)), X], axis=2)          # (T, K, k)
+    k = Z.shape[2]
+    R = n_restarts
+    B = K * R
+
+    # Batch layout: model b = series b // R, start b % R
+    y = np.repeat(Y.T, R, axis=0)                                 # (B, T)
+    z = np.repeat(np.transpose(Z, (1, 0, 2)), R, axis=0)          # (B, T, k)
+    var_floor = MIN_VAR_SHARE * np.repeat(Y.var(axis=0), R)       # (B,)
+
+    # Random starts around the pooled OLS fit
+    rng = np.random.default_rng(seed)
+    zz = np.einsum("bti,btj->bij", z, z)
+    zy = np.einsum("bti,bt->bi", z, y)
+    b0 = np.linalg.solve(zz + 1e-9 * np.eye(k), zy[..., None])[..., 0]
+    s20 = ((y - np.einsum("bti,bi->bt", z, b0)) ** 2).mean(axis=1)
+    scale = np.sqrt(s20[:, None] / np.maximum(np.einsum("bii->bi", zz) / T, 1e-12))  # (B, k)
+    beta = b0[:, None, :] + rng.normal(size=(B, 2, k)) * scale[:, None, :]
+    var = s20[:, None] * rng.uniform(0.5, 1.5, size=(B, 2))
+    stay = rng.uniform(0.7, 0.98, size=(B, 2))
+    P = np.stack([np.stack([stay[:, 0], 1 - stay[:, 0]], -1),
+                  np.stack([1 - stay[:, 1], stay[:, 1]], -1)], axis=1)
+    pi0 = np.full((B, 2), 0.5)
+
+    # Models still iterating; converged ones are frozen and dropped from the batch
+    active = np.arange(B)
+    prev = np.full(B, -np.inf)
+    for _ in range(max_iter):
+        a = active
+        ya, za = y[a], z[a]
+
+        # E-step
+        resid = ya[:, :, None] - np.einsum("bti,bsi->bts", za, beta[a])  # (A, T, 2)
+        dens = np.maximum(_normal_pdf(resid, var[a][:, None, :]), 1e-300)
+        filtered, predicted, loglik = hamilton_filter(dens, P[a], pi0[a])
+        smoothed, trans = kim_smoother(filtered, predicted, P[a])
+
+        # M-step: weighted least squares per state, then variances and P
+        w = smoothed                                                     # (A, T, 2)
+        zwz = np.einsum("bts,bti,btj->bsij", w, za, za)
+        zwy = np.einsum("bts,bti,bt->bsi", w, za, ya)
+        beta[a] = np.linalg.solve(zwz + 1e-9 * np.eye(k), zwy[..., None])[..., 0]
+        resid = ya[:, :, None] - np.einsum("bti,bsi->bts", za, beta[a])
+        v = (w * resid ** 2).sum(axis=1) / np.maximum(w.sum(axis=1), 1e-12)
+        var[a] = np.maximum(v, var_floor[a][:, None])
+        P[a] = trans / np.maximum(trans.sum(axis=2, keepdims=True), 1e-12)
+        pi0[a] = smoothed[:, 0]
+
+        done = np.abs(loglik - prev[a]) < tol * (1 + np.abs(loglik))
+        prev[a] = loglik
+        active = a[~done]
+        if not active.size:
+            break
+
+    # Final pass at the converged parameters
+    resid = y[:, :, None] - np.einsum("bti,bsi->bts", z, beta)
+    dens = np.maximum(_normal_pdf(resid, var[:, None, :]), 1e-300)
+    filtered, predicted, loglik = hamilton_filter(dens, P, pi0)
+    smoothed, _ = kim_smoother(filtered, predicted, P)
+
+    # Reject starts where a state is (nearly) never occupied or never persists
+    share = smoothed.mean(axis=1)                                    # (B, 2)
+    stay = np.einsum("bii->bi", P)                                   # (B, 2)
+    score = np.where(np.isfinite(loglik), loglik, -np.inf)
+    ok = np.isfinite(score) & (share.min(axis=1) >= MIN_SHARE) & (stay.min(axis=1) >= MIN_STAY)
+    ok = ok.reshape(K, R)
+    admissible = ok.any(axis=1)
+    score = np.where(ok | ~admissible[:, None], score.reshape(K, R), -np.inf)
+    best = np.argmax(score, axis=1)
+    idx = np.arange(K) * R + best
+
+    # Label states so that state 1 has the larger FX coefficient
+    flip = beta[idx, 0, 1] > beta[idx, 1, 1]
+    order = np.where(flip[:, None], [1, 0], [0, 1])
+    rows = np.arange(K)[:, None]
+    return {
+        "beta": beta[idx][rows, order],                                           # (K, 2, k)
+        "var": var[idx][rows, order],                                             # (K, 2)
+        "P": P[idx][rows[:, :, None], order[:, :, None], order[:, None, :]],      # (K, 2, 2)
+        "smoothed": np.take_along_axis(smoothed[idx], order[:, None, :], axis=2),  # (K, T, 2)
+        "loglik": loglik[idx],
+        "admissible": admissible,                                                 # (K,)
+    }
+
+def switching_data(df, columns):
+    """
+    Dates, Y (T, K) and X (T, K, 2) = [fx_mom(t), y_k(t-1)] for every
+    `columns` series, on the months where all of them are complete.
+    """
+    lag = df[columns].shift(1)
+    ok = df[columns].notna().all(axis=1) & lag.notna().all(axis=1) & df["fx_mom_pct"].notna()
+    Y = df.loc[ok, columns].to_numpy(dtype=float)
+    fx = df.loc[ok, "fx_mom_pct"].to_numpy(dtype=float)
+    X = np.stack([np.repeat(fx[:, None], len(columns), axis=1), lag[ok].to_numpy(dtype=float)], axis=2)
+    return df.loc[ok, "date"].to_numpy(), Y, X
+
+def draw_probs(fig, data, style):
+    n_cols = style["n_cols"]
+    names = data["names"]
+    axes = fig.subplots(int(np.ceil(len(names) / n_cols)), n_cols, sharex=True, sharey=True).ravel()
+    x = pd.to_datetime(data["dates"])
+    for ax, name, p in zip(axes, names, data["p_high"]):
+        ax.fill_between(x, 0, p, step="mid", alpha=0.35)
+        ax.plot(x, p, drawstyle="steps-mid", linewidth=1)
+        ax.axhline(0.5, color="grey", linewidth=0.6, linestyle="--")
+        ax.set_title(name)
+        ax.set_ylim(0, 1)
+    for ax in axes[len(names):]:
+        ax.set_visible(False)
+    # With sharex only the bottom row is labelled; label the panels above hidden ones too
+    for ax in axes[max(len(names) - n_cols, 0):len(names)]:
+        ax.xaxis.set_tick_params(labelbottom=True)
+    for ax in axes[::n_cols]:
+        ax.set_ylabel("Pr(high β state)")
+    for ax in axes:
+        ax.tick_params(axis="x", labelrotation=45)
+    fig.suptitle("Markov-switching pass-through: smoothed probability of the high-β state")
+
+def probs_chart(names, dates, smoothed, path, n_cols=3) -> Chart:
+    n_rows = int(np.ceil(len(names) / n_cols))
+    return Chart(path, draw_probs, {"names": list(names), "dates": np.asarray(dates), "p_high": smoothed[:, :, 1]},
+                 {"figsize": (15, 2.6 * n_rows), "layout": "constrained", "n_cols": n_cols})
+
+def main(data=None):
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    data = data or Datasets()
+    columns = data.category_cols
+    dates, Y, X = switching_data(data.category_mom_fx, columns)
+    fit = fit_em(Y, X)
+
+    rows = []
+    for i, col in enumerate(columns):
+        for s, state in enumerate(["low", "high"]):
+            const, beta_fx, rho = fit["beta"][i, s]
+            rows.append({
+                "series": col, "state": state,
+                "const": const, "beta_fx": beta_fx, "rho_infl": rho,
+                "sigma": np.sqrt(fit["var"][i, s]),
+                "p_stay": fit["P"][i, s, s],
+                "expected_duration": 1 / max(1 - fit["P"][i, s, s], 1e-12),
+                "share_months": fit["smoothed"][i, :, s].mean(),
+                "loglik": fit["loglik"][i], "nobs": len(dates),
+                "admissible": bool(fit["admissible"][i]),
+            })
+    params = pd.DataFrame(rows)
+    params.to_csv(OUT_PARAMS, index=False)
+
+    K, T = len(columns), len(dates)
+    probs = pd.DataFrame({
+        "date": np.tile(dates, K),
+        "series": np.repeat(columns, T),
+        "p_high": fit["smoothed"][:, :, 1].ravel(),
+    })
+    probs.to_csv(OUT_PROBS, index=False, date_format="%Y-%m-%d")
+
+    render([probs_chart(columns, dates, fit["smoothed"], OUT_CHART)])
+
+    print(f"Two-state switching pass-through ({N_RESTARTS} EM starts per series, {T} months):")
+    for col, g in params.groupby("series", sort=False):
+        lo, hi = g.iloc[0], g.iloc[1]
+        print(f"  {col:<20} β low={lo.beta_fx:+.3f} high={hi.beta_fx:+.3f}  "
+              f"p_stay=({lo.p_stay:.2f}, {hi.p_stay:.2f})  logL={hi.loglik:.1f}"
+              + ("" if hi.admissible else "  (no start with two persistent regimes)"))
+    print("Saved:", OUT_PARAMS)
+    print("Saved:", OUT_PROBS)
+
+if __name__ == "__main__":
+    main()
@@ -1,242 +1,285 @@
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import statsmodels.api as sm
 from statsmodels.graphics.tsaplots import plot_acf
 
 from pathlib import Path
 
-OUT_DIR = Path(__file__).resolve().parent / "outputs"
-OUT_DIR.mkdir(exist_ok=True)
-
-# -------------------------------------------------------
-# 1. LOAD DATA
-# -------------------------------------------------------
-import os
-
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_PATH = os.path.join(BASE_DIR, "data", "processed", "merged_fx_cpi_2020_2025.csv")
-
-print("Loading data from:", DATA_PATH)
+from charts import Chart, draw_band, render, web_band, web_x, web_y
 
-df = pd.read_csv(DATA_PATH)
-df["date"] = pd.to_datetime(df["date"])
-df = df.sort_values("date").reset_index(drop=True)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets, MERGED_PATH  # noqa: E402
+from breaks import add_break_overlay, load_breaks, series_breaks, web_breaks  # noqa: E402
+from rolling import HAC_MAXLAGS, conf_int, rolling_ols  # noqa: E402
 
-# -------------------------------------------------------
-# 2. INFLATION PERSISTENCE (Half-Life)
-# -------------------------------------------------------
-
-# Estimate AR(1) for inflation
-df["infl_lag1"] = df["infl_mom_pct"].shift(1)
-df_ar = df.dropna()
-
-Y = df_ar["infl_mom_pct"]
-X = sm.add_constant(df_ar["infl_lag1"])
+OUT_DIR = Path(__file__).resolve().parent / "outputs"
 
-model_ar = sm.OLS(Y, X).fit()
-
-rho = model_ar.params["infl_lag1"]
-
-half_life = np.log(0.5) / np.log(abs(rho))
-
-print("Inflation persistence (rho):", round(rho,4))
-print("Half-life of inflation shock (months):", round(half_life,2))
-
-# -------------------------------------------------------
-# 3. ROLLING VOLATILITY
-# -------------------------------------------------------
-
-df["infl_vol_6m"] = df["infl_mom_pct"].rolling(6).std()
-df["fx_vol_6m"] = df["fx_mom_pct"].rolling(6).std()
-
-# -------------------------------------------------------
-# 4. PLOT VOLATILITY SIDE BY SIDE
-# -------------------------------------------------------
-
-fig, ax = plt.subplots(2, 1, figsize=(8,8), sharex=True)
-
-ax[0].plot(df["date"], df["infl_vol_6m"])
-ax[0].set_title("6-Month Rolling Inflation Volatility")
-
-ax[1].plot(df["date"], df["fx_vol_6m"])
-ax[1].set_title("6-Month Rolling FX Volatility")
-
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.tight_layout()
-plt.savefig(OUT_DIR / "01_infl_vol_6m.png", dpi=200)
-plt.close()
-# -------------------------------------------------------
-# 5. ACF CHECK
-# -------------------------------------------------------
-
-plot_acf(df["infl_mom_pct"].dropna(), lags=12)
-plt.tight_layout()
-plt.savefig(OUT_DIR / "01_infl_vol_6m.png", dpi=200)
-plt.close()
-
-fig, ax = plt.subplots(figsize=(10,5))
-ax.plot(df["date"], df["infl_vol_6m"], label="Inflation volatility (6m std of MoM)")
-ax.plot(df["date"], df["fx_vol_6m"], label="FX volatility (6m std of MoM)")
-ax.set_title("Rolling Volatility: Inflation vs FX (6-month window)")
-ax.set_xlabel("Date")
-ax.legend()
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(OUT_DIR / "02_volatility_side_by_side.png", dpi=200)
-plt.close()
-
-print("Shock remaining after 3 months (rho^3):", round(rho**3, 3))
-# -------------------------------------------------------
-# 6. ROLLING PASS-THROUGH (24-month window)
-# -------------------------------------------------------
-
-window = 24
-betas = []
-rhos = []
-dates = []
-
-for end in range(window, len(df)):
-    sub = df.iloc[end-window:end].copy()
-
-    sub["infl_lag1"] = sub["infl_mom_pct"].shift(1)
-    sub = sub.dropna(subset=["infl_mom_pct", "fx_mom_pct", "infl_lag1"])
-
-    Y = sub["infl_mom_pct"]
-    X = sm.add_constant(sub[["fx_mom_pct", "infl_lag1"]])
-
-    m = sm.OLS(Y, X).fit()
-
-    betas.append(m.params["fx_mom_pct"])
-    rhos.append(m.params["infl_lag1"])
-    dates.append(df["date"].iloc[end])
-
-roll = pd.DataFrame({"date": dates, "beta_fx": betas, "rho_infl": rhos})
-
-# Save the rolling estimates (important for later report + reproducibility)
-roll_path = OUT_DIR / "rolling_pass_through_24m.csv"
-roll.to_csv(roll_path, index=False)
-print("Saved rolling estimates to:", roll_path)
-
-# Plot rolling beta (FX pass-through)
-plt.figure(figsize=(10,5))
-plt.plot(roll["date"], roll["beta_fx"])
-plt.axhline(0, linewidth=1)
-plt.title("Rolling FX Pass-Through (β), 24-month window")
-plt.xlabel("Date")
-plt.ylabel("β (effect of FX MoM on inflation MoM)")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(OUT_DIR / "03_rolling_beta_fx_24m.png", dpi=200)
-plt.close()
-
-# Plot rolling rho (inflation persistence)
-plt.figure(figsize=(10,5))
-plt.plot(roll["date"], roll["rho_infl"])
-plt.axhline(0, linewidth=1)
-plt.title("Rolling Inflation Persistence (ρ), 24-month window")
-plt.xlabel("Date")
-plt.ylabel("ρ (inflation memory)")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(OUT_DIR / "04_rolling_rho_infl_24m.png", dpi=200)
-plt.close()
-
-pre = df[df["date"] < "2023-01-01"]["fx_vol_6m"].mean()
-post = df[df["date"] >= "2024-01-01"]["fx_vol_6m"].mean()
-
-print("Average FX volatility pre-2023:", round(pre,4))
-print("Average FX volatility 2024+: ", round(post,4))
-
-pre_infl = df[df["date"] < "2023-01-01"]["infl_vol_6m"].mean()
-post_infl = df[df["date"] >= "2024-01-01"]["infl_vol_6m"].mean()
-
-print("Average inflation volatility pre-2023:", round(pre_infl,4))
-print("Average inflation volatility 2024+: ", round(post_infl,4))
-
-plt.figure(figsize=(10,5))
-plt.plot(roll["date"], roll["beta_fx"])
-plt.axvline(pd.to_datetime("2022-04-01"), linestyle="--")
-plt.axvline(pd.to_datetime("2023-10-01"), linestyle="--")
-plt.title("Rolling FX Pass-Through with Regime Markers")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(OUT_DIR / "05_rolling_beta_with_markers.png", dpi=200)
-plt.close()
-
-
-# --- Event markers (edit labels if you want shorter text)
-EVENTS = [
-    ("2022-03-01", "Global commodity shock\n(Ukraine war → food/energy prices)"),
-    ("2022-04-01", "BCM leadership change\n(new governor appointed)"),
-    ("2023-12-14", "FX market modernization\n(interbank FX market launch / platform)"),
-    ("2024-08-02", "Government reset\n(new PM appointed)"),
-]
-
-events_df = pd.DataFrame(EVENTS, columns=["date", "label"])
-events_df["date"] = pd.to_datetime(events_df["date"])
-
-# Safety: make sure roll date is datetime
-roll["date"] = pd.to_datetime(roll["date"])
-
-fig, axes = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
-
-# -------------------------
-# Top panel: Rolling beta
-# -------------------------
-axes[0].plot(roll["date"], roll["beta_fx"])
-axes[0].axhline(0, linewidth=1)
-axes[0].set_title("Rolling FX Pass-Through (β), 24-month window")
-axes[0].set_ylabel("β (effect of FX MoM on inflation MoM)")
-
-# -------------------------
-# Bottom panel: Rolling rho
-# -------------------------
-axes[1].plot(roll["date"], roll["rho_infl"])
-axes[1].axhline(0, linewidth=1)
-axes[1].set_title("Rolling Inflation Persistence (ρ), 24-month window")
-axes[1].set_ylabel("ρ (inflation memory)")
-axes[1].set_xlabel("Date")
-
-# -------------------------
-# Event markers + annotations
-# -------------------------
-y_beta_min, y_beta_max = axes[0].get_ylim()
-y_rho_min, y_rho_max = axes[1].get_ylim()
-
-for i, row in events_df.iterrows():
-    d = row["date"]
-    label = row["label"]
-
-    # Vertical line on both panels
-    for ax in axes:
-        ax.axvline(d, linestyle="--", linewidth=1)
-
-    # Put text on the top panel (beta) so we don’t clutter both
-    # Alternate vertical placement a bit so labels don’t overlap too much
-    y_text = y_beta_max - (i % 2) * (0.12 * (y_beta_max - y_beta_min)) - 0.05 * (y_beta_max - y_beta_min)
-
-    axes[0].annotate(
-        label,
-        xy=(d, y_beta_max),
-        xytext=(d, y_text),
-        textcoords="data",
-        ha="left",
-        va="top",
-        fontsize=9,
-        arrowprops=dict(arrowstyle="-", linewidth=0.8),
-    )
-
-plt.xticks(rotation=45)
-plt.tight_layout()
-out_path = OUT_DIR / "06_story_rolling_beta_rho_with_markers.png"
-plt.savefig(out_path, dpi=200)
-plt.close()
-
-print("Saved combined story figure to:", out_path)
-
-# Optional: also save the event markers for later report text
-events_out = OUT_DIR / "event_markers_used.csv"
-events_df.to_csv(events_out, index=False)
-print("Saved event markers to:", events_out)
\ No newline at end of file
+def draw_vol_panels(fig, data, style):
+    ax = fig.subplots(2, 1, sharex=True)
+    ax[0].plot(data["x"], data["infl_vol_6m"])
+    ax[0].set_title("6-Month Rolling Inflation Volatility")
+    ax[1].plot(data["x"], data["fx_vol_6m"])
+    ax[1].set_title("6-Month Rolling FX Volatility")
+    ax[1].tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def draw_acf(fig, data, style):
+    plot_acf(data["y"], lags=style["lags"], ax=fig.subplots(), title=style["title"])
+    fig.tight_layout()
+
+def draw_volatility(fig, data, style):
+    ax = fig.subplots()
+    ax.plot(data["x"], data["infl_vol_6m"], label="Inflation volatility (6m std of MoM)")
+    ax.plot(data["x"], data["fx_vol_6m"], label="FX volatility (6m std of MoM)")
+    ax.plot(data["x"], data["fx_rv_daily"], linewidth=1, alpha=0.7,
+            label="FX realised volatility (daily changes within the month)")
+    ax.set_title("Rolling Volatility: Inflation vs FX (6-month window; FX also from daily fixings)")
+    ax.set_xlabel("Date")
+    ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def draw_beta_markers(fig, data, style):
+    ax = fig.subplots()
+    ax.plot(data["x"], data["beta_fx"])
+    for d in data["markers"]:
+        ax.axvline(d, linestyle="--")
+    ax.set_title("Rolling FX Pass-Through with Regime Markers")
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def draw_story(fig, data, style):
+    axes = fig.subplots(2, 1, sharex=True)
+
+    # Top panel: rolling beta
+    axes[0].plot(data["x"], data["beta_fx"])
+    axes[0].axhline(0, linewidth=1)
+    axes[0].set_title("Rolling FX Pass-Through (β), 24-month window")
+    axes[0].set_ylabel("β (effect of FX MoM on inflation MoM)")
+
+    # Bottom panel: rolling rho
+    axes[1].plot(data["x"], data["rho_infl"])
+    axes[1].axhline(0, linewidth=1)
+    axes[1].set_title("Rolling Inflation Persistence (ρ), 24-month window")
+    axes[1].set_ylabel("ρ (inflation memory)")
+    axes[1].set_xlabel("Date")
+
+    # Event markers + annotations
+    y_beta_min, y_beta_max = axes[0].get_ylim()
+    for i, (d, label) in enumerate(zip(data["event_dates"], data["event_labels"])):
+        # Vertical line on both panels
+        for ax in axes:
+            ax.axvline(d, linestyle="--", linewidth=1)
+
+        # Put text on the top panel (beta) so we don’t clutter both
+        # Alternate vertical placement a bit so labels don’t overlap too much
+        y_text = y_beta_max - (i % 2) * (0.12 * (y_beta_max - y_beta_min)) - 0.05 * (y_beta_max - y_beta_min)
+
+        axes[0].annotate(
+            label,
+            xy=(d, y_beta_max),
+            xytext=(d, y_text),
+            textcoords="data",
+            ha="left",
+            va="top",
+            fontsize=9,
+            arrowprops=dict(arrowstyle="-", linewidth=0.8),
+        )
+
+    # Detected (Bai-Perron) breaks in headline β / ρ with 95% intervals
+    add_break_overlay(axes[0], data["breaks"], "headline", "beta")
+    add_break_overlay(axes[1], data["breaks"], "headline", "rho")
+
+    axes[1].tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def web_beta_markers(data, style):
+    return {"panels": [{"x": web_x(data["x"]), "lines": [{"y": web_y(data["beta_fx"])}],
+                        "events": [{"x": d} for d in web_x(data["markers"])]}]}
+
+def web_story(data, style):
+    x = web_x(data["x"])
+    events = [{"x": d, "label": label.replace("\n", " ")}
+              for d, label in zip(web_x(data["event_dates"]), data["event_labels"])]
+    return {"panels": [
+        {"title": "Rolling FX Pass-Through (β), 24-month window", "ylabel": "β",
+         "x": x, "lines": [{"y": web_y(data["beta_fx"])}], "zero": True,
+         "events": events, "breaks": web_breaks(data["breaks"], "headline", "beta")},
+        {"title": "Rolling Inflation Persistence (ρ), 24-month window", "ylabel": "ρ", "xlabel": "Date",
+         "x": x, "lines": [{"y": web_y(data["rho_infl"])}], "zero": True,
+         "events": events, "breaks": web_breaks(data["breaks"], "headline", "rho")},
+    ]}
+
+def main(data=None):
+    OUT_DIR.mkdir(exist_ok=True)
+
+    # -------------------------------------------------------
+    # 1. LOAD DATA
+    # -------------------------------------------------------
+
+    print("Loading data from:", MERGED_PATH)
+
+    data = data or Datasets()
+    df = data.merged
+
+    # -------------------------------------------------------
+    # 2. INFLATION PERSISTENCE (Half-Life)
+    # -------------------------------------------------------
+
+    # Estimate AR(1) for inflation
+    df["infl_lag1"] = df["infl_mom_pct"].shift(1)
+    df_ar = df.dropna()
+
+    Y = df_ar["infl_mom_pct"]
+    X = sm.add_constant(df_ar["infl_lag1"])
+
+    model_ar = sm.OLS(Y, X).fit()
+
+    rho = model_ar.params["infl_lag1"]
+
+    half_life = np.log(0.5) / np.log(abs(rho))
+
+    print("Inflation persistence (rho):", round(rho,4))
+    print("Half-life of inflation shock (months):", round(half_life,2))
+
+    # -------------------------------------------------------
+    # 3. ROLLING VOLATILITY
+    # -------------------------------------------------------
+
+    df["infl_vol_6m"] = df["infl_mom_pct"].rolling(6).std()
+    df["fx_vol_6m"] = df["fx_mom_pct"].rolling(6).std()
+
+    # Realised FX volatility from the ~20 daily fixings inside each month
+    usd = data.fx_features_for("USD")[["date", "rv_pct", "n_jumps"]]
+    df = df.merge(usd.rename(columns={"rv_pct": "fx_rv_daily", "n_jumps": "fx_jumps"}),
+                  on="date", how="left")
+
+    # -------------------------------------------------------
+    # 4. VOLATILITY SIDE BY SIDE, 5. ACF CHECK
+    # -------------------------------------------------------
+
+    x = df["date"].to_numpy()
+    vol = {"x": x, "infl_vol_6m": df["infl_vol_6m"].to_numpy(), "fx_vol_6m": df["fx_vol_6m"].to_numpy()}
+    charts = [
+        Chart(OUT_DIR / "01_infl_vol_6m.png", draw_vol_panels, vol, {"figsize": (8, 8)}),
+        Chart(OUT_DIR / "01_infl_acf.png", draw_acf, {"y": df["infl_mom_pct"].dropna().to_numpy()},
+              {"lags": 12, "title": "Autocorrelation of Monthly Inflation (MoM)"}),
+        Chart(OUT_DIR / "02_volatility_side_by_side.png", draw_volatility,
+              {**vol, "fx_rv_daily": df["fx_rv_daily"].to_numpy()}, {"figsize": (10, 5)}),
+    ]
+
+    print("Shock remaining after 3 months (rho^3):", round(rho**3, 3))
+    # -------------------------------------------------------
+    # 6. ROLLING PASS-THROUGH (24-month window)
+    # -------------------------------------------------------
+
+    window = 24
+
+    # Each window covers rows [end-window, end) and re-lags inflation inside
+    # the window, so its first month drops out: that is a (window-1)-row
+    # regression on the global lag, stamped with the month after it.
+    est = rolling_ols(df["infl_mom_pct"], df[["fx_mom_pct", "infl_lag1"]], window - 1,
+                      hac_maxlags=HAC_MAXLAGS)
+    ends = np.arange(window, len(df))
+
+    roll = pd.DataFrame({
+        "date": df["date"].iloc[ends].to_numpy(),
+        "beta_fx": est.params[ends - 1, 1],
+        "rho_infl": est.params[ends - 1, 2],
+    })
+
+    # Newey-West standard errors and 95% bounds for every window
+    lo, hi = conf_int(est.params[ends - 1], est.bse[ends - 1])
+    for j, col in ((1, "beta_fx"), (2, "rho_infl")):
+        roll[f"{col}_se"] = est.bse[ends - 1, j]
+        roll[f"{col}_lo"] = lo[:, j]
+        roll[f"{col}_hi"] = hi[:, j]
+
+    # Save the rolling estimates (important for later report + reproducibility)
+    roll_path = OUT_DIR / "rolling_pass_through_24m.csv"
+    roll.to_csv(roll_path, index=False)
+    print("Saved rolling estimates to:", roll_path)
+
+    # Rolling beta (FX pass-through) and rho (inflation persistence)
+    rx = roll["date"].to_numpy()
+    for col, name, title, ylabel in (
+        ("beta_fx", "03_rolling_beta_fx_24m.png",
+         "Rolling FX Pass-Through (β), 24-month window, 95% Newey-West band",
+         "β (effect of FX MoM on inflation MoM)"),
+        ("rho_infl", "04_rolling_rho_infl_24m.png",
+         "Rolling Inflation Persistence (ρ), 24-month window, 95% Newey-West band",
+         "ρ (inflation memory)"),
+    ):
+        charts.append(Chart(OUT_DIR / name, draw_band,
+                            {"x": rx, "y": roll[col].to_numpy(),
+                             "lo": roll[f"{col}_lo"].to_numpy(), "hi": roll[f"{col}_hi"].to_numpy()},
+                            {"figsize": (10, 5), "title": title, "xlabel": "Date", "ylabel": ylabel},
+                            web=web_band))
+
+    pre = df[df["date"] < "2023-01-01"]["fx_vol_6m"].mean()
+    post = df[df["date"] >= "2024-01-01"]["fx_vol_6m"].mean()
+
+    print("Average FX volatility pre-2023:", round(pre,4))
+    print("Average FX volatility 2024+: ", round(post,4))
+
+    pre_rv = df[df["date"] < "2023-01-01"]["fx_rv_daily"].mean()
+    post_rv = df[df["date"] >= "2024-01-01"]["fx_rv_daily"].mean()
+    pre_jumps = df[df["date"] < "2023-01-01"]["fx_jumps"].mean()
+    post_jumps = df[df["date"] >= "2024-01-01"]["fx_jumps"].mean()
+
+    print("Average FX realised volatility (daily) pre-2023:", round(pre_rv,4))
+    print("Average FX realised volatility (daily) 2024+: ", round(post_rv,4))
+    print("FX jump days per month pre-2023 / 2024+:", round(pre_jumps,2), "/", round(post_jumps,2))
+
+    pre_infl = df[df["date"] < "2023-01-01"]["infl_vol_6m"].mean()
+    post_infl = df[df["date"] >= "2024-01-01"]["infl_vol_6m"].mean()
+
+    print("Average inflation volatility pre-2023:", round(pre_infl,4))
+    print("Average inflation volatility 2024+: ", round(post_infl,4))
+
+    charts.append(Chart(OUT_DIR / "05_rolling_beta_with_markers.png", draw_beta_markers,
+                        {"x": rx, "beta_fx": roll["beta_fx"].to_numpy(),
+                         "markers": pd.to_datetime(["2022-04-01", "2023-10-01"]).to_numpy()},
+                        {"figsize": (10, 5)}, web=web_beta_markers))
+
+
+    # --- Event markers (edit labels if you want shorter text)
+    EVENTS = [
+        ("2022-03-01", "Global commodity shock\n(Ukraine war → food/energy prices)"),
+        ("2022-04-01", "BCM leadership change\n(new governor appointed)"),
+        ("2023-12-14", "FX market modernization\n(interbank FX market launch / platform)"),
+        ("2024-08-02", "Government reset\n(new PM appointed)"),
+    ]
+
+    events_df = pd.DataFrame(EVENTS, columns=["date", "label"])
+    events_df["date"] = pd.to_datetime(events_df["date"])
+
+    # Detected (Bai-Perron) breaks in headline β / ρ with 95% intervals
+    breaks = load_breaks(data)
+    out_path = OUT_DIR / "06_story_rolling_beta_rho_with_markers.png"
+    charts.append(Chart(out_path, draw_story,
+                        {"x": rx, "beta_fx": roll["beta_fx"].to_numpy(), "rho_infl": roll["rho_infl"].to_numpy(),
+                         "event_dates": events_df["date"].to_numpy(), "event_labels": list(events_df["label"]),
+                         "breaks": breaks[breaks["series"] == "headline"].reset_index(drop=True)},
+                        {"figsize": (12, 8)}, web=web_story))
+
+    render(charts)
+    print("Saved combined story figure to:", out_path)
+
+    # Optional: also save the event markers for later report text
+    events_out = OUT_DIR / "event_markers_used.csv"
+    events_df["source"] = "event"
+    detected = pd.concat([series_breaks(breaks, "headline", eq) for eq in ("beta", "rho")])
+    detected = pd.DataFrame({
+        "date": detected["break_date"],
+        "label": "Detected break in headline " + detected["equation"]
+                 + " (95% CI " + detected["ci_lo"].dt.strftime("%Y-%m") + " to "
+                 + detected["ci_hi"].dt.strftime("%Y-%m") + ")",
+        "source": "detected",
+    })
+    pd.concat([events_df, detected], ignore_index=True).to_csv(events_out, index=False)
+    print("Saved event markers to:", events_out)
+
+if __name__ == "__main__":
+    main()
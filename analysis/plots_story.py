@@ -1,12 +1,23 @@
+import sys
 from pathlib import Path
 import pandas as pd
-import matplotlib.pyplot as plt
-import statsmodels.api as sm
 
-DATA_FX = Path("data/processed/merged_fx_cpi_2020_2025.csv")
-DATA_CATS = Path("data/processed/cpi_categories_monthly_2020_2025.csv")
+from breaks import add_break_overlay, load_breaks, web_breaks
+from charts import Chart, render, web_frames
+from rolling import ROLL_WINDOW, rolling_frames
+from tvp import tvp_frames
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
+
 OUT_DIR = Path("analysis/outputs")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# "rolling": 24m OLS windows with Newey-West bands (07/08_rolling_*.png)
+# "tvp": Kalman-smoothed random-walk β / ρ with 95% bands (07/08_tvp_*.png)
+MODES = {
+    "rolling": ("Rolling", "24m window, 95% Newey-West bands"),
+    "tvp": ("Time-varying", "Kalman-smoothed random walk, 95% bands"),
+}
 
 EVENTS = [
     ("2020-03-01", "COVID shock"),
@@ -17,55 +28,47 @@ EVENTS = [
 ]
 events = [(pd.to_datetime(d), label) for d, label in EVENTS]
 
-ROLL_WINDOW = 24  # months
-
-def rolling_beta(df, y_col, x_col="fx_mom_pct"):
-    # rolling regression: y(t) ~ const + x(t)
-    betas = []
-    dates = []
-    df = df.dropna(subset=[y_col, x_col]).sort_values("date")
-    for i in range(ROLL_WINDOW, len(df) + 1):
-        w = df.iloc[i - ROLL_WINDOW:i]
-        y = w[y_col]
-        X = sm.add_constant(w[x_col])
-        model = sm.OLS(y, X).fit()
-        betas.append(model.params[x_col])
-        dates.append(w["date"].iloc[-1])
-    return pd.DataFrame({"date": dates, "beta": betas})
-
-def rolling_rho(df, y_col):
-    # rolling AR(1): y(t) ~ const + y(t-1)
-    rhos = []
-    dates = []
-    df = df.dropna(subset=[y_col]).sort_values("date").copy()
-    df["y_lag1"] = df[y_col].shift(1)
-    df = df.dropna(subset=["y_lag1"])
-    for i in range(ROLL_WINDOW, len(df) + 1):
-        w = df.iloc[i - ROLL_WINDOW:i]
-        y = w[y_col]
-        X = sm.add_constant(w["y_lag1"])
-        model = sm.OLS(y, X).fit()
-        rhos.append(model.params["y_lag1"])
-        dates.append(w["date"].iloc[-1])
-    return pd.DataFrame({"date": dates, "rho": rhos})
-
 def add_event_lines(ax):
     for d, label in events:
         ax.axvline(d, linestyle="--", linewidth=1)
     # Put legend-like text only once to avoid clutter
     # (In report we’ll explain these markers clearly.)
 
-def main():
-    fx = pd.read_csv(DATA_FX)
-    fx["date"] = pd.to_datetime(fx["date"])
-    fx = fx.sort_values("date")
-
-    cats = pd.read_csv(DATA_CATS)
-    cats["date"] = pd.to_datetime(cats["date"])
-    cats = cats.sort_values("date")
-
-    # Merge FX with category inflation (MoM)
-    df = cats.merge(fx[["date", "fx_mom_pct"]], on="date", how="inner")
+def draw_estimates(fig, data, style):
+    key = style["key"]
+    ax = fig.subplots()
+    for name, fdf in data["frames"].items():
+        line, = ax.plot(fdf["date"], fdf[key], label=name)
+        ax.fill_between(fdf["date"], fdf[f"{key}_lo"], fdf[f"{key}_hi"], color=line.get_color(), alpha=0.12)
+    ax.axhline(0, linewidth=1)
+    add_event_lines(ax)
+    add_break_overlay(ax, data["breaks"], "headline", key, label="headline break (95% CI)")
+    ax.set_title(style["title"])
+    ax.set_xlabel("Date")
+    ax.set_ylabel(style["ylabel"])
+    ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def web_estimates(data, style):
+    key = style["key"]
+    return {"panels": [{**web_frames(data["frames"], key), "xlabel": "Date", "ylabel": style["ylabel"],
+                        "zero": True, "legend": True,
+                        "events": [{"x": f"{d:%Y-%m}", "label": label} for d, label in events],
+                        "breaks": web_breaks(data["breaks"], "headline", key)}]}
+
+def estimates_chart(frames, key, breaks, title, ylabel, path) -> Chart:
+    frames = {name: fdf[["date", key, f"{key}_lo", f"{key}_hi"]] for name, fdf in frames.items()}
+    return Chart(path, draw_estimates, {"frames": frames, "breaks": breaks},
+                 {"figsize": (12, 6), "key": key, "title": title, "ylabel": ylabel},
+                 web=web_estimates)
+
+def main(data=None, modes=tuple(MODES)):
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Category inflation (MoM) merged with FX
+    data = data or Datasets()
+    df = data.categories_fx
 
     # --- Rolling betas: category MoM inflation vs FX MoM change
     targets = {
@@ -75,46 +78,42 @@ def main():
         "services_proxy": "services_proxy_infl_mom_pct",
     }
 
-    beta_frames = {}
-    for name, col in targets.items():
-        beta_frames[name] = rolling_beta(df, y_col=col)
-
-    # --- Rolling rho: persistence of category MoM inflation
-    rho_frames = {}
-    for name, col in targets.items():
-        rho_frames[name] = rolling_rho(df, y_col=col)
-
-    # 1) Rolling betas plot
-    plt.figure(figsize=(12,6))
-    for name, bdf in beta_frames.items():
-        plt.plot(bdf["date"], bdf["beta"], label=name)
-    plt.axhline(0, linewidth=1)
-    add_event_lines(plt.gca())
-    plt.title("Rolling FX Pass-Through (β): category inflation vs FX change (24m window)")
-    plt.xlabel("Date")
-    plt.ylabel("β")
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(OUT_DIR / "07_rolling_beta_categories.png", dpi=200)
-    plt.close()
-
-    # 2) Rolling rhos plot
-    plt.figure(figsize=(12,6))
-    for name, rdf in rho_frames.items():
-        plt.plot(rdf["date"], rdf["rho"], label=name)
-    plt.axhline(0, linewidth=1)
-    add_event_lines(plt.gca())
-    plt.title("Rolling Inflation Persistence (ρ): category MoM inflation AR(1) (24m window)")
-    plt.xlabel("Date")
-    plt.ylabel("ρ")
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(OUT_DIR / "08_rolling_rho_categories.png", dpi=200)
-    plt.close()
-
-    print("Saved plots to:", OUT_DIR)
+    # Detected structural breaks in headline β / ρ, next to the event markers
+    breaks = load_breaks(data)
+    breaks = breaks[breaks["series"] == "headline"].reset_index(drop=True)
+
+    charts = []
+
+    for mode in modes:
+        # --- β and ρ (persistence of category MoM inflation) for every
+        # target: one batched rolling pass, or the tvp stage's estimates
+        if mode == "rolling":
+            beta_frames, rho_frames = rolling_frames(df, targets, window=ROLL_WINDOW)
+        elif mode == "tvp":
+            beta_frames, rho_frames = tvp_frames(list(targets), data)
+        else:
+            raise ValueError(f"unknown mode {mode!r}, expected one of {tuple(MODES)}")
+        kind, how = MODES[mode]
+
+        # 1) β plot
+        charts.append(estimates_chart(
+            beta_frames, "beta", breaks,
+            f"{kind} FX Pass-Through (β): category inflation vs FX change ({how})",
+            "β", OUT_DIR / f"07_{mode}_beta_categories.png"))
+
+        # 2) ρ plot
+        charts.append(estimates_chart(
+            rho_frames, "rho", breaks,
+            f"{kind} Inflation Persistence (ρ): category MoM inflation AR(1) ({how})",
+            "ρ", OUT_DIR / f"08_{mode}_rho_categories.png"))
+
+    render(charts)
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Category β / ρ story charts")
+    parser.add_argument("--mode", choices=list(MODES), action="append",
+                        help="estimator to plot (repeatable; default: all)")
+    args = parser.parse_args()
+    main(modes=args.mode or tuple(MODES))
@@ -0,0 +1,202 @@
+import hashlib
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from rolling import ROLL_WINDOW
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from content_hash import CACHE_DIR  # noqa: E402
+from datasets import Datasets  # noqa: E402
+
+# Rebuilt from the processed history whenever it is missing or the months it
+# has consumed were revised
+STATE_PATH = CACHE_DIR / "recursive_ols.npz"
+OUT_CSV = Path("analysis/outputs/16_recursive_estimates.csv")
+
+# infl_mom(t) ~ const + fx_mom(t) + infl_mom(t-1), the regression_baselines
+# equation; the rolling fit covers the same ROLL_WINDOW - 1 rows as metrics.py
+REGRESSORS = ["fx_mom_pct", "infl_lag1"]
+ROLL_ROWS = ROLL_WINDOW - 1
+HISTORY_COLS = ["date", "infl_mom_pct", "fx_mom_pct"]
+
+
+class RecursiveOLS:
+    """
+    Expanding- and rolling-window OLS kept as sufficient statistics, so a
+    new observation costs O(k^2) whatever the history length.
+
+    The expanding fit accumulates Z'Z, Z'y and y'y; the rolling fit adds
+    the new row and subtracts (rank-1 downdate) the row leaving the window,
+    which a ring buffer of the last `window` rows remembers. Coefficients
+    come from one k x k solve. Rows with a missing value are skipped.
+    """
+
+    def __init__(self, n_regressors: int, window: int = ROLL_ROWS):
+        k = n_regressors + 1
+        self.window = window
+        self.n = 0
+        self.zz = np.zeros((k, k))
+        self.zy = np.zeros(k)
+        self.yy = 0.0
+        self.buf_z = np.zeros((window, k))
+        self.buf_y = np.zeros(window)
+        self.pos = 0
+        self.n_roll = 0
+        self.roll_zz = np.zeros((k, k))
+        self.roll_zy = np.zeros(k)
+        self.roll_yy = 0.0
+
+    def update(self, y: float, x) -> bool:
+        """Add one observation; False (and no change) if anything is missing."""
+        z = np.concatenate([[1.0], np.asarray(x, dtype=float)])
+        if not (np.isfinite(y) and np.isfinite(z).all()):
+            return False
+
+        zz = np.outer(z, z)
+        self.n += 1
+        self.zz += zz
+        self.zy += z * y
+        self.yy += y * y
+
+        if self.n_roll == self.window:
+            old_z, old_y = self.buf_z[self.pos], self.buf_y[self.pos]
+            self.roll_zz -= np.outer(old_z, old_z)
+            self.roll_zy -= old_z * old_y
+            self.roll_yy -= old_y * old_y
+        else:
+            self.n_roll += 1
+        self.roll_zz += zz
+        self.roll_zy += z * y
+        self.roll_yy += y * y
+        self.buf_z[self.pos] = z
+        self.buf_y[self.pos] = y
+        self.pos = (self.pos + 1) % self.window
+        return True
+
+    @staticmethod
+    def _solve(zz, zy, yy, n):
+        k = len(zy)
+        if n <= k or abs(np.linalg.det(zz)) <= 1e-12 * np.prod(np.diag(zz)):
+            return np.full(k, np.nan), np.nan
+        params = np.linalg.solve(zz, zy)
+        return params, (yy - params @ zy) / (n - k)
+
+    def expanding(self):
+        """(params, resid_var) on every observation so far; constant first."""
+        return self._solve(self.zz, self.zy, self.yy, self.n)
+
+    def rolling(self):
+        """(params, resid_var) on the last `window` observations; NaN until the window is full."""
+        if self.n_roll < self.window:
+            return np.full(len(self.zy), np.nan), np.nan
+        return self._solve(self.roll_zz, self.roll_zy, self.roll_yy, self.n_roll)
+
+    def state_dict(self) -> dict:
+        return {key: np.asarray(value) for key, value in vars(self).items()}
+
+    @classmethod
+    def from_state_dict(cls, state: dict) -> "RecursiveOLS":
+        est = cls.__new__(cls)
+        for key, value in state.items():
+            value = np.array(value)
+            setattr(est, key, value.item() if value.ndim == 0 else value)
+        return est
+
+
+def history_digest(months: pd.DataFrame) -> str:
+    """Content hash of the months an estimator has consumed (HISTORY_COLS, in order)."""
+    values = pd.util.hash_pandas_object(months[HISTORY_COLS], index=False)
+    return hashlib.sha256(values.to_numpy().tobytes()).hexdigest()
+
+
+def save_state(est: RecursiveOLS, history: pd.DataFrame, path: Path = STATE_PATH):
+    """Write the estimator with the digest and last month of the history it has seen (atomically)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, last_date=str(history["date"].iloc[-1].date()),
+             last_infl=float(history["infl_mom_pct"].iloc[-1]),
+             history=history_digest(history), **est.state_dict())
+    tmp.replace(path)
+
+
+def load_state(path: Path = STATE_PATH):
+    """(estimator, last_date, last_infl, history digest), or None when no state is saved."""
+    if not path.exists():
+        return None
+    with np.load(path) as f:
+        state = {key: f[key] for key in f.files}
+    if "history" not in state:
+        return None
+    last_date = pd.Timestamp(str(state.pop("last_date")))
+    last_infl = float(state.pop("last_infl"))
+    history = str(state.pop("history"))
+    return RecursiveOLS.from_state_dict(state), last_date, last_infl, history
+
+
+def update(est: RecursiveOLS, months: pd.DataFrame, last_infl: float) -> pd.DataFrame:
+    """
+    Feed new months (date, infl_mom_pct, fx_mom_pct; date-sorted) to the
+    estimator one at a time. The inflation lag is carried over from the
+    previous month, so only the new rows are needed.
+
+    Returns one row of expanding and rolling estimates per month.
+    """
+    rows = []
+    for date, infl, fx in months[["date", "infl_mom_pct", "fx_mom_pct"]].itertuples(index=False):
+        est.update(infl, [fx, last_infl])
+        last_infl = infl
+        (_, b_exp, r_exp), _ = est.expanding()
+        (_, b_roll, r_roll), _ = est.rolling()
+        rows.append({"date": date, "nobs": est.n,
+                     "beta_fx_expanding": b_exp, "rho_infl_expanding": r_exp,
+                     "beta_fx_rolling": b_roll, "rho_infl_rolling": r_roll})
+    return pd.DataFrame(rows, columns=["date", "nobs", "beta_fx_expanding", "rho_infl_expanding",
+                                       "beta_fx_rolling", "rho_infl_rolling"])
+
+
+def main(data=None):
+    OUT_CSV.parent.mkdir(parents=True, exist_ok=True)
+
+    data = data or Datasets()
+    df = data.merged.sort_values("date")
+
+    saved = load_state() if OUT_CSV.exists() else None
+    if saved is not None:
+        est, last_date, last_infl, history = saved
+        if history_digest(df[df["date"] <= last_date]) != history:
+            # A month the state has already consumed was revised: sufficient
+            # statistics cannot drop the old value, so start over
+            print("Recursive history revised since", last_date.date(), "- rebuilding")
+            saved = None
+    if saved is None:
+        # No state yet (or no history to append to): replay the full history once
+        est, last_date, last_infl = RecursiveOLS(len(REGRESSORS)), None, np.nan
+        new = df
+    else:
+        new = df[df["date"] > last_date]
+
+    if new.empty:
+        print("Recursive estimates up to date at", last_date.date())
+        return
+
+    out = update(est, new, last_infl)
+    save_state(est, df[df["date"] <= new["date"].iloc[-1]])
+    if saved is None:
+        out.to_csv(OUT_CSV, index=False, date_format="%Y-%m-%d")
+    else:
+        out.to_csv(OUT_CSV, mode="a", header=False, index=False, date_format="%Y-%m-%d")
+
+    latest = out.iloc[-1]
+    print(f"Added {len(out)} month(s) through {latest['date']:%Y-%m}:")
+    print(f"  expanding  β={latest['beta_fx_expanding']:+.4f}  ρ={latest['rho_infl_expanding']:+.4f}  "
+          f"(n={latest['nobs']})")
+    print(f"  rolling    β={latest['beta_fx_rolling']:+.4f}  ρ={latest['rho_infl_rolling']:+.4f}  "
+          f"({ROLL_ROWS} months)")
+    print("Saved:", OUT_CSV)
+    print("State:", STATE_PATH)
+
+
+if __name__ == "__main__":
+    main()
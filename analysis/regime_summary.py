@@ -1,35 +1,49 @@
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+from bootstrap import BLOCK_LEN, N_BOOT, block_bootstrap, ols_slope
+from breaks import detected_regimes, load_breaks
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
+
 ROLL_BETA_RHO = Path("analysis/outputs/09_structural_overlay.png")  # already made
-DATA_FX = Path("data/processed/merged_fx_cpi_2020_2025.csv")
-DATA_CATS = Path("data/processed/cpi_categories_monthly_2020_2025.csv")
 
 OUT_TABLE = Path("analysis/outputs/10_regime_table.csv")
-OUT_TABLE.parent.mkdir(parents=True, exist_ok=True)
+OUT_BOOT = Path("analysis/outputs/12_regime_bootstrap.csv")
 
-# Define regimes (data-driven but clean)
+ALPHA = 0.05
+
+# Hand-picked regimes (the report's narrative split)
 REGIMES = {
     "Amplifier (2022–2023)": ("2022-01-01", "2023-12-31"),
     "Absorber (2024–2025)": ("2024-01-01", "2025-12-31"),
 }
 
-def main():
-    fx = pd.read_csv(DATA_FX)
-    fx["date"] = pd.to_datetime(fx["date"])
-
-    cats = pd.read_csv(DATA_CATS)
-    cats["date"] = pd.to_datetime(cats["date"])
+def main(data=None):
+    OUT_TABLE.parent.mkdir(parents=True, exist_ok=True)
 
-    df = cats.merge(fx[["date", "fx_mom_pct"]], on="date", how="inner").sort_values("date")
+    data = data or Datasets()
+    df = data.categories_fx
+    usd = data.fx_features_for("USD")
 
     # Use the already-computed rolling series? If not saved, compute quick proxies:
     # We'll use simple regressions + AR(1) within each regime (clean & understandable).
 
+    # Plus the regimes between the Bai-Perron breaks in headline pass-through
+    detected = detected_regimes(load_breaks(data), "headline", "beta",
+                                df["date"].min(), df["date"].max())
+    regimes = [("hand-picked", name, span) for name, span in REGIMES.items()]
+    regimes += [("detected", name, span) for name, span in detected.items()]
+
     rows = []
 
-    for reg_name, (start, end) in REGIMES.items():
-        sub = df[(df["date"] >= start) & (df["date"] <= end)].copy()
+    for source, reg_name, (start, end) in regimes:
+        sub = df[(df["date"] >= start) & (df["date"] <= end)]
+        # USD/MRU activity inside the regime, from the daily fixings
+        fx_days = usd[(usd["date"] >= start) & (usd["date"] <= end)]
 
         # Pass-through β: infl_mom ~ fx_mom (headline + food)
         import statsmodels.api as sm
@@ -58,6 +72,11 @@ def main():
             "rho_headline": rho("headline_infl_mom_pct"),
             "rho_food": rho("food_infl_mom_pct"),
             "n_months": len(sub),
+            "fx_rv_daily": fx_days["rv_pct"].mean(),
+            "fx_range": fx_days["range_pct"].mean(),
+            "fx_jumps": int(fx_days["n_jumps"].sum()),
+            "fx_drift": fx_days["drift_pct"].mean(),
+            "source": source,
         })
 
     out = pd.DataFrame(rows)
@@ -65,5 +84,75 @@ def main():
     print("Saved:", OUT_TABLE)
     print(out)
 
+    regime_bootstrap(data)
+
+def in_regime(df, start, end):
+    return df[(df["date"] >= start) & (df["date"] <= end)]
+
+def regime_samples(df, columns, start, end):
+    """(Y, x) pairs of the `columns` series for β (y ~ fx) and ρ (y ~ y(-1), lagged within the regime)."""
+    sub = in_regime(df, start, end)
+    Y = sub[columns].to_numpy(dtype=float)
+    x = sub["fx_mom_pct"].to_numpy(dtype=float)
+    if np.isnan(Y).any() or np.isnan(x).any():
+        raise ValueError(f"Missing months between {start} and {end}; the block bootstrap needs a complete regime")
+    return {"beta": (Y, x), "rho": (Y[1:], Y[:-1])}
+
+def regime_bootstrap(data):
+    """
+    Δβ and Δρ (absorber minus amplifier) for headline and every
+    category_cols series, with moving-block bootstrap percentile CIs and
+    two-sided p-values for Δ = 0. The two regimes are resampled
+    independently. A series with a missing month in either regime is left
+    out (the blocks need complete regimes).
+    """
+    df = data.category_mom_fx
+    (amp_name, amp), (abs_name, absb) = REGIMES.items()
+
+    columns = [c for c in data.category_cols
+               if all(in_regime(df, start, end)[c].notna().all() for start, end in (amp, absb))]
+    skipped = [c for c in data.category_cols if c not in columns]
+    if skipped:
+        print("Bootstrap skips series with missing regime months:", ", ".join(skipped))
+
+    samples = {}
+    for key, (start, end) in (("amp", amp), ("abs", absb)):
+        for stat, pair in regime_samples(df, columns, start, end).items():
+            samples[f"{key}_{stat}"] = pair
+
+    point = {name: ols_slope(Y.T, x.T if x.ndim == 2 else x) for name, (Y, x) in samples.items()}
+    boot = block_bootstrap(samples, N_BOOT, BLOCK_LEN)
+
+    rows = []
+    for stat in ("beta", "rho"):
+        delta = point[f"abs_{stat}"] - point[f"amp_{stat}"]
+        draws = boot[f"abs_{stat}"] - boot[f"amp_{stat}"]  # (N_BOOT, K)
+        valid = np.isfinite(draws).sum(axis=0)
+        lo, hi = np.nanpercentile(draws, [100 * ALPHA / 2, 100 * (1 - ALPHA / 2)], axis=0)
+        # Two-sided percentile p-value: the CI excludes 0 exactly when p < ALPHA
+        below = ((draws <= 0).sum(axis=0) + 1) / (valid + 1)
+        above = ((draws >= 0).sum(axis=0) + 1) / (valid + 1)
+        p = np.minimum(1.0, 2 * np.minimum(below, above))
+        for k, col in enumerate(columns):
+            rows.append({
+                "series": col,
+                "stat": stat,
+                "amplifier": point[f"amp_{stat}"][k],
+                "absorber": point[f"abs_{stat}"][k],
+                "delta": delta[k],
+                "ci_lo": lo[k],
+                "ci_hi": hi[k],
+                "p_value": p[k],
+                "n_valid": valid[k],
+            })
+
+    out = pd.DataFrame(rows)
+    out["n_boot"] = N_BOOT
+    out["block_len"] = BLOCK_LEN
+    out.to_csv(OUT_BOOT, index=False)
+    print(f"\nBlock bootstrap: {amp_name} -> {abs_name} ({N_BOOT} replicates, {BLOCK_LEN}-month blocks)")
+    print(out[["series", "stat", "delta", "ci_lo", "ci_hi", "p_value"]].round(4).to_string(index=False))
+    print("Saved:", OUT_BOOT)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,228 @@
+from statistics import NormalDist
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+ROLL_WINDOW = 24  # months
+
+# Newey-West lag truncation, as in the full-sample regression_baselines fits
+HAC_MAXLAGS = 6
+
+
+class RollingOLS(NamedTuple):
+    """
+    Estimates for the window ending at each row (rows before the first
+    full window, or with too few valid observations, are NaN).
+
+    rolling_ols() returns arrays indexed by row; rolling_ols_batch()
+    prefixes every field with (targets, windows).
+    """
+    params: np.ndarray     # (..., n, k); column 0 is the constant when add_const
+    resid_var: np.ndarray  # (..., n)  SSR / (nobs - k)
+    rsquared: np.ndarray   # (..., n)
+    nobs: np.ndarray       # (..., n)  valid observations in the window
+    bse: np.ndarray = None # (..., n, k) Newey-West standard errors, when asked for
+
+
+def _window_sums(a: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """
+    Sums over a[:, t-w+1 : t+1] for every target, window length w and row t.
+
+    a is (K, n, ...); the result is (K, W, n, ...) and NaN where t < w-1.
+    One cumulative sum serves every window length.
+    """
+    n = a.shape[1]
+    c = np.concatenate([np.zeros((a.shape[0], 1) + a.shape[2:]), np.cumsum(a, axis=1)], axis=1)
+    t = np.arange(n)
+    start = t[None, :] + 1 - windows[:, None]                   # (W, n)
+    out = c[:, t + 1][:, None] - c[:, np.clip(start, 0, None)]  # (K, W, n, ...)
+    out[:, start < 0] = np.nan
+    return out
+
+
+def _hac_meat(Z, U, a, windows, maxlags):
+    """
+    Newey-West (Bartlett) sum of score autocovariances for every window.
+
+    The score of row s is g_s = Z_s e_s with e_s = U_s . a, where a holds
+    the window's own coefficients. g_s g_{s-l}' is therefore a quadratic
+    form in a over the products Z_s U_s (x) Z_{s-l} U_{s-l}; their window
+    sums come from one cumulative sum per lag, like the X'X sums. A lag-l
+    pair only counts when both rows lie in the window, i.e. s runs over
+    the last w-l rows.
+    """
+    K, n, k = Z.shape
+    m = U.shape[2]
+    H = (Z[:, :, :, None] * U[:, :, None, :]).reshape(K, n, k * m)
+
+    meat = 0.0
+    for lag in range(maxlags + 1):
+        P = np.zeros((K, n, k * m, k * m))
+        P[:, lag:] = H[:, lag:, :, None] * H[:, :n - lag, None, :]
+        M = _window_sums(P, windows - lag).reshape(P.shape[:1] + (len(windows), n, k, m, k, m))
+        S = np.einsum("...piqj,...i,...j->...pq", M, a, a)
+        if lag == 0:
+            meat = S
+        else:
+            meat = meat + (1 - lag / (maxlags + 1)) * (S + np.swapaxes(S, -1, -2))
+    return meat
+
+
+def rolling_ols_batch(Y, X, windows, add_const: bool = True, full_only: bool = False,
+                      hac_maxlags=None) -> RollingOLS:
+    """
+    OLS of each of K targets on its regressors, for several window lengths,
+    in one vectorised pass.
+
+    Y is (n,) or (n, K). X is (n, p) when all targets share regressors or
+    (n, K, p) when each target has its own (e.g. its own lag). Window
+    cross-products X'X, X'y and y'y come from differences of cumulative
+    sums, so the cost is O(K W n k^2) whatever the window lengths.
+
+    Rows where a target or its regressors are NaN are left out of every
+    window that contains them, exactly like dropna() on each window. With
+    full_only, a window is only estimated once all of its rows are valid.
+
+    With hac_maxlags, bse holds Newey-West standard errors (Bartlett
+    kernel, no small-sample correction), as statsmodels gives for
+    fit(cov_type="HAC", cov_kwds={"maxlags": hac_maxlags}) on each window.
+    Lags count rows, so windows with missing rows should use full_only.
+    """
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n, K = Y.shape
+    X = np.asarray(X, dtype=float)
+    if X.ndim == 1:
+        X = X[:, None]
+    if X.ndim == 2:
+        X = np.broadcast_to(X[:, None, :], (n, K, X.shape[1]))
+    Y = Y.T                         # (K, n)
+    X = np.transpose(X, (1, 0, 2))  # (K, n, p)
+    windows = np.atleast_1d(np.asarray(windows, dtype=int))
+
+    valid = np.isfinite(Y) & np.isfinite(X).all(axis=2)
+
+    # Centre each target on its full-sample means to keep the running sums
+    # well conditioned; only the intercept needs undoing afterwards.
+    if add_const:
+        counts = np.maximum(valid.sum(axis=1), 1)
+        x_mean = np.where(valid[:, :, None], X, 0.0).sum(axis=1) / counts[:, None]  # (K, p)
+        y_mean = np.where(valid, Y, 0.0).sum(axis=1) / counts                       # (K,)
+        Z = np.concatenate([np.ones(X.shape[:2] + (1,)), X - x_mean[:, None, :]], axis=2)
+        yc = Y - y_mean[:, None]
+    else:
+        Z = X
+        yc = Y
+    Z = np.where(valid[:, :, None], Z, 0.0)
+    yc = np.where(valid, yc, 0.0)
+    k = Z.shape[2]
+
+    nobs = _window_sums(valid.astype(float), windows)
+    ZtZ = _window_sums(Z[:, :, :, None] * Z[:, :, None, :], windows)
+    Zty = _window_sums(Z * yc[:, :, None], windows)
+    yty = _window_sums(yc * yc, windows)
+    sy = _window_sums(yc, windows)
+
+    ok = nobs > k
+    if full_only:
+        ok &= nobs == windows[None, :, None]
+
+    # Rank check against the Hadamard bound det(A) <= prod(diag(A))
+    params = np.full(nobs.shape + (k,), np.nan)
+    if ok.any():
+        diag = np.prod(np.diagonal(ZtZ[ok], axis1=-2, axis2=-1), axis=-1)
+        ok[ok] = np.abs(np.linalg.det(ZtZ[ok])) > 1e-12 * diag
+    if ok.any():
+        params[ok] = np.linalg.solve(ZtZ[ok], Zty[ok][..., None])[..., 0]
+
+    ssr = yty - np.einsum("...i,...i->...", params, Zty)
+    sst = yty - sy * sy / np.where(nobs > 0, nobs, np.nan)
+    resid_var = np.where(ok, ssr / np.where(ok, nobs - k, np.nan), np.nan)
+    rsquared = np.where(ok, 1.0 - ssr / sst, np.nan)
+
+    bse = None
+    if hac_maxlags is not None:
+        U = np.concatenate([yc[:, :, None], Z], axis=2)
+        a = np.concatenate([np.ones(params.shape[:-1] + (1,)), -params], axis=-1)
+        meat = _hac_meat(Z, U, a, windows, hac_maxlags)
+
+        cov = np.full(params.shape + (k,), np.nan)
+        if ok.any():
+            bread = np.linalg.inv(ZtZ[ok])
+            cov[ok] = bread @ meat[ok] @ bread
+        if add_const:
+            # Undo the centring: intercept = c - x_mean . slopes
+            T = np.broadcast_to(np.eye(k), (K, k, k)).copy()
+            T[:, 0, 1:] = -x_mean
+            cov = T[:, None, None] @ cov @ np.swapaxes(T, -1, -2)[:, None, None]
+        bse = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+
+    if add_const:
+        params[..., 0] += y_mean[:, None, None] - np.einsum("kwti,ki->kwt", params[..., 1:], x_mean)
+
+    return RollingOLS(params, resid_var, rsquared, nobs, bse)
+
+
+def rolling_ols(y, X, window: int = ROLL_WINDOW, add_const: bool = True, hac_maxlags=None) -> RollingOLS:
+    """OLS of one target y on X over every `window`-row window."""
+    est = rolling_ols_batch(y, X, [window], add_const=add_const, hac_maxlags=hac_maxlags)
+    return RollingOLS(*(None if a is None else a[0, 0] for a in est))
+
+
+def conf_int(params, bse, alpha: float = 0.05):
+    """Normal (lower, upper) bounds, matching statsmodels' HAC conf_int()."""
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    return params - z * bse, params + z * bse
+
+
+def _beta_rho_fits(Y, x, windows, hac_maxlags=None):
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    Y_lag1 = np.vstack([np.full((1, Y.shape[1]), np.nan), Y[:-1]])
+
+    beta = rolling_ols_batch(Y, x, windows, full_only=True, hac_maxlags=hac_maxlags)
+    rho = rolling_ols_batch(Y, Y_lag1[:, :, None], windows, full_only=True, hac_maxlags=hac_maxlags)
+    return beta, rho
+
+
+def rolling_beta_rho(Y, x, windows=(ROLL_WINDOW,)):
+    """
+    Rolling pass-through and persistence for K target series at once.
+
+    beta: y_k(t) ~ const + x(t)         (FX pass-through)
+    rho:  y_k(t) ~ const + y_k(t-1)     (AR(1) persistence)
+
+    Y is (n, K), x is (n,). Returns (beta, rho), each (K, W, n), NaN until
+    a window of length w holds w complete observations.
+    """
+    beta, rho = _beta_rho_fits(Y, x, windows)
+    return beta.params[..., 1], rho.params[..., 1]
+
+
+def rolling_frames(df, targets: dict, x_col: str = "fx_mom_pct", window: int = ROLL_WINDOW,
+                   hac_maxlags: int = HAC_MAXLAGS, alpha: float = 0.05):
+    """
+    rolling_beta_rho() for the {name: column} targets of a date-sorted
+    frame, as {name: DataFrame(date, beta, beta_se, beta_lo, beta_hi)} and
+    the same for rho, with Newey-West standard errors and normal bounds.
+    """
+    fits = _beta_rho_fits(df[list(targets.values())], df[x_col], [window], hac_maxlags)
+    dates = df["date"].to_numpy()
+    frames = ({}, {})
+    for key, est, out in zip(("beta", "rho"), fits, frames):
+        coef = est.params[:, 0, :, 1]
+        se = est.bse[:, 0, :, 1]
+        lo, hi = conf_int(coef, se, alpha)
+        for i, name in enumerate(targets):
+            keep = np.isfinite(coef[i])
+            out[name] = pd.DataFrame({
+                "date": dates[keep],
+                key: coef[i, keep],
+                f"{key}_se": se[i, keep],
+                f"{key}_lo": lo[i, keep],
+                f"{key}_hi": hi[i, keep],
+            })
+    return frames
@@ -1,14 +1,15 @@
+import sys
 from pathlib import Path
 import pandas as pd
-import matplotlib.pyplot as plt
-import statsmodels.api as sm
 
-DATA_FX = Path("data/processed/merged_fx_cpi_2020_2025.csv")
-DATA_CATS = Path("data/processed/cpi_categories_monthly_2020_2025.csv")
-OUT = Path("analysis/outputs/09_structural_overlay.png")
-OUT.parent.mkdir(parents=True, exist_ok=True)
+from breaks import add_break_overlay, load_breaks, web_breaks
+from charts import Chart, render, web_frames
+from rolling import rolling_frames
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
 
-ROLL = 24
+OUT = Path("analysis/outputs/09_structural_overlay.png")
 
 EVENTS = [
     ("2020-03-01", "COVID"),
@@ -17,85 +18,71 @@ EVENTS = [
     ("2024-08-01", "PM change"),
 ]
 
-def rolling_beta(df, y_col):
-    betas = []
-    dates = []
-    df = df.dropna(subset=[y_col, "fx_mom_pct"]).sort_values("date")
-    for i in range(ROLL, len(df)+1):
-        w = df.iloc[i-ROLL:i]
-        Y = w[y_col]
-        X = sm.add_constant(w["fx_mom_pct"])
-        model = sm.OLS(Y, X).fit()
-        betas.append(model.params["fx_mom_pct"])
-        dates.append(w["date"].iloc[-1])
-    return pd.DataFrame({"date": dates, "beta": betas})
-
-def rolling_rho(df, y_col):
-    df = df.sort_values("date").copy()
-    df["lag1"] = df[y_col].shift(1)
-    df = df.dropna(subset=[y_col, "lag1"])
-    rhos = []
-    dates = []
-    for i in range(ROLL, len(df)+1):
-        w = df.iloc[i-ROLL:i]
-        Y = w[y_col]
-        X = sm.add_constant(w["lag1"])
-        model = sm.OLS(Y, X).fit()
-        rhos.append(model.params["lag1"])
-        dates.append(w["date"].iloc[-1])
-    return pd.DataFrame({"date": dates, "rho": rhos})
-
-def main():
-    fx = pd.read_csv(DATA_FX)
-    fx["date"] = pd.to_datetime(fx["date"])
-
-    cats = pd.read_csv(DATA_CATS)
-    cats["date"] = pd.to_datetime(cats["date"])
-
-    df = cats.merge(fx[["date", "fx_mom_pct"]], on="date", how="inner")
-
-    # Headline + Food MoM inflation
-    targets = {
-        "headline": "headline_infl_mom_pct",
-        "food": "food_infl_mom_pct",
-    }
-
-    beta_frames = {}
-    rho_frames = {}
-
-    for name, col in targets.items():
-        beta_frames[name] = rolling_beta(df, col)
-        rho_frames[name] = rolling_rho(df, col)
-
-    fig, axes = plt.subplots(2, 1, figsize=(12,8), sharex=True)
+def draw_overlay(fig, data, style):
+    axes = fig.subplots(2, 1, sharex=True)
 
     # --- Panel 1: Rolling Beta
-    for name, bdf in beta_frames.items():
-        axes[0].plot(bdf["date"], bdf["beta"], label=name)
+    for name, bdf in data["beta"].items():
+        line, = axes[0].plot(bdf["date"], bdf["beta"], label=name)
+        axes[0].fill_between(bdf["date"], bdf["beta_lo"], bdf["beta_hi"], color=line.get_color(), alpha=0.15)
 
     axes[0].axhline(0, linewidth=1)
-    axes[0].set_title("Rolling FX Pass-Through (β)")
+    axes[0].set_title("Rolling FX Pass-Through (β), 95% Newey-West band")
     axes[0].set_ylabel("β")
-    axes[0].legend()
 
     # --- Panel 2: Rolling Rho
-    for name, rdf in rho_frames.items():
-        axes[1].plot(rdf["date"], rdf["rho"], label=name)
+    for name, rdf in data["rho"].items():
+        line, = axes[1].plot(rdf["date"], rdf["rho"], label=name)
+        axes[1].fill_between(rdf["date"], rdf["rho_lo"], rdf["rho_hi"], color=line.get_color(), alpha=0.15)
 
     axes[1].axhline(0, linewidth=1)
-    axes[1].set_title("Rolling Inflation Persistence (ρ)")
+    axes[1].set_title("Rolling Inflation Persistence (ρ), 95% Newey-West band")
     axes[1].set_ylabel("ρ")
-    axes[1].legend()
 
     for d, label in EVENTS:
         d = pd.to_datetime(d)
         axes[0].axvline(d, linestyle="--", linewidth=1)
         axes[1].axvline(d, linestyle="--", linewidth=1)
 
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(OUT, dpi=200)
-    print("Saved:", OUT)
+    # Data-driven breaks in headline β / ρ, shaded by their 95% interval
+    add_break_overlay(axes[0], data["breaks"], "headline", "beta", label="headline break (95% CI)")
+    add_break_overlay(axes[1], data["breaks"], "headline", "rho", label="headline break (95% CI)")
+    axes[0].legend()
+    axes[1].legend()
+
+    axes[1].tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+def web_overlay(data, style):
+    events = [{"x": d[:7], "label": label} for d, label in EVENTS]
+    return {"panels": [
+        {**web_frames(data["beta"], "beta"), "title": "Rolling FX Pass-Through (β), 95% Newey-West band",
+         "ylabel": "β", "zero": True, "legend": True, "events": events,
+         "breaks": web_breaks(data["breaks"], "headline", "beta")},
+        {**web_frames(data["rho"], "rho"), "title": "Rolling Inflation Persistence (ρ), 95% Newey-West band",
+         "ylabel": "ρ", "zero": True, "legend": True, "events": events,
+         "breaks": web_breaks(data["breaks"], "headline", "rho")},
+    ]}
+
+def main(data=None):
+    OUT.parent.mkdir(parents=True, exist_ok=True)
+
+    data = data or Datasets()
+    df = data.categories_fx
+
+    # Headline + Food MoM inflation
+    targets = {
+        "headline": "headline_infl_mom_pct",
+        "food": "food_infl_mom_pct",
+    }
+
+    beta_frames, rho_frames = rolling_frames(df, targets)
+
+    breaks = load_breaks(data)
+    render([Chart(OUT, draw_overlay,
+                  {"beta": beta_frames, "rho": rho_frames,
+                   "breaks": breaks[breaks["series"] == "headline"].reset_index(drop=True)},
+                  {"figsize": (12, 8)}, web=web_overlay)])
 
 if __name__ == "__main__":
     main()
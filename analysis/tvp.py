@@ -0,0 +1,241 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from rolling import conf_int
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
+
+OUT_CSV = Path("analysis/outputs/15_tvp_pass_through.csv")
+OUT_PARAMS = Path("analysis/outputs/15_tvp_hyperparams.csv")
+
+# Hyperparameters are log multiples of the OLS residual variance (r) and of
+# s2 / E[z_j^2] (random-walk variance q_j of coefficient j), bounded so a
+# coefficient can settle to constant (q -> 0) without the search running off
+LOG_BOUNDS = (-15.0, 5.0)
+LOG_START = (0.0, -6.0, -4.0)   # r, q_const, q_slope
+
+# Prior variance of the first state, in the same units as q: effectively diffuse
+DIFFUSE = 1e6
+
+def _scales(y, Z):
+    """OLS residual variance s2 (B,) and s2 / E[z_j^2] (B, k) on complete rows."""
+    m = np.isfinite(y) & np.isfinite(Z).all(axis=2)
+    z = np.where(m[..., None], Z, 0.0)
+    yy = np.where(m, y, 0.0)
+    zz = np.einsum("bti,btj->bij", z, z)
+    zy = np.einsum("bti,bt->bi", z, yy)
+    coef = (np.linalg.pinv(zz) @ zy[..., None])[..., 0]
+    resid = np.where(m, yy - np.einsum("bti,bi->bt", z, coef), 0.0)
+    nobs = np.maximum(m.sum(axis=1), 1)
+    s2 = np.maximum((resid ** 2).sum(axis=1) / nobs, 1e-12)
+    z2 = np.maximum((z ** 2).sum(axis=1) / nobs[:, None], 1e-12)
+    return s2, s2[:, None] / z2
+
+def kalman_filter(y, Z, r, q, p0):
+    """
+    Random-walk coefficient regression y(t) = z(t)' theta(t) + e(t),
+    theta(t) = theta(t-1) + eta(t), with Var e = r and Var eta = diag(q),
+    for a batch of B models at once.
+
+    y is (B, T), Z is (B, T, k), r is (B,), q and p0 (prior variance of
+    theta) are (B, k). Months with a missing y or z only predict. The first
+    k observed months condition the diffuse prior and stay out of the
+    log-likelihood.
+
+    Returns (a_pred, P_pred, a_filt, P_filt, loglik).
+    """
+    B, T, k = Z.shape
+    m = np.isfinite(y) & np.isfinite(Z).all(axis=2)
+    y = np.where(m, y, 0.0)
+    Z = np.where(m[..., None], Z, 0.0)
+
+    a_pred = np.empty((B, T, k))
+    P_pred = np.empty((B, T, k, k))
+    a_filt = np.empty((B, T, k))
+    P_filt = np.empty((B, T, k, k))
+    loglik = np.zeros(B)
+    seen = np.zeros(B, dtype=int)
+
+    a = np.zeros((B, k))
+    P = p0[:, :, None] * np.eye(k)
+    Q = q[:, :, None] * np.eye(k)
+    for t in range(T):
+        if t:
+            P = P + Q
+        a_pred[:, t] = a
+        P_pred[:, t] = P
+
+        z = Z[:, t]
+        v = y[:, t] - np.einsum("bi,bi->b", z, a)
+        Pz = np.einsum("bij,bj->bi", P, z)
+        F = np.einsum("bi,bi->b", z, Pz) + r
+        gain = np.where(m[:, t, None], Pz / F[:, None], 0.0)
+        a = a + gain * v[:, None]
+        P = P - gain[:, :, None] * Pz[:, None, :]
+        P = 0.5 * (P + np.swapaxes(P, 1, 2))
+
+        scored = m[:, t] & (seen >= k)
+        loglik -= np.where(scored, 0.5 * (np.log(2 * np.pi * F) + v * v / F), 0.0)
+        seen += m[:, t]
+        a_filt[:, t] = a
+        P_filt[:, t] = P
+    return a_pred, P_pred, a_filt, P_filt, loglik
+
+def rts_smoother(a_pred, P_pred, a_filt, P_filt):
+    """Rauch-Tung-Striebel smoothed states (B, T, k) and covariances (B, T, k, k)."""
+    T = a_pred.shape[1]
+    a_s = a_filt.copy()
+    P_s = P_filt.copy()
+    for t in range(T - 2, -1, -1):
+        J = np.swapaxes(np.linalg.solve(P_pred[:, t + 1], P_filt[:, t]), 1, 2)
+        a_s[:, t] = a_filt[:, t] + np.einsum("bij,bj->bi", J, a_s[:, t + 1] - a_pred[:, t + 1])
+        P_s[:, t] = P_filt[:, t] + J @ (P_s[:, t + 1] - P_pred[:, t + 1]) @ np.swapaxes(J, 1, 2)
+    return a_s, P_s
+
+def _fit_hyperparams(y, Z, s2, zscale, p0):
+    """
+    ML log-hyperparameters of one model (y is (T,), Z is (T, k)) by L-BFGS-B.
+
+    The central-difference gradient perturbs only this model's own k + 1
+    hyperparameters, so the objective value and its gradient come from a
+    single filter pass over a batch of the 2k + 3 perturbed copies.
+    """
+    k = Z.shape[1]
+    h = 1e-4
+    steps = np.vstack([np.zeros(k + 1), h * np.eye(k + 1), -h * np.eye(k + 1)])
+    n = len(steps)
+    yb = np.broadcast_to(y, (n,) + y.shape)
+    Zb = np.broadcast_to(Z, (n,) + Z.shape)
+    p0b = np.broadcast_to(p0, (n, k))
+
+    def objective(p):
+        logp = p + steps
+        nll = -kalman_filter(yb, Zb, s2 * np.exp(logp[:, 0]), zscale * np.exp(logp[:, 1:]), p0b)[4]
+        return nll[0], (nll[1:k + 2] - nll[k + 2:]) / (2 * h)
+
+    start = np.r_[LOG_START[0], LOG_START[1], [LOG_START[2]] * (k - 1)]
+    return minimize(objective, start, jac=True, method="L-BFGS-B",
+                    bounds=[LOG_BOUNDS] * len(start))
+
+def fit_tvp(y, Z) -> dict:
+    """
+    Kalman filter / RTS smoother for a batch of random-walk coefficient
+    regressions, with (r, q) fitted per model by maximum likelihood.
+
+    Each model gets its own optimiser run and convergence check, so its
+    hyperparameters do not depend on which other models share the batch;
+    only the final filter / smoother pass is batched.
+
+    Returns {"theta", "theta_se": (B, T, k), "r", "q", "loglik", "converged"}.
+    """
+    y = np.asarray(y, dtype=float)
+    Z = np.asarray(Z, dtype=float)
+    B, T, k = Z.shape
+    s2, zscale = _scales(y, Z)
+    p0 = DIFFUSE * zscale
+
+    fits = [_fit_hyperparams(y[b], Z[b], s2[b], zscale[b], p0[b]) for b in range(B)]
+    p = np.array([res.x for res in fits])
+    r, q = s2 * np.exp(p[:, 0]), zscale * np.exp(p[:, 1:])
+    a_pred, P_pred, a_filt, P_filt, loglik = kalman_filter(y, Z, r, q, p0)
+    theta, P_s = rts_smoother(a_pred, P_pred, a_filt, P_filt)
+    se = np.sqrt(np.maximum(np.diagonal(P_s, axis1=2, axis2=3), 0.0))
+    return {"theta": theta, "theta_se": se, "r": r, "q": q, "loglik": loglik,
+            "converged": np.array([res.success for res in fits])}
+
+def _beta_rho_fit(Y, x):
+    """
+    fit_tvp() of y_k ~ const + x (beta) and y_k ~ const + y_k(t-1) (rho)
+    for every column of Y.
+    """
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    x = np.asarray(x, dtype=float)
+    T, K = Y.shape
+    Y_lag1 = np.vstack([np.full((1, K), np.nan), Y[:-1]])
+
+    ones = np.ones((K, T))
+    Z_beta = np.stack([ones, np.broadcast_to(x, (K, T))], axis=2)
+    Z_rho = np.stack([ones, Y_lag1.T], axis=2)
+    fit = fit_tvp(np.concatenate([Y.T, Y.T]), np.concatenate([Z_beta, Z_rho]))
+    beta = {key: v[:K] for key, v in fit.items()}
+    rho = {key: v[K:] for key, v in fit.items()}
+    return beta, rho
+
+def tvp_tables(data) -> tuple:
+    """(pass-through, hyperparameter) tables of every category_cols series."""
+    df = data.category_mom_fx
+    columns = data.category_cols
+    beta, rho = _beta_rho_fit(df[columns], df["fx_mom_pct"])
+
+    K, T = len(columns), len(df)
+    out = pd.DataFrame({
+        "series": np.repeat(columns, T),
+        "date": np.tile(df["date"].to_numpy(), K),
+        "beta": beta["theta"][:, :, 1].ravel(),
+        "beta_se": beta["theta_se"][:, :, 1].ravel(),
+        "rho": rho["theta"][:, :, 1].ravel(),
+        "rho_se": rho["theta_se"][:, :, 1].ravel(),
+    })
+    observed = df[columns].notna().to_numpy().T.ravel()
+    out = out[observed].reset_index(drop=True)
+
+    params = pd.DataFrame([
+        {"series": col, "equation": key, "r": fit["r"][i],
+         "q_const": fit["q"][i, 0], "q_slope": fit["q"][i, 1], "loglik": fit["loglik"][i],
+         "converged": bool(fit["converged"][i])}
+        for key, fit in (("beta", beta), ("rho", rho))
+        for i, col in enumerate(columns)
+    ])
+    return out, params
+
+def load_tvp(data=None) -> pd.DataFrame:
+    """The pass-through table written by this stage; fitted on the spot if it is missing."""
+    if OUT_CSV.exists():
+        return pd.read_csv(OUT_CSV, parse_dates=["date"])
+    return tvp_tables(data or Datasets())[0]
+
+def tvp_frames(series, data=None, alpha: float = 0.05):
+    """
+    Smoothed time-varying beta and rho of the named category series, in
+    the same layout as rolling.rolling_frames():
+    {name: DataFrame(date, beta, beta_se, beta_lo, beta_hi)} and for rho.
+    """
+    table = load_tvp(data)
+    frames = ({}, {})
+    for key, out in zip(("beta", "rho"), frames):
+        for name in series:
+            g = table[table["series"] == name]
+            lo, hi = conf_int(g[key].to_numpy(), g[f"{key}_se"].to_numpy(), alpha)
+            out[name] = pd.DataFrame({
+                "date": g["date"].to_numpy(),
+                key: g[key].to_numpy(),
+                f"{key}_se": g[f"{key}_se"].to_numpy(),
+                f"{key}_lo": lo,
+                f"{key}_hi": hi,
+            })
+    return frames
+
+def main(data=None):
+    OUT_CSV.parent.mkdir(parents=True, exist_ok=True)
+
+    out, params = tvp_tables(data or Datasets())
+    out.to_csv(OUT_CSV, index=False, date_format="%Y-%m-%d")
+    params.to_csv(OUT_PARAMS, index=False)
+
+    print("Time-varying β / ρ (random-walk coefficients, ML hyperparameters):")
+    for col, g in out.groupby("series", sort=False):
+        print(f"  {col:<20} β {g['beta'].iloc[0]:+.3f} -> {g['beta'].iloc[-1]:+.3f}   "
+              f"ρ {g['rho'].iloc[0]:+.3f} -> {g['rho'].iloc[-1]:+.3f}")
+    for _, row in params[~params["converged"]].iterrows():
+        print(f"  warning: {row['series']} {row['equation']} hyperparameters did not converge")
+    print("Saved:", OUT_CSV)
+    print("Saved:", OUT_PARAMS)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from charts import Chart, render
+from rolling import rolling_beta_rho
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from datasets import Datasets  # noqa: E402
+
+OUT_DIR = Path("analysis/outputs")
+OUT_CSV = OUT_DIR / "11_window_sensitivity.csv"
+
+# How much do the rolling β / ρ depend on the 24m window choice?
+WINDOWS = list(range(12, 37))
+
+def draw_heatmap_grid(fig, data, style):
+    values, names = data["values"], data["names"]
+    n_cols = style["n_cols"]
+    axes = fig.subplots(int(np.ceil(len(names) / n_cols)), n_cols, sharex=True, sharey=True).ravel()
+
+    lim = np.nanpercentile(np.abs(values), 98)
+    x = pd.to_datetime(data["dates"])
+    for ax, name, v in zip(axes, names, values):
+        im = ax.pcolormesh(x, WINDOWS, v, cmap="RdBu_r", vmin=-lim, vmax=lim, shading="nearest")
+        ax.set_title(name)
+    for ax in axes[len(names):]:
+        ax.set_visible(False)
+    for ax in axes[::n_cols]:
+        ax.set_ylabel("Window (months)")
+
+    fig.colorbar(im, ax=axes.tolist(), label=style["label"], shrink=0.6)
+    fig.suptitle(style["title"])
+    for ax in axes:
+        ax.tick_params(axis="x", labelrotation=45)
+
+def heatmap_chart(values, dates, names, title, label, path, n_cols=3) -> Chart:
+    n_rows = int(np.ceil(len(names) / n_cols))
+    return Chart(path, draw_heatmap_grid,
+                 {"values": values, "dates": np.asarray(dates), "names": list(names)},
+                 {"figsize": (15, 3.2 * n_rows), "layout": "constrained", "n_cols": n_cols,
+                  "title": title, "label": label})
+
+def main(data=None):
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    data = data or Datasets()
+    df = data.category_mom_fx
+
+    # Every category level in the table (headline, the COICOP divisions and
+    # any finer series) x every window in one pass: (K, W, n)
+    categories = data.category_cols
+    beta, rho = rolling_beta_rho(df[categories], df["fx_mom_pct"], WINDOWS)
+
+    K, W, n = beta.shape
+    out = pd.DataFrame({
+        "category": np.repeat(categories, W * n),
+        "window": np.tile(np.repeat(WINDOWS, n), K),
+        "date": np.tile(df["date"].to_numpy(), K * W),
+        "beta_fx": beta.ravel(),
+        "rho_infl": rho.ravel(),
+    })
+    out = out.dropna(subset=["beta_fx", "rho_infl"], how="all")
+    out.to_csv(OUT_CSV, index=False)
+
+    print("Saved:", OUT_CSV, f"({len(out)} rows)")
+    render([
+        heatmap_chart(beta, df["date"], categories,
+                      "Rolling FX pass-through (β) by window length",
+                      "β", OUT_DIR / "11_window_sensitivity_beta.png"),
+        heatmap_chart(rho, df["date"], categories,
+                      "Rolling inflation persistence (ρ) by window length",
+                      "ρ", OUT_DIR / "11_window_sensitivity_rho.png"),
+    ])
+
+if __name__ == "__main__":
+    main()
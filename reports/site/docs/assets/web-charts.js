@@ -0,0 +1,344 @@
+/*
+ * Client-side charts for the site.
+ *
+ * analysis/charts.py writes a JSON bundle next to each chart PNG with just
+ * the plotted data: { panels: [ { title, xlabel, ylabel, x, lines, bars,
+ * heatmap, zero, events, breaks, legend, note } ] }. Months are "YYYY-MM"
+ * strings, missing values null. Pages mark a chart with
+ *
+ *   <figure class="web-chart" data-src="docs/assets/charts/NAME.json" data-alt="...">
+ *
+ * and this script draws it as inline SVG, in the page's text colour so it
+ * follows the theme. Titles and captions stay in the page, so the EN and
+ * FR versions share one bundle. If the bundle cannot be loaded, the PNG
+ * of the same name is shown instead.
+ */
+(function () {
+  "use strict";
+
+  // matplotlib's tab10, so lines keep the colours of the PNG charts
+  var COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+                "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"];
+  // RdBu_r: negative blue, positive red
+  var DIVERGING = [[33, 102, 172], [103, 169, 207], [247, 247, 247], [239, 138, 98], [178, 24, 43]];
+
+  var WIDTH = 800;
+  var LINE_HEIGHT = 260;
+  var HEATMAP_HEIGHT = 110;
+  var MARGIN = { top: 30, right: 20, bottom: 34, left: 60 };
+  var COLORBAR = 56;
+
+  function esc(s) {
+    return String(s).replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;").replace(/"/g, "&quot;");
+  }
+
+  function fmt(v) {
+    return String(+v.toPrecision(6));
+  }
+
+  function isMonth(v) {
+    return typeof v === "string";
+  }
+
+  // "YYYY-MM" -> months since year 0, so a month is one unit on the axis
+  function pos(v) {
+    return isMonth(v) ? +v.slice(0, 4) * 12 + (+v.slice(5, 7)) - 1 : v;
+  }
+
+  function finite(values) {
+    return values.filter(function (v) { return v !== null && isFinite(v); });
+  }
+
+  function niceTicks(lo, hi, count) {
+    var span = hi - lo || Math.abs(hi) || 1;
+    var step = Math.pow(10, Math.floor(Math.log10(span / count)));
+    var err = span / count / step;
+    step *= err >= 7.5 ? 10 : err >= 3.5 ? 5 : err >= 1.5 ? 2 : 1;
+    var ticks = [];
+    for (var t = Math.ceil(lo / step) * step; t <= hi + step * 1e-9; t += step) {
+      ticks.push(Math.abs(t) < step * 1e-9 ? 0 : t);
+    }
+    return ticks;
+  }
+
+  function xDomain(panel) {
+    var xs = [];
+    (panel.lines || []).forEach(function (line) {
+      xs = xs.concat((line.x || panel.x).map(pos));
+    });
+    if (panel.bars) {
+      panel.bars.x.forEach(function (x) { xs.push(x - 0.5, x + 0.5); });
+    }
+    if (panel.heatmap) {
+      var hx = panel.heatmap.x.map(pos);
+      xs.push(hx[0] - 0.5, hx[hx.length - 1] + 0.5);
+    }
+    // As with matplotlib's axvline, markers widen the axis to stay in view
+    (panel.events || []).forEach(function (e) { xs.push(pos(e.x)); });
+    (panel.breaks || []).forEach(function (b) { xs.push(pos(b.lo), pos(b.hi)); });
+    return [Math.min.apply(null, xs), Math.max.apply(null, xs)];
+  }
+
+  function yDomain(panel) {
+    if (panel.heatmap) {
+      var hy = panel.heatmap.y;
+      return [hy[0] - 0.5, hy[hy.length - 1] + 0.5];
+    }
+    var ys = panel.zero ? [0] : [];
+    (panel.lines || []).forEach(function (line) {
+      ys = ys.concat(finite(line.y), finite(line.lo || []), finite(line.hi || []));
+    });
+    if (panel.bars) {
+      ys = ys.concat(finite(panel.bars.y));
+      finite(panel.bars.band || []).forEach(function (b) { ys.push(-b, b); });
+    }
+    var lo = Math.min.apply(null, ys);
+    var hi = Math.max.apply(null, ys);
+    var pad = (hi - lo || 1) * 0.05;
+    return [lo - pad, hi + pad];
+  }
+
+  // Path through the non-null points; a null breaks the line
+  function linePath(xs, ys, sx, sy) {
+    var d = "";
+    var pen = false;
+    for (var i = 0; i < ys.length; i++) {
+      if (ys[i] === null) {
+        pen = false;
+        continue;
+      }
+      d += (pen ? "L" : "M") + sx(xs[i]).toFixed(1) + "," + sy(ys[i]).toFixed(1);
+      pen = true;
+    }
+    return d;
+  }
+
+  // Closed polygons between lo and hi over each run of non-null months
+  function bandPath(xs, lo, hi, sx, sy) {
+    var d = "";
+    var run = [];
+    function flush() {
+      if (run.length) {
+        d += "M" + run.map(function (i) { return sx(xs[i]).toFixed(1) + "," + sy(hi[i]).toFixed(1); }).join("L");
+        d += "L" + run.slice().reverse().map(function (i) { return sx(xs[i]).toFixed(1) + "," + sy(lo[i]).toFixed(1); }).join("L") + "Z";
+      }
+      run = [];
+    }
+    for (var i = 0; i < xs.length; i++) {
+      if (lo[i] === null || hi[i] === null) {
+        flush();
+      } else {
+        run.push(i);
+      }
+    }
+    flush();
+    return d;
+  }
+
+  function diverging(v, vmin, vmax) {
+    var t = Math.max(0, Math.min(1, (v - vmin) / (vmax - vmin))) * (DIVERGING.length - 1);
+    var i = Math.min(Math.floor(t), DIVERGING.length - 2);
+    var f = t - i;
+    var rgb = DIVERGING[i].map(function (c, k) { return Math.round(c + (DIVERGING[i + 1][k] - c) * f); });
+    return "rgb(" + rgb.join(",") + ")";
+  }
+
+  function xTicks(lo, hi, months, bars) {
+    if (bars) {
+      return bars.x.map(function (x) { return { at: x, label: fmt(x) }; });
+    }
+    if (!months) {
+      return niceTicks(lo, hi, 6).map(function (t) { return { at: t, label: fmt(t) }; });
+    }
+    // One tick per January (every other one on long spans)
+    var first = Math.ceil(lo / 12);
+    var last = Math.floor(hi / 12);
+    var every = last - first > 12 ? 2 : 1;
+    var ticks = [];
+    for (var year = first; year <= last; year += every) {
+      ticks.push({ at: year * 12, label: String(year) });
+    }
+    return ticks;
+  }
+
+  function renderPanel(panel, top, height, multi) {
+    var heat = panel.heatmap;
+    var left = MARGIN.left;
+    var right = WIDTH - MARGIN.right - (heat ? COLORBAR : 0);
+    var y0 = top + MARGIN.top;
+    var y1 = top + height - MARGIN.bottom;
+    var xd = xDomain(panel);
+    var yd = yDomain(panel);
+    var months = isMonth(((panel.lines && panel.lines.length && (panel.lines[0].x || panel.x)) ||
+                          (heat && heat.x) || [0])[0]);
+    function sx(v) { return left + (pos(v) - xd[0]) / (xd[1] - xd[0]) * (right - left); }
+    function sy(v) { return y1 - (v - yd[0]) / (yd[1] - yd[0]) * (y1 - y0); }
+    var out = [];
+
+    // Axes, ticks and grid
+    out.push('<g class="axis" font-size="11" fill="currentColor">');
+    xTicks(xd[0], xd[1], months, panel.bars).forEach(function (t) {
+      var x = sx(t.at).toFixed(1);
+      out.push('<line x1="' + x + '" x2="' + x + '" y1="' + y1 + '" y2="' + (y1 + 4) + '" stroke="currentColor"/>');
+      out.push('<text x="' + x + '" y="' + (y1 + 16) + '" text-anchor="middle">' + esc(t.label) + "</text>");
+    });
+    var yTicks = heat ? heat.y.filter(function (v) { return v % 3 === 0; }) : niceTicks(yd[0], yd[1], 5);
+    yTicks.forEach(function (t) {
+      var y = sy(t).toFixed(1);
+      if (!heat) {
+        out.push('<line x1="' + left + '" x2="' + right + '" y1="' + y + '" y2="' + y + '" stroke="currentColor" stroke-opacity="0.12"/>');
+      }
+      out.push('<text x="' + (left - 6) + '" y="' + y + '" dy="0.32em" text-anchor="end">' + esc(fmt(t)) + "</text>");
+    });
+    if (panel.ylabel) {
+      var cy = (y0 + y1) / 2;
+      out.push('<text x="14" y="' + cy + '" transform="rotate(-90 14 ' + cy + ')" text-anchor="middle">' + esc(panel.ylabel) + "</text>");
+    }
+    if (panel.xlabel) {
+      out.push('<text x="' + (left + right) / 2 + '" y="' + (y1 + 30) + '" text-anchor="middle">' + esc(panel.xlabel) + "</text>");
+    }
+    out.push("</g>");
+    if (multi && panel.title) {
+      out.push('<text x="' + left + '" y="' + (y0 - 8) + '" font-size="13" font-weight="600" fill="currentColor">' + esc(panel.title) + "</text>");
+    }
+    if (panel.note) {
+      out.push('<text x="' + (right - 6) + '" y="' + (y0 + 16) + '" font-size="11" text-anchor="end" fill="currentColor" fill-opacity="0.7">' + esc(panel.note) + "</text>");
+    }
+
+    // Heatmap cells, one per (month, lag), and its colour bar
+    if (heat) {
+      var cw = (right - left) / (xd[1] - xd[0]);
+      var ch = (y1 - y0) / (yd[1] - yd[0]);
+      out.push("<g>");
+      heat.z.forEach(function (row, i) {
+        row.forEach(function (v, j) {
+          if (v !== null) {
+            out.push('<rect x="' + (sx(heat.x[j]) - cw / 2).toFixed(1) + '" y="' + (sy(heat.y[i]) - ch / 2).toFixed(1) +
+                     '" width="' + (cw + 0.5).toFixed(1) + '" height="' + (ch + 0.5).toFixed(1) +
+                     '" fill="' + diverging(v, heat.vmin, heat.vmax) + '"><title>' + esc(heat.x[j] + ", lag " + heat.y[i] + ": " + v) + "</title></rect>");
+          }
+        });
+      });
+      out.push("</g>");
+      var bx = right + 14;
+      var steps = 20;
+      for (var k = 0; k < steps; k++) {
+        var v = heat.vmax - (k + 0.5) / steps * (heat.vmax - heat.vmin);
+        out.push('<rect x="' + bx + '" y="' + (y0 + k * (y1 - y0) / steps).toFixed(1) + '" width="10" height="' +
+                 ((y1 - y0) / steps + 0.5).toFixed(1) + '" fill="' + diverging(v, heat.vmin, heat.vmax) + '"/>');
+      }
+      [heat.vmax, (heat.vmin + heat.vmax) / 2, heat.vmin].forEach(function (v, k) {
+        out.push('<text x="' + (bx + 14) + '" y="' + (y0 + k * (y1 - y0) / 2) + '" dy="0.32em" font-size="10" fill="currentColor">' + fmt(v) + "</text>");
+      });
+    }
+
+    // Detected breaks: 95% interval shaded, date as a solid line
+    (panel.breaks || []).forEach(function (b) {
+      var a = sx(b.lo) - 0.5;
+      var w = Math.max(sx(b.hi) - sx(b.lo), 1);
+      out.push('<rect x="' + a.toFixed(1) + '" y="' + y0 + '" width="' + w.toFixed(1) + '" height="' + (y1 - y0) +
+               '" fill="currentColor" fill-opacity="0.08"><title>' + esc("Break " + b.x + " (95% CI " + b.lo + " to " + b.hi + ")") + "</title></rect>");
+      out.push('<line x1="' + sx(b.x).toFixed(1) + '" x2="' + sx(b.x).toFixed(1) + '" y1="' + y0 + '" y2="' + y1 + '" stroke="currentColor" stroke-width="1.2"/>');
+    });
+
+    if (panel.zero && !heat) {
+      out.push('<line x1="' + left + '" x2="' + right + '" y1="' + sy(0).toFixed(1) + '" y2="' + sy(0).toFixed(1) + '" stroke="currentColor" stroke-opacity="0.6"/>');
+    }
+
+    // Bars coloured by sign, over a 95% band of +/- band around each one
+    if (panel.bars) {
+      var bars = panel.bars;
+      var bw = (right - left) / (xd[1] - xd[0]);
+      if (bars.band) {
+        out.push('<path d="' + bars.x.map(function (x, i) {
+          var a = (sx(x) - bw / 2).toFixed(1);
+          var b = (sx(x) + bw / 2).toFixed(1);
+          return "M" + a + "," + sy(bars.band[i]).toFixed(1) + "H" + b + "V" + sy(-bars.band[i]).toFixed(1) + "H" + a + "Z";
+        }).join("") + '" fill="currentColor" fill-opacity="0.12"><title>95% Bartlett band</title></path>');
+      }
+      bars.x.forEach(function (x, i) {
+        var v = bars.y[i];
+        if (v === null) {
+          return;
+        }
+        var ya = Math.min(sy(v), sy(0));
+        out.push('<rect x="' + (sx(x) - bw * 0.4).toFixed(1) + '" y="' + ya.toFixed(1) + '" width="' + (bw * 0.8).toFixed(1) +
+                 '" height="' + Math.abs(sy(v) - sy(0)).toFixed(1) + '" fill="' + (v < 0 ? "#e74c3c" : "#3498db") +
+                 '" fill-opacity="0.8"><title>' + esc("lag " + x + ": " + v) + "</title></rect>");
+      });
+    }
+
+    // Lines, each with its band
+    (panel.lines || []).forEach(function (line, i) {
+      var xs = (line.x || panel.x).map(pos);
+      var color = COLORS[i % COLORS.length];
+      if (line.lo && line.hi) {
+        out.push('<path d="' + bandPath(xs, line.lo, line.hi, sx, sy) + '" fill="' + color + '" fill-opacity="0.15"/>');
+      }
+      out.push('<path d="' + linePath(xs, line.y, sx, sy) + '" fill="none" stroke="' + color + '" stroke-width="1.6">' +
+               (line.label ? "<title>" + esc(line.label) + "</title>" : "") + "</path>");
+    });
+
+    // Events: dashed lines, labelled on hover
+    (panel.events || []).forEach(function (e) {
+      var x = sx(e.x).toFixed(1);
+      out.push('<line x1="' + x + '" x2="' + x + '" y1="' + y0 + '" y2="' + y1 +
+               '" stroke="currentColor" stroke-opacity="0.6" stroke-dasharray="4 3"/>');
+      if (e.label) {
+        out.push('<line x1="' + x + '" x2="' + x + '" y1="' + y0 + '" y2="' + y1 + '" stroke="transparent" stroke-width="8">' +
+                 "<title>" + esc(e.x + ": " + e.label) + "</title></line>");
+      }
+    });
+
+    if (panel.legend) {
+      var labelled = (panel.lines || []).filter(function (line) { return line.label; });
+      labelled.forEach(function (line, i) {
+        var ly = y0 + 14 + i * 16;
+        out.push('<rect x="' + (left + 10) + '" y="' + (ly - 5) + '" width="14" height="3" fill="' + COLORS[panel.lines.indexOf(line) % COLORS.length] + '"/>');
+        out.push('<text x="' + (left + 30) + '" y="' + ly + '" dy="0.1em" font-size="11" fill="currentColor">' + esc(line.label) + "</text>");
+      });
+    }
+    out.push('<rect x="' + left + '" y="' + y0 + '" width="' + (right - left) + '" height="' + (y1 - y0) +
+             '" fill="none" stroke="currentColor" stroke-opacity="0.5"/>');
+    return out.join("");
+  }
+
+  function renderChart(bundle, alt) {
+    var panels = bundle.panels;
+    var multi = panels.length > 1;
+    var heights = panels.map(function (p) { return p.heatmap ? HEATMAP_HEIGHT + MARGIN.top + MARGIN.bottom : LINE_HEIGHT; });
+    var total = heights.reduce(function (a, b) { return a + b; }, 0);
+    var top = 0;
+    var body = panels.map(function (panel, i) {
+      var svg = renderPanel(panel, top, heights[i], multi);
+      top += heights[i];
+      return svg;
+    }).join("");
+    return '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 ' + WIDTH + " " + total + '" role="img"' +
+           (alt ? ' aria-label="' + esc(alt) + '"' : "") + ' font-family="inherit">' + body + "</svg>";
+  }
+
+  function mount(figure) {
+    var src = figure.getAttribute("data-src");
+    var alt = figure.getAttribute("data-alt") || "";
+    fetch(src)
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status + " " + src);
+        }
+        return response.json();
+      })
+      .then(function (bundle) {
+        figure.insertAdjacentHTML("afterbegin", renderChart(bundle, alt));
+      })
+      .catch(function () {
+        figure.insertAdjacentHTML("afterbegin", '<img src="' + esc(src.replace(/\.json$/, ".png")) + '" alt="' + esc(alt) + '">');
+      });
+  }
+
+  if (typeof document === "undefined") {
+    module.exports = { renderChart: renderChart };
+    return;
+  }
+  Array.prototype.forEach.call(document.querySelectorAll("figure.web-chart[data-src]"), mount);
+})();
@@ -3,75 +3,425 @@
 Run the full Mauritania FX-Inflation analysis pipeline.
 
 Usage:
-    python3 run_all.py
+    python3 run_all.py [--jobs N] [--force] [--in-process]
+
+Each stage declares the files it reads and writes. Stages run as soon as
+the stages producing their inputs have finished, independent stages run
+in parallel, and a stage whose code and input hashes match the last
+successful run is skipped. Stages after the validation gate only start
+once it has passed.
+
+With --in-process every stage runs as a function call in this
+interpreter, so pandas/statsmodels/matplotlib are imported once and the
+processed tables are read once and shared (src/datasets.py).
 
 This script:
-1. Validates the data pipeline
-2. Runs all analysis scripts
-3. Generates charts
-4. Copies outputs to report assets
+1. Builds the processed datasets from the raw BCM and IMF files
+2. Validates the data pipeline
+3. Runs all analysis scripts
+4. Generates charts
+5. Copies outputs to report assets
 """
 
+import argparse
+import ast
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import shutil
 import subprocess
 import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent
 SRC_DIR = PROJECT_ROOT / "src"
 ANALYSIS_DIR = PROJECT_ROOT / "analysis"
 
-SCRIPTS = [
+sys.path.insert(0, str(ANALYSIS_DIR))
+sys.path.insert(0, str(SRC_DIR))
+from content_hash import CACHE_DIR, FORCE_ENV, file_digest  # noqa: E402
+
+STATE_PATH = CACHE_DIR / "pipeline_state.json"
+
+RAW = "data/raw"
+PROCESSED = "data/processed"
+OUTPUTS = "analysis/outputs"
+
+
+@dataclass
+class Stage:
+    name: str
+    description: str
+    script: Path
+    reads: tuple = ()
+    writes: tuple = ()
+    gate: bool = False      # every stage listed after it waits for it and is blocked if it fails
+
+
+STAGES = [
+    # Data build
+    Stage("build_fx", "Building monthly FX from BCM daily fixings",
+          SRC_DIR / "build_fx_monthly_usd.py",
+          reads=(f"{RAW}/bcm_fx.xlsx",),
+          writes=(f"{PROCESSED}/fx_usd_monthly_2020_2025.parquet", f"{PROCESSED}/fx_usd_monthly_2020_2025.csv",
+                  f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet", f"{PROCESSED}/fx_panel_monthly_2020_2025.csv",
+                  f"{PROCESSED}/fx_daily_bcm.csv")),
+    Stage("fx_features", "Building daily FX volatility features",
+          SRC_DIR / "build_fx_daily_features.py",
+          reads=(f"{PROCESSED}/fx_daily_bcm.csv",),
+          writes=(f"{PROCESSED}/fx_daily_features_2020_2025.parquet", f"{PROCESSED}/fx_daily_features_2020_2025.csv")),
+    Stage("build_cpi_baseline", "Extracting headline CPI",
+          SRC_DIR / "build_cpi_baseline.py",
+          reads=(f"{RAW}/imf_cpi_full.csv",),
+          writes=(f"{PROCESSED}/cpi_monthly_mauritania_2020_2025.parquet", f"{PROCESSED}/cpi_monthly_mauritania_2020_2025.csv")),
+    Stage("build_cpi_categories", "Extracting CPI categories",
+          SRC_DIR / "build_cpi_categories.py",
+          reads=(f"{RAW}/imf_cpi_full.csv",),
+          writes=(f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet", f"{PROCESSED}/cpi_categories_monthly_2020_2025.csv")),
+    Stage("build_inflation", "Computing inflation from CPI",
+          SRC_DIR / "build_inflation_from_cpi.py",
+          reads=(f"{PROCESSED}/cpi_monthly_mauritania_2020_2025.parquet",),
+          writes=(f"{PROCESSED}/cpi_inflation_mauritania_2020_2025.parquet", f"{PROCESSED}/cpi_inflation_mauritania_2020_2025.csv")),
+    Stage("build_merged", "Merging FX and CPI",
+          SRC_DIR / "build_merged_dataset.py",
+          reads=(f"{PROCESSED}/cpi_inflation_mauritania_2020_2025.parquet",
+                 f"{PROCESSED}/fx_usd_monthly_2020_2025.parquet"),
+          writes=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet", f"{PROCESSED}/merged_fx_cpi_2020_2025.csv")),
+
     # Data validation
-    ("Validating data pipeline", SRC_DIR / "validate_pipeline.py"),
-    
+    Stage("validate", "Validating data pipeline",
+          SRC_DIR / "validate_pipeline.py",
+          reads=(f"{PROCESSED}/cpi_inflation_mauritania_2020_2025.parquet",
+                 f"{PROCESSED}/fx_usd_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet"),
+          gate=True),
+
     # Lag correlation (the missing chart)
-    ("Generating lag correlation profile", SRC_DIR / "plot_lag_correlation.py"),
-    
+    Stage("plot_lag_correlation", "Generating lag correlation profile",
+          SRC_DIR / "plot_lag_correlation.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet"),
+          writes=tuple(f"{d}/{f}" for d in (OUTPUTS, "reports/site/docs/assets/charts") for f in (
+              "lag_correlation.png", "lag_correlation.json",
+              "lag_correlation_rolling.png", "lag_correlation_rolling.json"))),
+
     # Core metrics
-    ("Computing baseline regressions", SRC_DIR / "regression_baselines.py"),
-    ("Analyzing lag correlations", SRC_DIR / "lag_correlation_analysis.py"),
-    ("Computing lag profile", SRC_DIR / "lag_profile.py"),
-    
+    Stage("regression_baselines", "Computing baseline regressions",
+          SRC_DIR / "regression_baselines.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet")),
+    Stage("lag_correlation_analysis", "Analyzing lag correlations",
+          SRC_DIR / "lag_correlation_analysis.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet")),
+    Stage("lag_profile", "Computing lag profile",
+          SRC_DIR / "lag_profile.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",)),
+
     # Analysis outputs
-    ("Building production charts", ANALYSIS_DIR / "build_production_charts.py"),
-    ("Building story plots", ANALYSIS_DIR / "plots_story.py"),
-    ("Generating structural overlay", ANALYSIS_DIR / "structural_overlay.py"),
-    ("Computing regime summary", ANALYSIS_DIR / "regime_summary.py"),
+    Stage("breaks", "Detecting structural breaks",
+          ANALYSIS_DIR / "breaks.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet"),
+          writes=(f"{OUTPUTS}/13_breaks.csv",)),
+    Stage("metrics", "Computing persistence, volatility and rolling pass-through",
+          ANALYSIS_DIR / "metrics.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/fx_daily_features_2020_2025.parquet",
+                 f"{OUTPUTS}/13_breaks.csv"),
+          writes=tuple(f"{OUTPUTS}/{f}" for f in (
+              "01_infl_vol_6m.png", "01_infl_acf.png", "02_volatility_side_by_side.png",
+              "03_rolling_beta_fx_24m.png", "03_rolling_beta_fx_24m.json",
+              "04_rolling_rho_infl_24m.png", "04_rolling_rho_infl_24m.json",
+              "05_rolling_beta_with_markers.png", "05_rolling_beta_with_markers.json",
+              "06_story_rolling_beta_rho_with_markers.png", "06_story_rolling_beta_rho_with_markers.json",
+              "rolling_pass_through_24m.csv", "event_markers_used.csv"))),
+    Stage("fx_nowcast", "Streaming month-to-date FX nowcast",
+          SRC_DIR / "fx_nowcast.py",
+          reads=(f"{PROCESSED}/fx_daily_bcm.csv",
+                 f"{OUTPUTS}/rolling_pass_through_24m.csv"),
+          writes=(f"{PROCESSED}/fx_nowcast.csv",)),
+    Stage("build_production_charts", "Building production charts",
+          ANALYSIS_DIR / "build_production_charts.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",),
+          writes=tuple(f"{OUTPUTS}/{f}" for f in (
+              "cpi_index.png", "infl_mom.png", "fx_mom.png", "volatility.png",
+              "cpi_index.json", "infl_mom.json", "fx_mom.json", "volatility.json"))),
+    Stage("plots_story", "Building story plots",
+          ANALYSIS_DIR / "plots_story.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet",
+                 f"{OUTPUTS}/13_breaks.csv",
+                 f"{OUTPUTS}/15_tvp_pass_through.csv"),
+          writes=tuple(f"{OUTPUTS}/{name}_{mode}_{k}_categories.{ext}"
+                       for mode in ("rolling", "tvp") for name, k in (("07", "beta"), ("08", "rho"))
+                       for ext in ("png", "json"))),
+    Stage("structural_overlay", "Generating structural overlay",
+          ANALYSIS_DIR / "structural_overlay.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet",
+                 f"{OUTPUTS}/13_breaks.csv"),
+          writes=(f"{OUTPUTS}/09_structural_overlay.png", f"{OUTPUTS}/09_structural_overlay.json")),
+    Stage("window_sensitivity", "Scanning rolling window lengths",
+          ANALYSIS_DIR / "window_sensitivity.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet"),
+          writes=(f"{OUTPUTS}/11_window_sensitivity.csv",
+                  f"{OUTPUTS}/11_window_sensitivity_beta.png",
+                  f"{OUTPUTS}/11_window_sensitivity_rho.png")),
+    Stage("recursive", "Updating recursive β / ρ state",
+          ANALYSIS_DIR / "recursive.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",),
+          writes=(f"{OUTPUTS}/16_recursive_estimates.csv",)),
+    Stage("tvp", "Estimating time-varying β / ρ",
+          ANALYSIS_DIR / "tvp.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet"),
+          writes=(f"{OUTPUTS}/15_tvp_pass_through.csv",
+                  f"{OUTPUTS}/15_tvp_hyperparams.csv")),
+    Stage("markov", "Fitting Markov-switching pass-through",
+          ANALYSIS_DIR / "markov.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet"),
+          writes=(f"{OUTPUTS}/14_markov_switching.csv",
+                  f"{OUTPUTS}/14_markov_regime_probs.csv",
+                  f"{OUTPUTS}/14_markov_regime_probs.png")),
+    Stage("regime_summary", "Computing regime summary",
+          ANALYSIS_DIR / "regime_summary.py",
+          reads=(f"{PROCESSED}/merged_fx_cpi_2020_2025.parquet",
+                 f"{PROCESSED}/fx_daily_features_2020_2025.parquet",
+                 f"{PROCESSED}/cpi_categories_monthly_2020_2025.parquet",
+                 f"{PROCESSED}/fx_panel_monthly_2020_2025.parquet",
+                 f"{OUTPUTS}/13_breaks.csv"),
+          writes=(f"{OUTPUTS}/10_regime_table.csv",
+                  f"{OUTPUTS}/12_regime_bootstrap.csv")),
 ]
 
-def run_script(description, script_path):
-    """Run a Python script and handle errors."""
-    print(f"\n{'='*60}")
-    print(f"{description}")
-    print(f"Running: {script_path}")
-    print('='*60)
-    
-    if not script_path.exists():
-        print(f"WARNING: {script_path} not found, skipping...")
-        return True
-    
+
+def code_files(script: Path) -> list:
+    """The stage script plus every project module it (transitively) imports."""
+    seen = []
+    todo = [script]
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.append(path)
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                for folder in (path.parent, SRC_DIR, ANALYSIS_DIR):
+                    candidate = folder / f"{name.split('.')[0]}.py"
+                    if candidate.exists():
+                        todo.append(candidate)
+                        break
+    return sorted(seen)
+
+
+def stage_digest(stage: Stage) -> str:
+    h = hashlib.sha256()
+    for path in code_files(stage.script):
+        h.update(f"code:{path.relative_to(PROJECT_ROOT)}:{file_digest(path)}\n".encode())
+    for rel in stage.reads:
+        path = PROJECT_ROOT / rel
+        digest = file_digest(path) if path.exists() else "missing"
+        h.update(f"input:{rel}:{digest}\n".encode())
+    return h.hexdigest()
+
+
+def is_lfs_pointer(path: Path) -> bool:
+    """True when a Git LFS file was checked out without `git lfs pull`."""
+    if not path.exists() or path.stat().st_size > 1024:
+        return False
+    with open(path, "rb") as f:
+        return f.read(40).startswith(b"version https://git-lfs")
+
+
+def dependencies(stages: list) -> dict:
+    """
+    stage name -> names of the stages that write one of its inputs, plus
+    every gate stage listed before it.
+    """
+    producers = {}
+    for s in stages:
+        for out in s.writes:
+            producers[out] = s.name
+    deps = {}
+    gates = set()
+    for s in stages:
+        deps[s.name] = {producers[r] for r in s.reads if r in producers and producers[r] != s.name} | gates
+        if s.gate:
+            gates.add(s.name)
+    return deps
+
+
+def load_state() -> dict:
+    if STATE_PATH.exists():
+        return json.loads(STATE_PATH.read_text())
+    return {}
+
+
+def save_state(state: dict) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+    tmp.replace(STATE_PATH)
+
+
+def run_script(stage: Stage):
+    """Run a stage script; returns (returncode, captured output)."""
+    if not stage.script.exists():
+        return 0, f"WARNING: {stage.script} not found, skipping...\n"
+
     result = subprocess.run(
-        [sys.executable, str(script_path)],
+        [sys.executable, str(stage.script)],
         cwd=PROJECT_ROOT,
-        capture_output=False
+        capture_output=True,
+        text=True,
     )
-    
-    if result.returncode != 0:
-        print(f"ERROR: {script_path} failed with code {result.returncode}")
-        return False
-    return True
+    return result.returncode, result.stdout + result.stderr
+
+
+def run_in_process(stage: Stage, data):
+    """Call the stage's main() in this interpreter; returns (returncode, captured output)."""
+    buf = io.StringIO()
+    argv = sys.argv
+    sys.argv = [str(stage.script)]
+    code = 0
+    try:
+        with redirect_stdout(buf), redirect_stderr(buf):
+            module = importlib.import_module(stage.script.stem)
+            if "data" in inspect.signature(module.main).parameters:
+                module.main(data)
+            else:
+                module.main()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except Exception:
+        buf.write(traceback.format_exc())
+        code = 1
+    finally:
+        sys.argv = argv
+    return code, buf.getvalue()
+
+
+def report(stage: Stage, status: str, output: str = "", seconds: float = 0.0):
+    print(f"\n{'='*60}")
+    print(f"{stage.description}")
+    print(f"Stage: {stage.name} [{status}{f', {seconds:.1f}s' if seconds else ''}]")
+    print('='*60)
+    if output:
+        print(output.rstrip())
+
+
+def run_pipeline(stages: list, jobs: int, force: bool = False, in_process: bool = False) -> bool:
+    deps = dependencies(stages)
+    by_name = {s.name: s for s in stages}
+    state = load_state()
+
+    done, failed, skipped = set(), set(), set()
+    pending = [s.name for s in stages]
+    running = {}
+
+    if in_process:
+        from datasets import Datasets
+        data = Datasets()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            # Anything downstream of a failure cannot run
+            for name in list(pending):
+                if deps[name] & failed:
+                    pending.remove(name)
+                    failed.add(name)
+                    report(by_name[name], "blocked by failed upstream stage")
+
+            for name in [n for n in pending if deps[n] <= done]:
+                stage = by_name[name]
+                pending.remove(name)
+
+                digest = stage_digest(stage)
+                outputs_exist = all((PROJECT_ROOT / w).exists() for w in stage.writes)
+
+                # Without the raw file we can only reuse the committed outputs
+                unfetched = [r for r in stage.reads if is_lfs_pointer(PROJECT_ROOT / r)]
+                if unfetched and outputs_exist:
+                    done.add(name)
+                    skipped.add(name)
+                    report(stage, f"kept existing outputs, {', '.join(unfetched)} not fetched (run git lfs pull)")
+                    continue
+
+                if not force and outputs_exist and state.get(name) == digest:
+                    done.add(name)
+                    skipped.add(name)
+                    continue
+
+                started = time.perf_counter()
+                if in_process:
+                    # Stages share pyplot and the dataset object: one at a time
+                    future = Future()
+                    future.set_result(run_in_process(stage, data))
+                    running[future] = (name, digest, started)
+                    break
+                running[pool.submit(run_script, stage)] = (name, digest, started)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, digest, started = running.pop(future)
+                code, output = future.result()
+                elapsed = time.perf_counter() - started
+                if code == 0:
+                    done.add(name)
+                    state[name] = digest
+                    report(by_name[name], "ok", output, elapsed)
+                else:
+                    failed.add(name)
+                    state.pop(name, None)
+                    report(by_name[name], f"FAILED with code {code}", output, elapsed)
+                save_state(state)
+
+    print(f"\n{len(done) - len(skipped)} stages ran, {len(skipped)} unchanged and skipped, "
+          f"{len(failed)} failed")
+    return not failed
+
 
 def copy_charts():
     """Copy generated charts to report assets."""
     print(f"\n{'='*60}")
     print("Copying charts to report assets")
     print('='*60)
-    
+
     outputs_dir = PROJECT_ROOT / "analysis" / "outputs"
     assets_dir = PROJECT_ROOT / "reports" / "site" / "docs" / "assets" / "charts"
-    
+
     assets_dir.mkdir(parents=True, exist_ok=True)
-    
+
     charts = [
         "cpi_index.png",
         "infl_mom.png",
@@ -85,30 +435,43 @@ def copy_charts():
         "08_rolling_rho_categories.png",
         "09_structural_overlay.png",
     ]
-    
-    for chart in charts:
+
+    # Each PNG travels with its web bundle (same name, .json) when it has one
+    bundles = [Path(chart).with_suffix(".json").name for chart in charts]
+    for chart in charts + [b for b in bundles if (outputs_dir / b).exists()]:
         src = outputs_dir / chart
         dst = assets_dir / chart
-        if src.exists():
-            import shutil
+        if not src.exists():
+            print(f"  Missing: {chart}")
+        elif dst.exists() and file_digest(src) == file_digest(dst):
+            continue
+        else:
             shutil.copy2(src, dst)
             print(f"  Copied: {chart}")
-        else:
-            print(f"  Missing: {chart}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the Mauritania FX-Inflation pipeline")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="stages to run in parallel (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="rerun every stage even if its inputs and code are unchanged")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run stages as function calls in this interpreter, sharing loaded data")
+    args = parser.parse_args()
+
     print("="*60)
     print("Mauritania FX-Inflation Analysis Pipeline")
     print("="*60)
     print(f"Project root: {PROJECT_ROOT}")
-    
-    success = True
-    for desc, script in SCRIPTS:
-        if not run_script(desc, script):
-            success = False
-    
+
+    os.chdir(PROJECT_ROOT)
+    if args.force:
+        # Reaches render() in stage subprocesses and --in-process calls alike
+        os.environ[FORCE_ENV] = "1"
+    success = run_pipeline(STAGES, jobs=args.jobs, force=args.force, in_process=args.in_process)
+
     copy_charts()
-    
+
     print(f"\n{'='*60}")
     if success:
         print("Pipeline completed successfully!")
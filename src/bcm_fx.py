@@ -0,0 +1,121 @@
+import re
+from itertools import chain
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from content_hash import CACHE_DIR, file_digest
+
+FX_XLSX_PATH = Path("data/raw/bcm_fx.xlsx")
+
+# Parsed daily rates, one parquet file per workbook content hash
+CACHE_PATH = CACHE_DIR / "bcm_fx"
+
+# Daily fixings live on one sheet per year ("2020", "2021", ...); the
+# DPCache_* sheets are BCM lookup tables with a different layout.
+RATE_SHEET_RE = re.compile(r"^\d{4}$")
+
+HEADER_SCAN_ROWS = 10
+
+
+def is_rate_sheet(title: str) -> bool:
+    return RATE_SHEET_RE.match(str(title).strip()) is not None
+
+
+def pick_col(columns, keyword: str) -> int:
+    """Position of the first column whose name contains `keyword`."""
+    keyword = keyword.lower()
+    for i, c in enumerate(columns):
+        if keyword in str(c).strip().lower():
+            return i
+    raise ValueError(f"Could not find column containing '{keyword}' in columns: {list(columns)}")
+
+
+def find_header(rows: list) -> int:
+    """
+    Index of the first row that names Date + Devise + something
+    containing 'Cours'.
+    """
+    for i, row in enumerate(rows):
+        cols = [str(c).strip().lower() for c in row if c is not None]
+        has_date = any("date" in c for c in cols)
+        has_devise = any("devise" in c for c in cols)
+        has_cours = any("cours" in c for c in cols)
+        if has_date and has_devise and has_cours:
+            return i
+    raise ValueError(f"Could not detect header row. Rows looked like: {rows}")
+
+
+def read_daily_rates(path: Path = FX_XLSX_PATH, sheets=None) -> pd.DataFrame:
+    """
+    Parse the BCM workbook in one read-only pass.
+
+    Each rate sheet is opened once: the first HEADER_SCAN_ROWS rows locate
+    the Date/Devise/Cours header, the remaining rows are streamed into
+    a typed table with columns date, currency, rate, sheet.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        titles = [t for t in wb.sheetnames if is_rate_sheet(t)]
+        if sheets is not None:
+            titles = [t for t in titles if t in set(sheets)]
+
+        dates, currencies, rates, sheet_col = [], [], [], []
+        for title in titles:
+            rows = wb[title].iter_rows(values_only=True)
+
+            head = []
+            for row in rows:
+                head.append(row)
+                if len(head) == HEADER_SCAN_ROWS:
+                    break
+            h = find_header(head)
+            header = head[h]
+            date_i = pick_col(header, "date")
+            curr_i = pick_col(header, "devise")
+            rate_i = pick_col(header, "cours")
+            width = max(date_i, curr_i, rate_i) + 1
+
+            n_before = len(dates)
+            for row in chain(head[h + 1:], rows):
+                if row is None or len(row) < width:
+                    continue
+                dates.append(row[date_i])
+                currencies.append(row[curr_i])
+                rates.append(row[rate_i])
+            sheet_col.extend([title] * (len(dates) - n_before))
+            print(f"Read sheet {title}: header row {h}, {len(dates) - n_before} rows")
+    finally:
+        wb.close()
+
+    df = pd.DataFrame({"date": dates, "currency": currencies, "rate": rates, "sheet": sheet_col})
+
+    # Clean types
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["currency"] = df["currency"].astype(str).str.strip()
+    df["rate"] = pd.to_numeric(df["rate"], errors="coerce").astype("float64")
+    df = df.dropna(subset=["date", "currency", "rate"])
+    df = df[~df["currency"].isin(["None", "nan", ""])]
+    return df.reset_index(drop=True)
+
+
+def load_daily_rates(path: Path = FX_XLSX_PATH) -> pd.DataFrame:
+    """
+    read_daily_rates() for every rate sheet, cached by workbook content
+    hash so an unchanged workbook is never parsed twice.
+    """
+    digest = file_digest(path)
+    cached = CACHE_PATH / f"{digest}.parquet"
+    if cached.exists():
+        return pd.read_parquet(cached)
+
+    df = read_daily_rates(path)
+
+    CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    for old in CACHE_PATH.glob("*.parquet"):
+        old.unlink()
+    tmp = cached.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(cached)
+    return df
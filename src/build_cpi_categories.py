@@ -2,8 +2,11 @@ import re
 from pathlib import Path
 import pandas as pd
 
+from imf_cpi import load_imf_cpi, is_month_col, month_col_to_date
+from processed_store import write_table
+
 RAW_CPI_PATH = Path("data/raw/imf_cpi_full.csv")  # <-- change filename to your CPI csv
-OUT_PATH = Path("data/processed/cpi_categories_monthly_2020_2025.csv")
+OUT_PATH = Path("data/processed/cpi_categories_monthly_2020_2025.parquet")
 
 COUNTRY = "Mauritania, Islamic Republic of"
 START = "2020-02-01"
@@ -24,69 +27,88 @@ SERIES = {
     "misc_goods_services": "MRT.CPI.CP12.IX.M",
 }
 
-MONTH_COL_RE = re.compile(r"^\d{4}-M\d{2}$")  # e.g. 2020-M02
-
-def month_col_to_date(col: str) -> pd.Timestamp:
-    # "2020-M02" -> "2020-02-01"
-    year = int(col[:4])
-    month = int(col[-2:])
-    return pd.Timestamp(year=year, month=month, day=1)
-
-def extract_series(df: pd.DataFrame, series_code: str, name: str) -> pd.DataFrame:
-    row = df[df["SERIES_CODE"] == series_code]
-    if row.empty:
-        raise ValueError(f"Series code not found: {series_code} ({name})")
-    if len(row) > 1:
-        # Should be unique; if not, keep first but warn.
-        row = row.iloc[[0]]
-
-    month_cols = [c for c in df.columns if MONTH_COL_RE.match(str(c))]
-    s = row[month_cols].T
-    s.columns = [name]
-    s.index = [month_col_to_date(c) for c in month_cols]
-    s = s.sort_index()
-    s = s.loc[(s.index >= pd.to_datetime(START)) & (s.index <= pd.to_datetime(END))]
-    s = s.reset_index().rename(columns={"index": "date"})
-    s[name] = pd.to_numeric(s[name], errors="coerce")
-    return s
-
-def add_inflation(df: pd.DataFrame, col: str) -> pd.DataFrame:
-    df = df.sort_values("date").copy()
-    df[f"{col}_infl_mom_pct"] = df[col].pct_change() * 100
-    df[f"{col}_infl_yoy_pct"] = df[col].pct_change(12) * 100
-    return df
+# Services proxy: simple average of the service-like categories
+SERVICE_COLS = [
+    "education", "health", "restaurants_hotels",
+    "communication", "recreation_culture", "misc_goods_services"
+]
+
+# Inflation columns come first for these, in the layout the report reads
+KEY_SERIES = ["headline", "food", "transport", "housing_utilities", "services_proxy"]
+
+def series_name(code: str) -> str:
+    """Column name of a series outside SERIES: its COICOP code, e.g. MRT.CPI.CP011.IX.M -> cp011."""
+    return re.sub(r"\W+", "_", code.split(".")[2]).strip("_").lower()
+
+def extract_all(df: pd.DataFrame, names: dict) -> pd.DataFrame:
+    """
+    Every row of `df` as a date-indexed column, in one pivot.
+
+    `names` maps series codes to column names (codes not in it are named by
+    series_name()); every code in `names` must be present. A duplicated
+    code keeps its first row. The month columns are transposed once, so the
+    cost is linear in the number of series.
+    """
+    missing = [f"{code} ({name})" for code, name in names.items() if code not in set(df["SERIES_CODE"])]
+    if missing:
+        raise ValueError(f"Series code not found: {', '.join(missing)}")
+
+    month_cols = [c for c in df.columns if is_month_col(c)]
+    rows = df.drop_duplicates("SERIES_CODE").set_index("SERIES_CODE")[month_cols]
+    wide = rows.apply(pd.to_numeric, errors="coerce").T
+    wide.index = pd.DatetimeIndex([month_col_to_date(c) for c in month_cols], name="date")
+    wide.columns = [names.get(code, series_name(code)) for code in wide.columns]
+    wide = wide.sort_index()
+    return wide.loc[pd.to_datetime(START):pd.to_datetime(END)]
+
+def add_inflation(levels: pd.DataFrame) -> pd.DataFrame:
+    """{col}_infl_mom_pct and {col}_infl_yoy_pct of every column, two vectorised pct_change calls."""
+    mom = (levels.pct_change() * 100).add_suffix("_infl_mom_pct")
+    yoy = (levels.pct_change(12) * 100).add_suffix("_infl_yoy_pct")
+    cols = [c for col in levels.columns for c in (f"{col}_infl_mom_pct", f"{col}_infl_yoy_pct")]
+    return pd.concat([mom, yoy], axis=1)[cols]
+
+def build_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Index levels of SERIES plus every other COICOP division / sub-class in
+    `df`, the services proxy, and MoM / YoY inflation of all of them.
+
+    The columns of the original ten-series table come first, unchanged;
+    the extra COICOP levels and their inflation follow.
+    """
+    names = {code: name for name, code in SERIES.items()}
+    levels = extract_all(df, names)
+    levels["services_proxy"] = levels[SERVICE_COLS].mean(axis=1)
+
+    base = list(SERIES) + ["services_proxy"]
+    extra = [c for c in levels.columns if c not in base]
+    infl = add_inflation(levels)
+
+    key_infl = [f"{c}_infl_{k}_pct" for c in KEY_SERIES for k in ("mom", "yoy")]
+    other_infl = [c for c in infl.columns if c not in key_infl]
+    out = pd.concat([levels[base], infl[key_infl], levels[extra], infl[other_infl]], axis=1)
+    return out.reset_index()
 
 def main():
-    df = pd.read_csv(RAW_CPI_PATH)
-    df = df[df["COUNTRY"] == COUNTRY].copy()
-
-    # Keep only monthly "Index" series rows to avoid accidental mixing
-    df = df[(df["FREQUENCY"] == "Monthly") & (df["TYPE_OF_TRANSFORMATION"] == "Index")].copy()
-
-    series_frames = []
-    for name, code in SERIES.items():
-        series_frames.append(extract_series(df, code, name))
-
-    # Merge all extracted series by date
-    out = series_frames[0]
-    for f in series_frames[1:]:
-        out = out.merge(f, on="date", how="inner")
-
-    # Build services proxy index as the simple average of service-like categories
-    service_cols = [
-        "education", "health", "restaurants_hotels",
-        "communication", "recreation_culture", "misc_goods_services"
-    ]
-    out["services_proxy"] = out[service_cols].mean(axis=1)
-
-    # Add inflation measures for key series
-    for col in ["headline", "food", "transport", "housing_utilities", "services_proxy"]:
-        out = add_inflation(out, col)
-
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(OUT_PATH, index=False)
+    # Every monthly "Index" series of the country (all COICOP divisions and
+    # sub-classes), selected in one pass over the columnar store
+    df = load_imf_cpi(
+        RAW_CPI_PATH,
+        filters={
+            "COUNTRY": COUNTRY,
+            "FREQUENCY": "Monthly",
+            "TYPE_OF_TRANSFORMATION": "Index",
+        },
+        start=START,
+        end=END,
+    )
+
+    out = build_categories(df)
+
+    write_table(out, OUT_PATH)
     print("Saved:", OUT_PATH)
     print("Rows:", len(out), "Min date:", out["date"].min(), "Max date:", out["date"].max())
+    print("Series:", len([c for c in out.columns if c != "date" and "_infl_" not in c]))
     print("Columns:", list(out.columns))
 
 if __name__ == "__main__":
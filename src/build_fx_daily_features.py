@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from build_fx_monthly_usd import END, START, read_daily_store
+from processed_store import write_table
+
+OUT_PATH = Path("data/processed/fx_daily_features_2020_2025.parquet")
+
+# A daily move is a jump when |log change| exceeds JUMP_K standard
+# deviations of that currency's daily changes over the whole store. (Most
+# days the MRU fixing does not move, so within-month bipower thresholds
+# collapse to zero.)
+JUMP_K = 3.0
+
+def daily_features(daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per currency and month, from the daily fixings in one grouped pass:
+
+      n_fixings   fixings in the month
+      rv_pct      realised volatility, sqrt(sum r^2), r = 100 * daily log change
+      range_pct   100 * log(max / min) of the month's fixings
+      n_jumps     days with |r| > JUMP_K * (currency's daily std)
+      drift_pct   100 * log(last / first) fixing of the month
+
+    The change into a month's first fixing (from the previous month's last)
+    counts towards that month, so the monthly rv^2 add up to the full-sample sum.
+    """
+    d = daily.sort_values(["currency", "date"], kind="stable")
+    log_rate = np.log(d["rate"])
+    r = 100 * log_rate.groupby(d["currency"]).diff()
+    sd = r.groupby(d["currency"]).transform("std")
+
+    d = d.assign(
+        month=d["date"].dt.to_period("M").dt.to_timestamp(),
+        r2=r * r,
+        jump=(r.abs() > JUMP_K * sd).astype(int),
+        log_rate=log_rate,
+    )
+    out = d.groupby(["currency", "month"], sort=True).agg(
+        n_fixings=("rate", "size"),
+        rv2=("r2", "sum"),
+        log_max=("log_rate", "max"),
+        log_min=("log_rate", "min"),
+        log_first=("log_rate", "first"),
+        log_last=("log_rate", "last"),
+        n_jumps=("jump", "sum"),
+    ).reset_index()
+
+    return pd.DataFrame({
+        "date": out["month"],
+        "currency": out["currency"],
+        "n_fixings": out["n_fixings"],
+        "rv_pct": np.sqrt(out["rv2"]),
+        "range_pct": 100 * (out["log_max"] - out["log_min"]),
+        "n_jumps": out["n_jumps"],
+        "drift_pct": 100 * (out["log_last"] - out["log_first"]),
+    })
+
+def main():
+    daily = read_daily_store()
+    features = daily_features(daily)
+    features = features[(features["date"] >= START) & (features["date"] <= END)]
+    features = features.sort_values(["date", "currency"]).reset_index(drop=True)
+
+    write_table(features, OUT_PATH)
+
+    usd = features[features["currency"] == "USD"]
+    print("Saved:", OUT_PATH, f"({len(features)} rows, {features['currency'].nunique()} currencies)")
+    print("\nUSD, last 5 months:")
+    print(usd.tail(5).to_string(index=False, float_format="%.4f"))
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,199 @@
+import argparse
+import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
-IN_PATH = Path("data/raw/bcm_fx.xlsx")
-OUT_PATH = Path("data/processed/fx_usd_monthly_2020_2025.csv")
-
-YEARS = ["2020", "2021", "2022", "2023", "2024", "2025"]
-
-def detect_header_row(path: Path, sheet: str, max_rows: int = 10) -> int:
-    """
-    Try header rows 0..max_rows-1 and pick the first one where columns
-    include Date + Devise + something containing 'Cours'.
-    """
-    for h in range(max_rows):
-        df_try = pd.read_excel(path, sheet_name=sheet, header=h)
-        cols = [str(c).strip().lower() for c in df_try.columns]
-
-        has_date = any("date" == c or "date" in c for c in cols)
-        has_devise = any("devise" == c or "devise" in c for c in cols)
-        has_cours = any("cours" in c for c in cols)
+from bcm_fx import load_daily_rates
+from processed_store import table_metadata, update_csv, update_table, write_table
 
-        if has_date and has_devise and has_cours:
-            return h
-
-    raise ValueError(f"Could not detect header row for sheet {sheet}. Columns looked like: {df_try.columns}")
+IN_PATH = Path("data/raw/bcm_fx.xlsx")
+OUT_PATH = Path("data/processed/fx_usd_monthly_2020_2025.parquet")
 
-def pick_col(columns, keyword: str) -> str:
-    keyword = keyword.lower()
-    for c in columns:
-        if keyword in str(c).strip().lower():
-            return c
-    raise ValueError(f"Could not find column containing '{keyword}' in columns: {list(columns)}")
+# Every daily BCM fixing we have ingested (all currencies), in (date, sheet) order
+DAILY_PATH = Path("data/processed/fx_daily_bcm.csv")
 
-def main():
-    frames = []
+# One fixing of the daily store
+FIXING_KEY = ["date", "currency", "sheet"]
 
-    for year in YEARS:
-        header_row = detect_header_row(IN_PATH, sheet=year)
-        print(f"Reading sheet {year} with header row {header_row}")
+# Monthly averages and MoM changes of every quoted currency, plus the NEER
+PANEL_PATH = Path("data/processed/fx_panel_monthly_2020_2025.parquet")
 
-        df_year = pd.read_excel(IN_PATH, sheet_name=year, header=header_row)
-        df_year.columns = [str(c).strip() for c in df_year.columns]
+# NEER weights by BCM currency code. Indicative trading-partner shares;
+# pass official ones with --neer-weights. They are normalised to sum to 1.
+NEER_WEIGHTS = {"EUR": 0.40, "CNY": 0.25, "USD": 0.20, "AED": 0.05, "MAD": 0.05, "XOF": 0.05}
 
-        # Identify columns even if names differ (Cours 2 vs Cours de Référence 2, etc.)
-        date_col = pick_col(df_year.columns, "date")
-        curr_col = pick_col(df_year.columns, "devise")
-        rate_col = pick_col(df_year.columns, "cours")
+# Panel metadata key of the normalised weights its neer column was built with
+WEIGHTS_KEY = "neer_weights"
 
-        df_year = df_year[[date_col, curr_col, rate_col]].copy()
-        df_year.columns = ["date", "currency", "rate"]
+# Match CPI window
+START = "2020-02-01"
+END = "2025-12-01"
 
-        frames.append(df_year)
-
-    df = pd.concat(frames, ignore_index=True)
+def monthly_panel(daily: pd.DataFrame, weights: dict = NEER_WEIGHTS) -> pd.DataFrame:
+    """
+    Wide monthly table of every currency in one groupby pass:
+    {ccy}_avg (MRU per unit, monthly mean of the fixings) and {ccy}_mom_pct.
 
-    # Clean types
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df["currency"] = df["currency"].astype(str).str.strip()
-    df["rate"] = pd.to_numeric(df["rate"], errors="coerce")
-    df = df.dropna(subset=["date", "currency", "rate"])
+    neer is the weighted geometric mean of the monthly averages, 100 in
+    START, or in the first later month where every weighted currency has a
+    rate (NaN before it). Rates are MRU per foreign unit, so a rise in neer
+    (like in fx_mom_pct) is an MRU depreciation.
+    """
+    missing = set(weights) - set(daily["currency"])
+    if missing:
+        raise ValueError(f"NEER weights for currencies not in the workbook: {sorted(missing)}")
+    total = sum(weights.values())
+    if total <= 0 or min(weights.values()) < 0:
+        raise ValueError(f"NEER weights must be non-negative with a positive sum: {weights}")
+
+    month = daily["date"].dt.to_period("M").dt.to_timestamp().rename("date")
+    levels = daily.groupby([month, daily["currency"]])["rate"].mean().unstack("currency")
+    levels = levels.reindex(pd.date_range(levels.index.min(), levels.index.max(), freq="MS", name="date"))
+    currencies = sorted(levels.columns)
+
+    log_neer = sum(w / total * np.log(levels[ccy]) for ccy, w in weights.items() if w > 0)
+    complete = log_neer.dropna()
+    if complete.empty:
+        raise ValueError(f"No month has a rate for every weighted NEER currency: {sorted(weights)}")
+    in_start = complete[complete.index >= pd.Timestamp(START)]
+    base = (in_start if len(in_start) else complete).index[0]
+    levels["NEER"] = 100 * np.exp(log_neer - log_neer.loc[base])
+    mom = levels.pct_change(fill_method=None) * 100
+
+    panel = pd.DataFrame(index=levels.index)
+    for ccy in currencies:
+        panel[f"{ccy.lower()}_avg"] = levels[ccy]
+        panel[f"{ccy.lower()}_mom_pct"] = mom[ccy]
+    panel["neer"] = levels["NEER"]
+    panel["neer_mom_pct"] = mom["NEER"]
+    return panel.reset_index()
+
+def monthly_usd(panel: pd.DataFrame) -> pd.DataFrame:
+    """The USD columns of monthly_panel(), as fx_usd_avg / fx_mom_pct."""
+    return panel[["date", "usd_avg", "usd_mom_pct"]].rename(
+        columns={"usd_avg": "fx_usd_avg", "usd_mom_pct": "fx_mom_pct"})
+
+def in_window(monthly: pd.DataFrame) -> pd.DataFrame:
+    return monthly[(monthly["date"] >= START) & (monthly["date"] <= END)].copy()
+
+def read_daily_store() -> pd.DataFrame:
+    return pd.read_csv(DAILY_PATH, parse_dates=["date"], dtype={"sheet": str}, float_precision="round_trip")
+
+def parse_weights(text: str) -> dict:
+    """"EUR=0.4,CNY=0.25,..." -> {"EUR": 0.4, "CNY": 0.25, ...}"""
+    weights = {}
+    for item in text.split(","):
+        ccy, _, w = item.partition("=")
+        weights[ccy.strip().upper()] = float(w)
+    return weights
+
+def normalised_weights(weights: dict) -> str:
+    """The weights as stored with the panel: shares summing to 1, as sorted JSON."""
+    total = sum(weights.values())
+    return json.dumps({ccy: w / total for ccy, w in weights.items()}, sort_keys=True)
+
+def read_workbook() -> pd.DataFrame:
+    """Every fixing of the workbook in store order (one read-only pass, cached by content hash)."""
+    daily = load_daily_rates(IN_PATH)
+    return daily.sort_values(["date", "sheet"], kind="stable").reset_index(drop=True)
+
+def changed_dates(daily: pd.DataFrame, fresh: pd.DataFrame) -> pd.Series:
+    """
+    Dates of the fixings that differ between the store and the workbook:
+    new or backfilled rows, rates corrected in place (any date, any sheet)
+    and rows the workbook no longer has. Anti-join on FIXING_KEY both ways.
+    """
+    old = daily.drop_duplicates(FIXING_KEY, keep="last")
+    new = fresh.drop_duplicates(FIXING_KEY, keep="last")
+    both = new.merge(old, on=FIXING_KEY, how="outer", suffixes=("", "_stored"), indicator=True)
+    changed = (both["_merge"] != "both") | (both["rate"] != both["rate_stored"])
+    return both.loc[changed, "date"]
 
-    # Filter USD
-    usd = df[df["currency"] == "USD"].copy().sort_values("date")
+def full_build(weights: dict = NEER_WEIGHTS):
+    daily = read_workbook()
 
+    usd = daily[daily["currency"] == "USD"]
     print("\nRaw USD date range:")
     print(usd["date"].min(), "to", usd["date"].max())
     print("Raw USD rows:", len(usd))
 
-    # Monthly average (Month Start)
-    monthly = (
-        usd.set_index("date")["rate"]
-        .resample("MS")
-        .mean()
-        .reset_index()
-        .rename(columns={"rate": "fx_usd_avg"})
-    )
-
-    monthly["fx_mom_pct"] = monthly["fx_usd_avg"].pct_change() * 100
-
-    # Match CPI window
-    monthly = monthly[(monthly["date"] >= "2020-02-01") & (monthly["date"] <= "2025-12-01")].copy()
+    # Every currency in one pass; the USD file is a view of the panel
+    panel = in_window(monthly_panel(daily, weights))
+    monthly = monthly_usd(panel)
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    monthly.to_csv(OUT_PATH, index=False)
+    daily.to_csv(DAILY_PATH, index=False)
+    write_table(monthly, OUT_PATH)
+    write_table(panel, PANEL_PATH, metadata={WEIGHTS_KEY: normalised_weights(weights)})
 
+    print("\nSaved daily store:", DAILY_PATH, f"({len(daily)} rows)")
+    print("Saved FX panel:", PANEL_PATH, f"({(panel.columns.str.endswith('_avg')).sum()} currencies + NEER)")
     print("\nFinal FX monthly rows:", len(monthly))
     print("\nFirst 5 rows:")
     print(monthly.head(5).to_string(index=False))
     print("\nLast 5 rows:")
     print(monthly.tail(5).to_string(index=False))
 
+def incremental_update(weights: dict = NEER_WEIGHTS):
+    """
+    Bring the daily store in line with the workbook and refresh the months
+    from the earliest changed fixing on; earlier months are not touched.
+
+    Fixings can be added or corrected on any yearly sheet (a late sheet for
+    a stored date, a backfill, a revised rate), so the whole workbook is
+    diffed against the store rather than only rows after its last date.
+    Different NEER weights from the stored panel's force a full build.
+    """
+    if not DAILY_PATH.exists() or not OUT_PATH.exists() or not PANEL_PATH.exists():
+        print("No daily store yet, running a full build")
+        return full_build(weights)
+    if table_metadata(PANEL_PATH).get(WEIGHTS_KEY) != normalised_weights(weights):
+        # One neer column must not mix two weightings
+        print("NEER weights differ from the stored panel's, running a full build")
+        return full_build(weights)
+
+    daily = read_daily_store()
+    fresh = read_workbook()
+    dates = changed_dates(daily, fresh)
+    if dates.empty:
+        print("Daily store already matches the workbook, up to", daily["date"].max().date())
+        return
+
+    first = dates.min()
+    rows = fresh.loc[fresh["date"] >= first, daily.columns]
+    update_csv(DAILY_PATH, rows)
+    print(f"{len(dates)} fixings changed ({first.date()} to {dates.max().date()}); "
+          f"rewrote {len(rows)} stored fixings from {first.date()}")
+
+    # The panel pass over the whole store is cheap and keeps the NEER base
+    # month and the first affected MoM right; only changed months are rewritten
+    first_month = first.to_period("M").to_timestamp()
+    panel = in_window(monthly_panel(fresh, weights))
+    panel = panel[panel["date"] >= first_month]
+
+    if panel.empty:
+        print("Changed fixings fall outside the", START, "to", END, "window")
+        return
+
+    monthly = monthly_usd(panel)
+    update_table(OUT_PATH, monthly)
+    update_table(PANEL_PATH, panel)
+    print("Updated months:")
+    print(monthly.to_string(index=False))
+
+def main():
+    parser = argparse.ArgumentParser(description="Build monthly USD/MRU averages from BCM daily fixings")
+    parser.add_argument("--incremental", action="store_true",
+                        help="sync the daily store with the workbook and refresh only the affected months")
+    parser.add_argument("--neer-weights", type=parse_weights, default=NEER_WEIGHTS,
+                        help="NEER weights as CCY=w,... (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        incremental_update(args.neer_weights)
+    else:
+        full_build(args.neer_weights)
+
 if __name__ == "__main__":
     main()
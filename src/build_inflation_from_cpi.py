@@ -1,14 +1,14 @@
-import pandas as pd
 from pathlib import Path
 
-IN_PATH = Path("data/processed/cpi_monthly_mauritania_2020_2025.csv")
-OUT_PATH = Path("data/processed/cpi_inflation_mauritania_2020_2025.csv")
+from processed_store import read_table, write_table
+
+IN_PATH = Path("data/processed/cpi_monthly_mauritania_2020_2025.parquet")
+OUT_PATH = Path("data/processed/cpi_inflation_mauritania_2020_2025.parquet")
 
 def main():
-    df = pd.read_csv(IN_PATH)
+    df = read_table(IN_PATH)
 
-    # Parse date and sort
-    df["date"] = pd.to_datetime(df["date"])
+    # Sort by date
     df = df.sort_values("date").reset_index(drop=True)
 
     # Compute inflation rates from index
@@ -18,8 +18,7 @@ def main():
     # YoY % = (CPI_t / CPI_{t-12} - 1) * 100
     df["infl_yoy_pct"] = df["cpi_index"].pct_change(12) * 100
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(OUT_PATH, index=False)
+    write_table(df, OUT_PATH)
 
     print("Saved:", OUT_PATH)
     print("\nFirst 15 rows:")
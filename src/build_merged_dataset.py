@@ -1,22 +1,20 @@
 import pandas as pd
 from pathlib import Path
 
-CPI_PATH = Path("data/processed/cpi_inflation_mauritania_2020_2025.csv")
-FX_PATH = Path("data/processed/fx_usd_monthly_2020_2025.csv")
-OUT_PATH = Path("data/processed/merged_fx_cpi_2020_2025.csv")
+from processed_store import read_table, write_table
 
-def main():
-    cpi = pd.read_csv(CPI_PATH)
-    fx = pd.read_csv(FX_PATH)
+CPI_PATH = Path("data/processed/cpi_inflation_mauritania_2020_2025.parquet")
+FX_PATH = Path("data/processed/fx_usd_monthly_2020_2025.parquet")
+OUT_PATH = Path("data/processed/merged_fx_cpi_2020_2025.parquet")
 
-    cpi["date"] = pd.to_datetime(cpi["date"])
-    fx["date"] = pd.to_datetime(fx["date"])
+def main():
+    cpi = read_table(CPI_PATH)
+    fx = read_table(FX_PATH)
 
     merged = pd.merge(cpi, fx, on="date", how="inner")
     merged = merged.sort_values("date").reset_index(drop=True)
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    merged.to_csv(OUT_PATH, index=False)
+    write_table(merged, OUT_PATH)
 
     print("Saved:", OUT_PATH)
     print("\nFirst 10 rows:")
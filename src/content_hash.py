@@ -0,0 +1,83 @@
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+CACHE_DIR = Path("data/cache")
+DIGEST_MEMO = CACHE_DIR / "file_digests.json"
+DIGEST_MEMO_LOCK = CACHE_DIR / "file_digests.lock"
+
+# Set to "1" by run_all.py --force (and inherited by its stage processes):
+# output caches keyed on a spec digest, like the chart manifest, redraw anyway
+FORCE_ENV = "PIPELINE_FORCE"
+
+BLOCK_SIZE = 1 << 20
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_digest(path) -> str:
+    """
+    SHA-256 of a file's content.
+
+    Digests are memoised on (size, mtime) so an untouched 100 MB input is
+    not re-read on every run; any write to the file invalidates the memo.
+    """
+    path = Path(path)
+    st = path.stat()
+    key = str(path.resolve())
+    stamp = [st.st_size, st.st_mtime_ns]
+
+    hit = _load_memo().get(key)
+    if hit and hit["stamp"] == stamp:
+        return hit["sha256"]
+
+    digest = _sha256(path)
+    # Re-read under the lock: parallel stages share the memo, and an entry
+    # lost to a concurrent writer means re-hashing that file next time
+    with locked(DIGEST_MEMO_LOCK):
+        memo = _load_memo()
+        memo[key] = {"stamp": stamp, "sha256": digest}
+        tmp = DIGEST_MEMO.with_name(f"{DIGEST_MEMO.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(memo, indent=1))
+        tmp.replace(DIGEST_MEMO)
+    return digest
+
+
+def _load_memo() -> dict:
+    if DIGEST_MEMO.exists():
+        try:
+            return json.loads(DIGEST_MEMO.read_text())
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def forced() -> bool:
+    """True inside a run_all.py --force run."""
+    return os.environ.get(FORCE_ENV) == "1"
+
+
+@contextmanager
+def locked(path):
+    """
+    Hold an exclusive lock on the file at `path` (created if missing) for
+    the duration of the with block, waiting for any other holder first.
+    Serialises cache writers that run as parallel pipeline stages.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -1,17 +1,21 @@
-import pandas as pd
+from datasets import Datasets
 
-df = pd.read_csv("data/processed/cpi_inflation_mauritania_2020_2025.csv")
-df["date"] = pd.to_datetime(df["date"])
+def main(data=None):
+    data = data or Datasets()
+    df = data.cpi
 
-print("Date range:", df["date"].min(), "to", df["date"].max())
-print("\nMoM inflation summary:")
-print(df["infl_mom_pct"].describe())
+    print("Date range:", df["date"].min(), "to", df["date"].max())
+    print("\nMoM inflation summary:")
+    print(df["infl_mom_pct"].describe())
 
-print("\nYoY inflation summary:")
-print(df["infl_yoy_pct"].describe())
+    print("\nYoY inflation summary:")
+    print(df["infl_yoy_pct"].describe())
 
-print("\nMax MoM month:")
-print(df.loc[df["infl_mom_pct"].idxmax()])
+    print("\nMax MoM month:")
+    print(df.loc[df["infl_mom_pct"].idxmax()])
 
-print("\nMin MoM month:")
-print(df.loc[df["infl_mom_pct"].idxmin()])
+    print("\nMin MoM month:")
+    print(df.loc[df["infl_mom_pct"].idxmin()])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from processed_store import read_table
+
+PROCESSED_DIR = Path("data/processed")
+
+CPI_PATH = PROCESSED_DIR / "cpi_inflation_mauritania_2020_2025.parquet"
+FX_PATH = PROCESSED_DIR / "fx_usd_monthly_2020_2025.parquet"
+FX_PANEL_PATH = PROCESSED_DIR / "fx_panel_monthly_2020_2025.parquet"
+MERGED_PATH = PROCESSED_DIR / "merged_fx_cpi_2020_2025.parquet"
+CATEGORIES_PATH = PROCESSED_DIR / "cpi_categories_monthly_2020_2025.parquet"
+FX_FEATURES_PATH = PROCESSED_DIR / "fx_daily_features_2020_2025.parquet"
+
+# The headline and main CPI index level columns of the categories table
+# (the table also holds every other COICOP series the CPI store has; see
+# category_levels)
+CATEGORY_COLS = [
+    "headline",
+    "food",
+    "transport",
+    "housing_utilities",
+    "education",
+    "health",
+    "restaurants_hotels",
+    "communication",
+    "recreation_culture",
+    "misc_goods_services",
+    "services_proxy",
+]
+
+# Series lagged one month in the shared Dataset (besides every category MoM)
+LAG_COLS = ["infl_mom_pct", "fx_mom_pct"]
+
+
+def read_monthly(path: Path, **kwargs) -> pd.DataFrame:
+    df = read_table(path, **kwargs)
+    return df.sort_values("date").reset_index(drop=True)
+
+
+def category_levels(columns) -> list:
+    """Index level columns of a categories table: everything but date and the *_infl_* changes."""
+    return [c for c in columns if c != "date" and "_infl_" not in c]
+
+
+def _shift(x: np.ndarray, n: int) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    out[n:] = x[:-n]
+    return out
+
+
+class Dataset:
+    """
+    Monthly series aligned on one PeriodIndex and held in a single
+    column-major float array, so every column is a contiguous block.
+
+    Columns come from named sources (the processed tables); months a source
+    does not cover are NaN. frame() hands out DataFrames that view the
+    array rather than copying it. The array is read-only: copy-on-write
+    does not cover a plain NumPy array, so an in-place write (.loc, .iloc,
+    masks) raises instead of reaching every other view. Assigning or
+    adding whole columns is fine; it replaces the column in that frame only.
+    """
+
+    def __init__(self, index: pd.PeriodIndex, values: np.ndarray, columns: list, sources: dict):
+        if len(set(columns)) != len(columns):
+            raise ValueError("Dataset columns must be unique across sources")
+        self.index = index
+        values.flags.writeable = False
+        self.values = values
+        self.columns = list(columns)
+        self.sources = sources          # {name: (rows slice, columns)}
+        self._pos = {c: j for j, c in enumerate(self.columns)}
+
+    @classmethod
+    def from_frames(cls, frames: dict, dtype=np.float64) -> "Dataset":
+        """{source name: DataFrame with a monthly date column} -> Dataset."""
+        periods = {name: pd.PeriodIndex(df["date"], freq="M") for name, df in frames.items()}
+        index = pd.period_range(min(p.min() for p in periods.values()),
+                                max(p.max() for p in periods.values()), freq="M")
+        cols = {name: [c for c in df.columns if c != "date"] for name, df in frames.items()}
+        columns = [c for name in frames for c in cols[name]]
+
+        values = np.full((len(index), len(columns)), np.nan, dtype=dtype, order="F")
+        sources = {}
+        j = 0
+        for name, df in frames.items():
+            rows = index.get_indexer(periods[name])
+            values[rows, j:j + len(cols[name])] = df[cols[name]].to_numpy(dtype=dtype)
+            sources[name] = (slice(rows.min(), rows.max() + 1), cols[name])
+            j += len(cols[name])
+        return cls(index, values, columns, sources)
+
+    def with_columns(self, new: dict, source: str = "derived") -> "Dataset":
+        """A Dataset with the {name: array} columns appended (one allocation)."""
+        values = np.empty((len(self.index), len(self.columns) + len(new)), dtype=self.values.dtype, order="F")
+        values[:, :len(self.columns)] = self.values
+        for j, x in enumerate(new.values(), start=len(self.columns)):
+            values[:, j] = x
+        sources = dict(self.sources)
+        sources[source] = (slice(0, len(self.index)), list(new))
+        return Dataset(self.index, values, self.columns + list(new), sources)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """One column over the whole index, as a view."""
+        return self.values[:, self._pos[column]]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._pos
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        """Month-start timestamps of the index."""
+        return self.index.to_timestamp()
+
+    def rows(self, *sources: str) -> slice:
+        """The months covered by every one of the named sources."""
+        spans = [self.sources[name][0] for name in sources]
+        return slice(max(s.start for s in spans), min(s.stop for s in spans))
+
+    def frame(self, columns: list = None, rows: slice = slice(None), rename: dict = None) -> pd.DataFrame:
+        """date plus the given columns (default: all) over rows, viewing the shared array."""
+        block = pd.DataFrame(self.values[rows], columns=self.columns, copy=False)
+        if columns is not None:
+            block = block[columns]
+        if rename:
+            block = block.rename(columns=rename)
+        block.insert(0, "date", self.dates[rows])
+        return block
+
+
+class Datasets:
+    """
+    The processed tables, each read at most once per pipeline run.
+
+    Stages receive one shared instance; a table is only read the first
+    time a stage asks for it. The monthly tables (merged, categories, FX
+    panel) live in one shared Dataset, with MoM / YoY changes and one-month
+    lags of every category level precomputed; the frames below are fresh,
+    read-only views of it on every access. A stage can add or replace whole
+    columns without a .copy(); editing values in place (.loc / .iloc) raises
+    and needs a .copy() of the frame first.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = dtype
+
+    @cached_property
+    def cpi(self) -> pd.DataFrame:
+        return read_monthly(CPI_PATH)
+
+    @cached_property
+    def fx(self) -> pd.DataFrame:
+        return read_monthly(FX_PATH)
+
+    @cached_property
+    def dataset(self) -> Dataset:
+        """merged, categories and fx_panel on one monthly index, plus derived columns."""
+        ds = Dataset.from_frames({
+            "merged": read_monthly(MERGED_PATH),
+            "categories": read_monthly(CATEGORIES_PATH),
+            "fx_panel": read_monthly(FX_PANEL_PATH),
+        }, dtype=self.dtype)
+
+        derived = {}
+        for c in category_levels(ds.sources["categories"][1]):
+            x = ds[c]
+            derived[f"{c}_mom_pct"] = (x / _shift(x, 1) - 1) * 100
+            derived[f"{c}_yoy_pct"] = (x / _shift(x, 12) - 1) * 100
+            derived[f"{c}_mom_pct_lag1"] = _shift(derived[f"{c}_mom_pct"], 1)
+        for c in LAG_COLS:
+            derived[f"{c}_lag1"] = _shift(ds[c], 1)
+        return ds.with_columns(derived)
+
+    def _source(self, name: str) -> pd.DataFrame:
+        rows, columns = self.dataset.sources[name]
+        return self.dataset.frame(columns, rows)
+
+    @property
+    def merged(self) -> pd.DataFrame:
+        return self._source("merged")
+
+    @property
+    def fx_panel(self) -> pd.DataFrame:
+        """Monthly average and MoM change of every BCM currency ({ccy}_avg, {ccy}_mom_pct) and the NEER."""
+        return self._source("fx_panel")
+
+    @property
+    def fx_panel_mom_cols(self) -> list:
+        return [c for c in self.dataset.sources["fx_panel"][1] if c.endswith("_mom_pct")]
+
+    @property
+    def fx_panel_mom(self) -> pd.DataFrame:
+        """date plus every *_mom_pct column of fx_panel, ready to join as regressors."""
+        return self.dataset.frame(self.fx_panel_mom_cols, self.dataset.rows("fx_panel"))
+
+    @property
+    def merged_panel(self) -> pd.DataFrame:
+        """merged with every FX panel MoM column, so any of them can stand in for fx_mom_pct."""
+        ds = self.dataset
+        return ds.frame(ds.sources["merged"][1] + self.fx_panel_mom_cols, ds.rows("merged"))
+
+    @property
+    def categories(self) -> pd.DataFrame:
+        return self._source("categories")
+
+    @property
+    def category_cols(self) -> list:
+        """Every index level column of the categories table: CATEGORY_COLS plus any other COICOP series."""
+        return category_levels(self.dataset.sources["categories"][1])
+
+    @cached_property
+    def fx_features(self) -> pd.DataFrame:
+        """Monthly realised volatility, range, jumps and drift per currency, from the daily fixings."""
+        return read_monthly(FX_FEATURES_PATH)
+
+    def fx_features_for(self, currency: str = "USD") -> pd.DataFrame:
+        """fx_features of one currency, one row per month (only its rows are read)."""
+        if "fx_features" in vars(self):
+            f = self.fx_features
+            return f[f["currency"] == currency].drop(columns="currency").reset_index(drop=True)
+        return read_monthly(FX_FEATURES_PATH, filters=[("currency", "==", currency)]).drop(columns="currency")
+
+    @property
+    def categories_fx(self) -> pd.DataFrame:
+        """Category CPI with FX MoM change (and every FX panel MoM column), on the months both cover."""
+        ds = self.dataset
+        columns = ds.sources["categories"][1] + ["fx_mom_pct"] + self.fx_panel_mom_cols
+        return ds.frame(columns, ds.rows("categories", "merged"))
+
+    @property
+    def category_mom_fx(self) -> pd.DataFrame:
+        """MoM inflation (%) of every category_cols index with FX MoM change (and the FX panel), on the months both cover."""
+        ds = self.dataset
+        mom = {f"{c}_mom_pct": c for c in self.category_cols}
+        columns = list(mom) + ["fx_mom_pct"] + self.fx_panel_mom_cols
+        return ds.frame(columns, ds.rows("categories", "merged"), rename=mom)
@@ -0,0 +1,217 @@
+import argparse
+import hashlib
+import json
+import math
+from pathlib import Path
+
+import pandas as pd
+
+from build_fx_monthly_usd import DAILY_PATH, read_daily_store
+from content_hash import CACHE_DIR
+
+# Running month-to-date aggregates; rebuilt from the daily store if missing,
+# or if the fixings it has consumed or the β it used have changed since
+STATE_PATH = CACHE_DIR / "fx_nowcast.json"
+
+# One provisional reading per fixing consumed, appended between rebuilds; a
+# rebuild replays the whole store, so the file only depends on store and β
+OUT_PATH = Path("data/processed/fx_nowcast.csv")
+
+# Latest estimated pass-through: the last 24m rolling β from metrics.py
+BETA_PATH = Path("analysis/outputs/rolling_pass_through_24m.csv")
+
+CURRENCY = "USD"
+
+COLUMNS = ["date", "month", "n_fixings", "mtd_avg", "prev_month_avg", "fx_mom_pct_mtd",
+           "realised_vol_pct", "beta_fx", "implied_infl_mom_pct",
+           "implied_infl_mom_lo", "implied_infl_mom_hi"]
+
+
+class MonthToDate:
+    """
+    Running aggregates of the current month's fixings, O(1) per tick:
+    count and mean of the rate (Welford, so the mean matches the month-end
+    average without keeping the rates) and the realised variance of daily
+    log changes. When a fixing from a new month arrives, the closed month's
+    mean becomes the base for the next month's change.
+
+    `history` chains a hash over every fixing consumed, starting from
+    history_seed() of the β the readings use, so a saved state can be
+    checked against the store it was built from.
+    """
+
+    def __init__(self):
+        self.month = None
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0            # sum of squared deviations from the mean
+        self.rv = 0.0            # sum of squared daily log changes (%^2)
+        self.last_date = None
+        self.last_rate = None
+        self.prev_month_avg = None
+        self.history = ""
+
+    def tick(self, date, rate: float) -> bool:
+        """Consume one fixing; False if it is not newer than the last one."""
+        date = pd.Timestamp(date)
+        if self.last_date is not None and date <= self.last_date:
+            return False
+
+        month = date.to_period("M").to_timestamp()
+        if month != self.month:
+            if self.month is not None:
+                self.prev_month_avg = self.mean if month == self.month + pd.offsets.MonthBegin(1) else None
+            self.month, self.count, self.mean, self.m2, self.rv = month, 0, 0.0, 0.0, 0.0
+
+        self.count += 1
+        delta = rate - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (rate - self.mean)
+        if self.last_rate is not None and self.count > 1:
+            self.rv += (100 * math.log(rate / self.last_rate)) ** 2
+
+        self.last_date = date
+        self.last_rate = rate
+        self.history = extend_history(self.history, date, rate)
+        return True
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def fx_mom_pct(self) -> float:
+        """Provisional change of the month-to-date average on last month's average."""
+        if not self.prev_month_avg:
+            return float("nan")
+        return (self.mean / self.prev_month_avg - 1) * 100
+
+    def to_dict(self) -> dict:
+        out = dict(vars(self))
+        for key in ("month", "last_date"):
+            out[key] = None if out[key] is None else out[key].strftime("%Y-%m-%d")
+        return out
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "MonthToDate":
+        mtd = cls()
+        for key, value in state.items():
+            if key in ("month", "last_date") and value is not None:
+                value = pd.Timestamp(value)
+            setattr(mtd, key, value)
+        return mtd
+
+
+def history_seed(beta: dict) -> str:
+    return hashlib.sha256(json.dumps(beta, sort_keys=True).encode()).hexdigest()
+
+
+def extend_history(history: str, date, rate: float) -> str:
+    """The history digest after one more fixing."""
+    return hashlib.sha256(f"{history} {pd.Timestamp(date):%Y-%m-%d} {float(rate)!r}".encode()).hexdigest()
+
+
+def replay_history(dates, rates, beta: dict) -> str:
+    """The history digest a fresh state would reach on these fixings."""
+    history = history_seed(beta)
+    for date, rate in zip(dates, rates):
+        history = extend_history(history, date, rate)
+    return history
+
+
+def load_state() -> MonthToDate:
+    if not STATE_PATH.exists():
+        return MonthToDate()
+    return MonthToDate.from_dict(json.loads(STATE_PATH.read_text()))
+
+
+def save_state(mtd: MonthToDate) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps(mtd.to_dict(), indent=2))
+    tmp.replace(STATE_PATH)
+
+
+def latest_beta() -> dict:
+    """Last rolling β with its 95% bounds, or NaNs before metrics.py has run."""
+    if not BETA_PATH.exists():
+        return {"beta_fx": float("nan"), "beta_fx_lo": float("nan"), "beta_fx_hi": float("nan")}
+    row = pd.read_csv(BETA_PATH, float_precision="round_trip").dropna(subset=["beta_fx"]).iloc[-1]
+    return {key: float(row[key]) for key in ("beta_fx", "beta_fx_lo", "beta_fx_hi")}
+
+
+def reading(mtd: MonthToDate, beta: dict) -> dict:
+    """The provisional month-to-date signal after the latest fixing."""
+    fx = mtd.fx_mom_pct
+    return {
+        "date": mtd.last_date.strftime("%Y-%m-%d"),
+        "month": mtd.month.strftime("%Y-%m-%d"),
+        "n_fixings": mtd.count,
+        "mtd_avg": mtd.mean,
+        "prev_month_avg": mtd.prev_month_avg,
+        "fx_mom_pct_mtd": fx,
+        "realised_vol_pct": math.sqrt(mtd.rv),
+        "beta_fx": beta["beta_fx"],
+        "implied_infl_mom_pct": beta["beta_fx"] * fx,
+        "implied_infl_mom_lo": min(beta["beta_fx_lo"] * fx, beta["beta_fx_hi"] * fx),
+        "implied_infl_mom_hi": max(beta["beta_fx_lo"] * fx, beta["beta_fx_hi"] * fx),
+    }
+
+
+def stream(ticks) -> list:
+    """Feed (date, rate) ticks through the saved state; returns the new readings."""
+    mtd = load_state()
+    beta = latest_beta()
+    if mtd.last_date is None:
+        mtd.history = history_seed(beta)
+    rows = [reading(mtd, beta) for date, rate in ticks if mtd.tick(date, rate)]
+    if rows:
+        save_state(mtd)
+        new_file = not OUT_PATH.exists()
+        OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(rows, columns=COLUMNS).to_csv(OUT_PATH, mode="a", header=new_file, index=False)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Month-to-date USD/MRU change and implied inflation impact")
+    parser.add_argument("--tick", nargs=2, metavar=("DATE", "RATE"),
+                        help="consume one fixing directly instead of the new rows of the daily store")
+    args = parser.parse_args()
+
+    if args.tick:
+        ticks = [(pd.Timestamp(args.tick[0]), float(args.tick[1]))]
+    else:
+        daily = read_daily_store()
+        usd = daily[daily["currency"] == CURRENCY].sort_values("date")
+        mtd = load_state()
+        last = mtd.last_date
+        if last is not None:
+            consumed = usd[usd["date"] <= last]
+            if mtd.history == replay_history(consumed["date"], consumed["rate"], latest_beta()):
+                usd = usd[usd["date"] > last]
+            else:
+                # A consumed fixing (or β) was revised: replay the whole store
+                print("Fixings or β changed since", last.date(), "- replaying", DAILY_PATH)
+                last = None
+        if last is None:
+            STATE_PATH.unlink(missing_ok=True)
+            OUT_PATH.unlink(missing_ok=True)
+        ticks = zip(usd["date"], usd["rate"])
+
+    rows = stream(ticks)
+    if not rows:
+        print("No new fixings after", load_state().last_date.date(), "in", DAILY_PATH)
+        return
+
+    r = rows[-1]
+    print(f"Consumed {len(rows)} fixing(s) through {r['date']}")
+    print(f"  {r['month'][:7]} month-to-date USD/MRU avg: {r['mtd_avg']:.4f} ({r['n_fixings']} fixings)")
+    print(f"  Provisional FX MoM: {r['fx_mom_pct_mtd']:+.3f}%  (realised vol {r['realised_vol_pct']:.3f}%)")
+    print(f"  Implied inflation MoM impact: {r['implied_infl_mom_pct']:+.4f} pp "
+          f"[{r['implied_infl_mom_lo']:+.4f}, {r['implied_infl_mom_hi']:+.4f}] at β={r['beta_fx']:.3f}")
+    print("Saved:", OUT_PATH)
+
+
+if __name__ == "__main__":
+    main()
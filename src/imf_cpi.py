@@ -0,0 +1,286 @@
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from content_hash import CACHE_DIR, file_digest, locked
+
+RAW_CPI_PATH = Path("data/raw/imf_cpi_full.csv")
+
+# Rows per chunk when streaming the all-country dump (~114 MB on disk).
+# Only the filtered rows survive each chunk, so peak memory is one chunk.
+CHUNKSIZE = 5_000
+
+# Columnar copy of the raw csv, in STORE_DIR/<source path hash>/<content hash>/:
+#   meta.arrow   - text columns (COUNTRY, SERIES_CODE, ...)
+#   values.arrow - YYYY-Mnn columns as float64, memory-mapped and row-sliced
+#   index.json   - {COUNTRY: record batch number}
+# Both tables hold one record batch per COUNTRY (rows in file order within
+# it), so a lookup by country reads only that country's rows.
+STORE_DIR = CACHE_DIR / "imf_cpi"
+INDEX_FILE = "index.json"
+PARTITION_COL = "COUNTRY"
+
+# Held while a store is built or stale ones pruned (outside STORE_DIR, so
+# pruning never touches it)
+STORE_LOCK = CACHE_DIR / "imf_cpi.lock"
+
+MONTH_COL_RE = re.compile(r"^\d{4}-M(0[1-9]|1[0-2])$")  # e.g. 2020-M02
+
+
+def is_month_col(c) -> bool:
+    return MONTH_COL_RE.match(str(c)) is not None
+
+
+def month_col_to_date(col: str) -> pd.Timestamp:
+    # "2020-M02" -> "2020-02-01"
+    return pd.Timestamp(year=int(col[:4]), month=int(col[-2:]), day=1)
+
+
+def date_to_month_col(d) -> str:
+    # "2020-02-01" -> "2020-M02"
+    d = pd.Timestamp(d)
+    return f"{d.year:04d}-M{d.month:02d}"
+
+
+def select_columns(header, start=None, end=None, include_months: bool = True) -> list:
+    """
+    Metadata columns plus the YYYY-Mnn columns inside [start, end].
+    start/end accept "2020-M02" periods or anything pd.Timestamp understands.
+    """
+    meta_cols = [c for c in header if not is_month_col(c)]
+    if not include_months:
+        return meta_cols
+
+    lo = date_to_month_col(start) if start is not None and not is_month_col(start) else start
+    hi = date_to_month_col(end) if end is not None and not is_month_col(end) else end
+
+    month_cols = [c for c in header if is_month_col(c)]
+    month_cols = [c for c in month_cols if (lo is None or c >= lo) and (hi is None or c <= hi)]
+    return meta_cols + sorted(month_cols)
+
+
+def _row_mask(df: pd.DataFrame, filters: dict) -> pd.Series:
+    mask = pd.Series(True, index=df.index)
+    for col, wanted in filters.items():
+        if isinstance(wanted, str):
+            wanted = [wanted]
+        mask &= df[col].astype(str).str.strip().isin(list(wanted))
+    return mask
+
+
+def _iter_chunks(path: Path, usecols: list, chunksize: int):
+    # Metadata is read as text and month values as float so every chunk
+    # agrees on dtypes.
+    dtype = {c: str for c in usecols if not is_month_col(c)}
+    month_cols = [c for c in usecols if is_month_col(c)]
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        chunk = chunk[usecols]
+        chunk[month_cols] = chunk[month_cols].apply(pd.to_numeric, errors="coerce").astype("float64")
+        yield chunk
+
+
+def read_imf_cpi(
+    path: Path = RAW_CPI_PATH,
+    filters: dict | None = None,
+    start=None,
+    end=None,
+    include_months: bool = True,
+    chunksize: int = CHUNKSIZE,
+) -> pd.DataFrame:
+    """
+    Stream the IMF CPI csv and keep only rows matching `filters`.
+
+    `filters` maps a metadata column (COUNTRY, FREQUENCY, SERIES_CODE,
+    TYPE_OF_TRANSFORMATION, COICOP_1999, ...) to one value or a list of
+    accepted values. Month columns outside [start, end] are never parsed.
+    """
+    filters = filters or {}
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = select_columns(header, start, end, include_months)
+
+    missing = [c for c in filters if c not in header]
+    if missing:
+        raise ValueError(f"Filter columns not in {path}: {missing}")
+
+    kept = []
+    for chunk in _iter_chunks(path, usecols, chunksize):
+        chunk = chunk[_row_mask(chunk, filters)]
+        if not chunk.empty:
+            kept.append(chunk)
+
+    if not kept:
+        # Same dtypes as a non-empty result (and as load_imf_cpi's empty frame)
+        return pd.DataFrame({c: pd.Series(dtype="float64" if is_month_col(c) else "str") for c in usecols})
+
+    out = pd.concat(kept, ignore_index=True)
+    for c in filters:
+        out[c] = out[c].str.strip()
+    return out
+
+
+# -------------------------------------------------------
+# Columnar store
+# -------------------------------------------------------
+
+def _partition(tmp_dir: Path, meta_path: Path, values_path: Path) -> dict:
+    """
+    Rewrite the streamed (file order) meta / values tables as one record
+    batch per PARTITION_COL value; returns {value: batch number}.
+    """
+    with pa.memory_map(str(meta_path)) as msrc, pa.memory_map(str(values_path)) as vsrc:
+        meta = pa.ipc.open_file(msrc).read_all()
+        values = pa.ipc.open_file(vsrc).read_all()
+        key = meta[PARTITION_COL].fill_null("")
+        # Stable: rows keep their file order within a partition
+        order = pc.sort_indices(key).to_numpy()
+        sorted_key = key.take(order).to_numpy(zero_copy_only=False)
+        if len(order):
+            starts = np.concatenate([[0], np.flatnonzero(sorted_key[1:] != sorted_key[:-1]) + 1])
+            stops = np.append(starts[1:], len(order))
+        else:
+            # Header-only dump: empty tables and index, like read_imf_cpi's empty frame
+            starts = stops = np.empty(0, dtype=int)
+
+        index = {}
+        with pa.OSFile(str(tmp_dir / "meta.arrow"), "wb") as mf, \
+             pa.OSFile(str(tmp_dir / "values.arrow"), "wb") as vf, \
+             pa.ipc.new_file(mf, meta.schema) as meta_writer, \
+             pa.ipc.new_file(vf, values.schema) as value_writer:
+            for batch, (a, b) in enumerate(zip(starts, stops)):
+                rows = pa.array(order[a:b])
+                meta_writer.write_batch(meta.take(rows).combine_chunks().to_batches()[0])
+                value_writer.write_batch(values.take(rows).combine_chunks().to_batches()[0])
+                index[str(sorted_key[a])] = batch
+    return index
+
+
+def _write_store(path: Path, tmp_dir: Path, chunksize: int) -> None:
+    header = pd.read_csv(path, nrows=0).columns
+    meta_cols = select_columns(header, include_months=False)
+    month_cols = sorted(c for c in header if is_month_col(c))
+
+    meta_schema = pa.schema([(c, pa.string()) for c in meta_cols])
+    value_schema = pa.schema([(c, pa.float64()) for c in month_cols])
+
+    # Pass 1: stream the csv into file-order tables
+    meta_path, values_path = tmp_dir / "meta.stream.arrow", tmp_dir / "values.stream.arrow"
+    with pa.OSFile(str(meta_path), "wb") as mf, \
+         pa.OSFile(str(values_path), "wb") as vf, \
+         pa.ipc.new_file(mf, meta_schema) as meta_writer, \
+         pa.ipc.new_file(vf, value_schema) as value_writer:
+        for chunk in _iter_chunks(path, meta_cols + month_cols, chunksize):
+            meta = chunk[meta_cols].apply(lambda s: s.str.strip())
+            meta_writer.write_table(pa.Table.from_pandas(meta, schema=meta_schema, preserve_index=False))
+            value_writer.write_table(pa.Table.from_pandas(chunk[month_cols], schema=value_schema, preserve_index=False))
+
+    # Pass 2: one record batch per country
+    index = _partition(tmp_dir, meta_path, values_path)
+    meta_path.unlink()
+    values_path.unlink()
+    (tmp_dir / INDEX_FILE).write_text(json.dumps(index, indent=1))
+
+
+def source_dir(path: Path) -> Path:
+    """STORE_DIR subdirectory holding the stores of one source csv (keyed by its resolved path)."""
+    return STORE_DIR / hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:16]
+
+
+def build_store(path: Path = RAW_CPI_PATH, chunksize: int = CHUNKSIZE) -> Path:
+    """
+    Convert the raw csv into Arrow IPC files under
+    source_dir(path)/<sha256>/. A no-op when a store for the current file
+    content already exists.
+
+    Safe to call from parallel stages: the build runs under STORE_LOCK in
+    its own temporary directory, so a second caller waits and then finds
+    the finished store.
+    """
+    digest = file_digest(path)
+    parent = source_dir(path)
+    out_dir = parent / digest
+    if (out_dir / INDEX_FILE).exists():
+        return out_dir
+
+    with locked(STORE_LOCK):
+        if (out_dir / INDEX_FILE).exists():
+            return out_dir
+        parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=parent, prefix=f"{digest}.", suffix=".partial"))
+        try:
+            _write_store(path, tmp_dir, chunksize)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        # Stores for older versions of this csv, and builds of it that died
+        # half way, are dead weight; nobody else is building while we hold the
+        # lock. Other sources' stores live in their own source_dir()
+        for old in parent.iterdir():
+            if old != tmp_dir:
+                shutil.rmtree(old, ignore_errors=True)
+        # Stores from before the per-source layout sat directly in STORE_DIR
+        for old in STORE_DIR.iterdir():
+            if len(old.name.split(".")[0]) == 64:
+                shutil.rmtree(old, ignore_errors=True)
+        tmp_dir.rename(out_dir)
+    return out_dir
+
+
+def _batches(store: Path, num_batches: int, filters: dict) -> list:
+    """Record batches that can hold rows matching `filters`: all of them unless PARTITION_COL is filtered."""
+    if PARTITION_COL not in filters:
+        return list(range(num_batches))
+    wanted = filters[PARTITION_COL]
+    wanted = [wanted] if isinstance(wanted, str) else wanted
+    index = json.loads((store / INDEX_FILE).read_text())
+    return sorted({index[w.strip()] for w in wanted if w.strip() in index})
+
+
+def load_imf_cpi(
+    path: Path = RAW_CPI_PATH,
+    filters: dict | None = None,
+    start=None,
+    end=None,
+    include_months: bool = True,
+) -> pd.DataFrame:
+    """
+    Same rows as read_imf_cpi, served from the columnar store (grouped by
+    country when several countries match).
+
+    With a COUNTRY filter only that country's record batches are read; the
+    other filters are applied to those rows alone. Only the matching rows
+    and [start, end] month columns of the memory-mapped value table are
+    materialised.
+    """
+    filters = filters or {}
+    store = build_store(path)
+
+    with pa.memory_map(str(store / "meta.arrow")) as src:
+        reader = pa.ipc.open_file(src)
+        missing = [c for c in filters if c not in reader.schema.names]
+        if missing:
+            raise ValueError(f"Filter columns not in {path}: {missing}")
+        batches = _batches(store, reader.num_record_batches, filters)
+        meta = pa.Table.from_batches([reader.get_batch(i) for i in batches], schema=reader.schema).to_pandas()
+
+    rows = meta.index[_row_mask(meta, filters)].to_numpy()
+    out = meta.iloc[rows].reset_index(drop=True)
+    if not include_months:
+        return out
+
+    with pa.memory_map(str(store / "values.arrow")) as src:
+        reader = pa.ipc.open_file(src)
+        values = pa.Table.from_batches([reader.get_batch(i) for i in batches], schema=reader.schema)
+        month_cols = select_columns(values.column_names, start, end)
+        values = values.select(month_cols).take(pa.array(rows, type=pa.int64()))
+        values = values.to_pandas()
+
+    return pd.concat([out, values], axis=1)
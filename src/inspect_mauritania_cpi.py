@@ -1,13 +1,14 @@
-import pandas as pd
+from imf_cpi import load_imf_cpi
 
 def main():
 
-    # --- 1. Load CPI file ---
+    # --- 1. Load Mauritania rows only (metadata columns, no month values) ---
     path = "data/raw/imf_cpi_full.csv"   # <-- adjust if needed
-    df = pd.read_csv(path)
-
-    # --- 2. Filter Mauritania only ---
-    df = df[df["COUNTRY"] == "Mauritania, Islamic Republic of"]
+    df = load_imf_cpi(
+        path,
+        filters={"COUNTRY": "Mauritania, Islamic Republic of"},
+        include_months=False,
+    )
 
     print("\nNumber of Mauritania rows:", len(df))
 
@@ -20,7 +21,7 @@ def main():
     print("\nUnique COICOP_1999 values:")
     print(df["COICOP_1999"].unique())
 
-    # --- 3. Now extract monthly index series only ---
+    # --- 2. Now extract monthly index series only ---
     monthly_index = df[
         (df["FREQUENCY"] == "Monthly") &
         (df["TYPE_OF_TRANSFORMATION"].str.contains("Index", case=False))
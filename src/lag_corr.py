@@ -0,0 +1,209 @@
+import hashlib
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from content_hash import CACHE_DIR, file_digest
+
+# One parquet table per (code, data, columns, max_lag) content hash
+CACHE_PATH = CACHE_DIR / "lag_corr"
+
+# Tables kept in CACHE_PATH; the least recently used beyond this are dropped
+CACHE_ENTRIES = 16
+
+MAX_LAG = 12
+
+# Months per window of the rolling lag surface
+SURFACE_WINDOW = 24
+
+# Every lag report on the merged table reads from this one set of pairs
+MERGED_Y_COLS = ["infl_mom_pct", "infl_yoy_pct", "fx_mom_pct"]
+MERGED_X_COLS = ["fx_mom_pct"]
+
+
+def _xcorr_sums(a: np.ndarray, b: np.ndarray, max_lag: int, nfft: int) -> np.ndarray:
+    """
+    sum_t a_i(t) * b_j(t - lag) for every column pair (i, j) and lag
+    0..max_lag, via one zero-padded FFT product. a is (n, Ka), b is (n, Kb);
+    the result is (Ka, Kb, max_lag + 1).
+    """
+    fa = np.fft.rfft(a, n=nfft, axis=0).T[:, None, :]
+    fb = np.fft.rfft(b, n=nfft, axis=0).T[None, :, :]
+    return np.fft.irfft(fa * np.conj(fb), n=nfft, axis=-1)[..., :max_lag + 1]
+
+
+def cross_corr(Y, X, max_lag: int = MAX_LAG):
+    """
+    corr(y_i(t), x_j(t - lag)) for every column of Y, every column of X and
+    every lag 0..max_lag, with the pairwise-complete NaN handling of
+    pandas' y.corr(x.shift(lag)).
+
+    Each lag only uses the months where both y(t) and x(t-lag) exist, so
+    the counts, means and variances all differ by lag. They all come from
+    six masked cross-products, each computed for every lag by one FFT.
+
+    Returns (corr, nobs), both (Ky, Kx, max_lag + 1).
+    """
+    Y = np.asarray(Y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    if X.ndim == 1:
+        X = X[:, None]
+    n = Y.shape[0]
+    nfft = 1 << int(np.ceil(np.log2(2 * n)))
+
+    # Centre on the full-sample means to keep the moment sums well conditioned
+    my = np.isfinite(Y).astype(float)
+    mx = np.isfinite(X).astype(float)
+    y = np.where(my > 0, Y - np.nanmean(Y, axis=0), 0.0)
+    x = np.where(mx > 0, X - np.nanmean(X, axis=0), 0.0)
+
+    nobs = np.rint(_xcorr_sums(my, mx, max_lag, nfft))
+    sy = _xcorr_sums(y, mx, max_lag, nfft)
+    sx = _xcorr_sums(my, x, max_lag, nfft)
+    syy = _xcorr_sums(y * y, mx, max_lag, nfft)
+    sxx = _xcorr_sums(my, x * x, max_lag, nfft)
+    sxy = _xcorr_sums(y, x, max_lag, nfft)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = nobs * sxy - sy * sx
+        var = (nobs * syy - sy * sy) * (nobs * sxx - sx * sx)
+        corr = np.where((nobs > 1) & (var > 0), cov / np.sqrt(var), np.nan)
+    return np.clip(corr, -1.0, 1.0), nobs.astype(int)
+
+
+def _running_window_sums(a: np.ndarray, window: int) -> np.ndarray:
+    """Sums of a[..., t-window+1 : t+1] along the last axis; NaN for t < window-1."""
+    c = np.concatenate([np.zeros(a.shape[:-1] + (1,)), np.cumsum(a, axis=-1)], axis=-1)
+    out = np.full(a.shape, np.nan)
+    out[..., window - 1:] = c[..., window:] - c[..., :-window]
+    return out
+
+
+def rolling_cross_corr(Y, x, window: int = SURFACE_WINDOW, max_lag: int = MAX_LAG):
+    """
+    corr(y_i(s), x(s - lag)) over the `window` months s ending at each
+    month t, for every column of Y and every lag 0..max_lag.
+
+    x(s - lag) may fall before the window, as in windowing the pairs of
+    y.corr(x.shift(lag)). The moment sums for every (series, lag, window)
+    are differences of running sums, so each window costs O(1). A window
+    is only scored when all of its pairs are complete.
+
+    Returns (Ky, max_lag + 1, n).
+    """
+    Y = np.asarray(Y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n = Y.shape[0]
+
+    # Centre on the full-sample means to keep the running sums well conditioned
+    Y = Y - np.nanmean(Y, axis=0)
+    x = x - np.nanmean(x)
+
+    # x(t - lag) for every lag: (L+1, n)
+    X_lag = np.full((max_lag + 1, n), np.nan)
+    for lag in range(max_lag + 1):
+        X_lag[lag, lag:] = x[:n - lag]
+
+    y = Y.T[:, None, :]      # (Ky, 1, n)
+    xl = X_lag[None, :, :]   # (1, L+1, n)
+    m = np.isfinite(y) & np.isfinite(xl)
+    y = np.where(m, y, 0.0)
+    xl = np.where(m, xl, 0.0)
+
+    nobs = _running_window_sums(m.astype(float), window)
+    sy = _running_window_sums(y, window)
+    sx = _running_window_sums(xl, window)
+    syy = _running_window_sums(y * y, window)
+    sxx = _running_window_sums(xl * xl, window)
+    sxy = _running_window_sums(y * xl, window)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = nobs * sxy - sy * sx
+        var = (nobs * syy - sy * sy) * (nobs * sxx - sx * sx)
+        corr = np.where((nobs == window) & (var > 0), cov / np.sqrt(var), np.nan)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def bartlett_band(Y, X, nobs: np.ndarray, max_lag: int = MAX_LAG, alpha: float = 0.05) -> np.ndarray:
+    """
+    Half-width of the (1 - alpha) band for each cross-correlation under
+    the null that y and x are unrelated (Bartlett):
+
+        var r_yx(k) ~ (1 + 2 sum_{j=1..max_lag} r_yy(j) r_xx(j)) / n_k
+
+    Autocorrelation in either series widens the band beyond 1.96/sqrt(n).
+    """
+    Y = np.asarray(Y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    if X.ndim == 1:
+        X = X[:, None]
+
+    acf_y = np.diagonal(cross_corr(Y, Y, max_lag)[0], axis1=0, axis2=1).T  # (Ky, L+1)
+    acf_x = np.diagonal(cross_corr(X, X, max_lag)[0], axis1=0, axis2=1).T  # (Kx, L+1)
+    inflation = 1 + 2 * np.nansum(acf_y[:, None, 1:] * acf_x[None, :, 1:], axis=-1)
+
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return z * np.sqrt(np.maximum(inflation, 1.0)[..., None] / nobs)
+
+
+def _cache_key(df: pd.DataFrame, y_cols, x_cols, max_lag: int) -> str:
+    # This file's digest: a change to cross_corr / bartlett_band invalidates every table
+    h = hashlib.sha256(file_digest(__file__).encode())
+    h.update(repr((list(y_cols), list(x_cols), max_lag)).encode())
+    for col in dict.fromkeys(list(y_cols) + list(x_cols)):
+        h.update(np.ascontiguousarray(df[col].to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()
+
+
+def _prune_cache(keep: int = CACHE_ENTRIES) -> None:
+    tables = sorted(CACHE_PATH.glob("*.parquet"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for old in tables[keep:]:
+        old.unlink(missing_ok=True)
+
+
+def lag_corr_table(df: pd.DataFrame, y_cols, x_cols, max_lag: int = MAX_LAG) -> pd.DataFrame:
+    """
+    Long table (y, x, lag, corr, nobs, band) of cross_corr() and
+    bartlett_band() for every y_cols x x_cols pair of a date-sorted frame.
+
+    Cached on disk by the content of the columns involved and of this
+    module, so the plot and the printed reports share one computation.
+    """
+    cached = CACHE_PATH / f"{_cache_key(df, y_cols, x_cols, max_lag)}.parquet"
+    if cached.exists():
+        os.utime(cached)  # mark as recently used for _prune_cache
+        return pd.read_parquet(cached)
+
+    Y = df[list(y_cols)].to_numpy(dtype=float)
+    X = df[list(x_cols)].to_numpy(dtype=float)
+    corr, nobs = cross_corr(Y, X, max_lag)
+    band = bartlett_band(Y, X, nobs, max_lag)
+
+    grid = pd.MultiIndex.from_product([list(y_cols), list(x_cols), range(max_lag + 1)],
+                                      names=["y", "x", "lag"])
+    table = grid.to_frame(index=False)
+    table["corr"] = corr.ravel()
+    table["nobs"] = nobs.ravel()
+    table["band"] = band.ravel()
+
+    CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix(".tmp")
+    table.to_parquet(tmp, index=False)
+    tmp.replace(cached)
+    _prune_cache()
+    return table
+
+
+def lag_profile(table: pd.DataFrame, y_col: str, x_col: str, max_lag: int = MAX_LAG) -> list:
+    """[(lag, corr)] for one pair of a lag_corr_table(), lags 0..max_lag."""
+    sel = table[(table["y"] == y_col) & (table["x"] == x_col) & (table["lag"] <= max_lag)]
+    return list(zip(sel["lag"].tolist(), sel["corr"].tolist()))
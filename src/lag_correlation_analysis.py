@@ -1,20 +1,31 @@
-import pandas as pd
-import numpy as np
+from datasets import Datasets
+from lag_corr import MAX_LAG, MERGED_X_COLS, MERGED_Y_COLS, lag_corr_table, lag_profile
 
-df = pd.read_csv("data/processed/merged_fx_cpi_2020_2025.csv")
-df["date"] = pd.to_datetime(df["date"])
+def main(data=None):
+    data = data or Datasets()
+    table = lag_corr_table(data.merged, MERGED_Y_COLS, MERGED_X_COLS, MAX_LAG)
 
-# We use MoM inflation for responsiveness
-infl = df["infl_mom_pct"]
-fx = df["fx_mom_pct"]
+    # We use MoM inflation for responsiveness
+    print("\nLag correlation profile (FX leads inflation):")
 
-print("\nLag correlation profile (FX leads inflation):")
+    for lag, corr in lag_profile(table, "infl_mom_pct", "fx_mom_pct", 6):  # 0 to 6 months
+        print(f"Lag {lag} months: correlation = {corr:.4f}")
+    print("\nFX autocorrelation:")
 
-for lag in range(0, 7):  # 0 to 6 months
-    corr = infl.corr(fx.shift(lag))
-    print(f"Lag {lag} months: correlation = {corr:.4f}")
-print("\nFX autocorrelation:")
+    for lag, corr in lag_profile(table, "fx_mom_pct", "fx_mom_pct", 6):
+        print(f"Lag {lag} months: autocorr = {corr:.4f}")
 
-for lag in range(0, 7):
-    corr = fx.corr(fx.shift(lag))
-    print(f"Lag {lag} months: autocorr = {corr:.4f}")
+    # Every CPI category against FX, all lags in one pass
+    cats = data.categories_fx
+    y_cols = [c for c in cats.columns if c.endswith("_infl_mom_pct")]
+    cat_table = lag_corr_table(cats, y_cols, ["fx_mom_pct"], MAX_LAG)
+
+    print(f"\nStrongest FX lag by category (lags 0-{MAX_LAG}, * = outside 95% Bartlett band):")
+    for y_col, g in cat_table.groupby("y", sort=False):
+        peak = g.loc[g["corr"].abs().idxmax()]
+        flag = "*" if abs(peak["corr"]) > peak["band"] else " "
+        name = y_col.removesuffix("_infl_mom_pct")
+        print(f"{name:<18} lag {int(peak['lag']):>2}: corr = {peak['corr']:+.4f} {flag}")
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,120 @@
+import sys
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 
-# Load data
-df = pd.read_csv("data/processed/merged_fx_cpi_2020_2025.csv")
-df["date"] = pd.to_datetime(df["date"])
-df = df.sort_values("date")
-
-def lag_profile(y_col, x_col, max_lag=12):
-    """Compute correlation between y(t) and x(t-lag) for lags 0 to max_lag"""
-    y = df[y_col]
-    x = df[x_col]
-    out = []
-    for lag in range(max_lag + 1):
-        corr = y.corr(x.shift(lag))
-        out.append((lag, corr))
-    return out
-
-# Generate lag correlations
-print("Lag profile: corr(infl_mom_pct(t), fx_mom_pct(t-lag))")
-lags_mom = lag_profile("infl_mom_pct", "fx_mom_pct", 12)
-for lag, c in lags_mom:
-    print(lag, round(c, 4))
-
-print("\nLag profile: corr(infl_yoy_pct(t), fx_mom_pct(t-lag))")
-lags_yoy = lag_profile("infl_yoy_pct", "fx_mom_pct", 12)
-for lag, c in lags_yoy:
-    print(lag, round(c, 4))
-
-# Create the plot
-fig, ax = plt.subplots(figsize=(10, 6))
-
-lags = [x[0] for x in lags_mom]
-corrs = [x[1] for x in lags_mom]
-
-ax.bar(lags, corrs, color=['#e74c3c' if c < 0 else '#3498db' for c in corrs], alpha=0.7, edgecolor='black')
-ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
-ax.set_xlabel('Lag (months)', fontsize=12)
-ax.set_ylabel('Correlation', fontsize=12)
-ax.set_title('FX → Inflation Transmission: Lag Correlation Profile\n(corr(inflation(t), FX_change(t-lag)))', fontsize=14)
-ax.set_xticks(lags)
-ax.grid(axis='y', alpha=0.3)
-
-# Add annotation for strongest correlation
-max_corr = max(corrs, key=lambda x: abs(x))
-max_lag = corrs.index(max_corr)
-ax.annotate(f'Peak: {max_corr:.3f} at lag {max_lag}', 
-            xy=(max_lag, max_corr), xytext=(max_lag + 2, max_corr + 0.05),
-            arrowprops=dict(arrowstyle='->', color='gray'),
-            fontsize=10, color='gray')
-
-plt.tight_layout()
-
-# Save to both locations
-out_path = Path("analysis/outputs/lag_correlation.png")
-chart_path = Path("reports/site/docs/assets/charts/lag_correlation.png")
-
-plt.savefig(out_path, dpi=200, bbox_inches='tight')
-plt.savefig(chart_path, dpi=200, bbox_inches='tight')
-plt.close()
-
-print(f"\nSaved: {out_path}")
-print(f"Saved: {chart_path}")
+from datasets import Datasets
+from lag_corr import (MAX_LAG, MERGED_X_COLS, MERGED_Y_COLS, SURFACE_WINDOW, lag_corr_table,
+                      lag_profile, rolling_cross_corr)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "analysis"))
+from charts import Chart, render, web_x, web_y  # noqa: E402
+
+OUT_PATH = Path("analysis/outputs/lag_correlation.png")
+CHART_PATH = Path("reports/site/docs/assets/charts/lag_correlation.png")
+
+SURFACE_OUT_PATH = Path("analysis/outputs/lag_correlation_rolling.png")
+SURFACE_CHART_PATH = Path("reports/site/docs/assets/charts/lag_correlation_rolling.png")
+
+# Amplifier (2022–2023) -> absorber (2024–2025), as in regime_summary.py
+REGIME_SPLIT = "2024-01-01"
+
+def draw_lag_surface(fig, data, style):
+    y_cols, surface = data["y_cols"], data["surface"]
+    axes = fig.subplots(len(y_cols), 1, sharex=True)
+    for ax, col, corr in zip(axes, y_cols, surface):
+        im = ax.pcolormesh(data["dates"], range(MAX_LAG + 1), corr, cmap="RdBu_r", vmin=-1, vmax=1,
+                           shading="nearest")
+        ax.axvline(pd.to_datetime(REGIME_SPLIT), color="black", linestyle="--", linewidth=1)
+        ax.set_title(col.removesuffix("_infl_mom_pct"), fontsize=11)
+        ax.set_ylabel("Lag (months)")
+        ax.set_yticks(range(0, MAX_LAG + 1, 3))
+    axes[-1].set_xlabel(f"Window end ({SURFACE_WINDOW}-month window)")
+    fig.colorbar(im, ax=axes.tolist(), label="Correlation", shrink=0.6)
+    fig.suptitle("Rolling Lag Correlation: corr(inflation(t), FX_change(t-lag))", fontsize=14)
+
+def web_lag_surface(data, style):
+    # Months before the first full window are blank in every panel
+    first = min(next((j for j in range(corr.shape[1]) if not np.isnan(corr[:, j]).all()), corr.shape[1])
+                for corr in data["surface"])
+    dates = web_x(data["dates"][first:])
+    return {"panels": [
+        {"title": col.removesuffix("_infl_mom_pct"), "ylabel": "Lag (months)",
+         "heatmap": {"x": dates, "y": list(range(MAX_LAG + 1)), "z": [web_y(row, 2) for row in corr[:, first:]],
+                     "vmin": -1, "vmax": 1, "label": "Correlation"},
+         "events": [{"x": REGIME_SPLIT[:7]}]}
+        for col, corr in zip(data["y_cols"], data["surface"])
+    ]}
+
+def lag_surface_chart(data) -> Chart:
+    """Rolling corr(category inflation(t), FX_change(t-lag)): window end x lag, one panel per category."""
+    df = data.categories_fx
+    y_cols = [c for c in df.columns if c.endswith("_infl_mom_pct")]
+    surface = rolling_cross_corr(df[y_cols], df["fx_mom_pct"], SURFACE_WINDOW, MAX_LAG)
+    return Chart(SURFACE_OUT_PATH, draw_lag_surface,
+                 {"dates": df["date"].to_numpy(), "y_cols": y_cols, "surface": surface},
+                 {"figsize": (12, 2.4 * len(y_cols)), "layout": "constrained"},
+                 copies=(SURFACE_CHART_PATH,), web=web_lag_surface)
+
+def draw_lag_profile(fig, data, style):
+    lags, corrs, band = data["lags"], data["corrs"], data["band"]
+    ax = fig.subplots()
+
+    ax.bar(lags, corrs, color=['#e74c3c' if c < 0 else '#3498db' for c in corrs], alpha=0.7, edgecolor='black')
+    ax.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
+
+    # 95% Bartlett band: correlations inside it are indistinguishable from zero
+    edges = [lag - 0.5 for lag in lags] + [lags[-1] + 0.5]
+    edge_band = list(band) + [band[-1]]
+    ax.fill_between(edges, [-b for b in edge_band], edge_band, step='post',
+                    color='gray', alpha=0.15, zorder=0, label='95% Bartlett band')
+    ax.legend(loc='lower left')
+    ax.set_xlabel('Lag (months)', fontsize=12)
+    ax.set_ylabel('Correlation', fontsize=12)
+    ax.set_title('FX → Inflation Transmission: Lag Correlation Profile\n(corr(inflation(t), FX_change(t-lag)))', fontsize=14)
+    ax.set_xticks(lags)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add annotation for strongest correlation
+    max_corr = max(corrs, key=lambda x: abs(x))
+    max_lag = corrs.index(max_corr)
+    ax.annotate(f'Peak: {max_corr:.3f} at lag {max_lag}',
+                xy=(max_lag, max_corr), xytext=(max_lag + 2, max_corr + 0.05),
+                arrowprops=dict(arrowstyle='->', color='gray'),
+                fontsize=10, color='gray')
+
+    fig.tight_layout()
+
+def web_lag_profile(data, style):
+    lags, corrs = data["lags"], data["corrs"]
+    peak = max(range(len(corrs)), key=lambda i: abs(corrs[i]))
+    return {"panels": [{"xlabel": "Lag (months)", "ylabel": "Correlation", "zero": True,
+                        "bars": {"x": lags, "y": web_y(corrs), "band": web_y(data["band"])},
+                        "note": f"Peak: {corrs[peak]:.3f} at lag {lags[peak]}"}]}
+
+def main(data=None):
+    data = data or Datasets()
+    table = lag_corr_table(data.merged, MERGED_Y_COLS, MERGED_X_COLS, MAX_LAG)
+
+    # Generate lag correlations
+    print("Lag profile: corr(infl_mom_pct(t), fx_mom_pct(t-lag))")
+    lags_mom = lag_profile(table, "infl_mom_pct", "fx_mom_pct", 12)
+    for lag, c in lags_mom:
+        print(lag, round(c, 4))
+
+    print("\nLag profile: corr(infl_yoy_pct(t), fx_mom_pct(t-lag))")
+    lags_yoy = lag_profile(table, "infl_yoy_pct", "fx_mom_pct", 12)
+    for lag, c in lags_yoy:
+        print(lag, round(c, 4))
+
+    band = table[(table["y"] == "infl_mom_pct") & (table["x"] == "fx_mom_pct")]["band"].to_numpy()
+    profile = Chart(OUT_PATH, draw_lag_profile,
+                    {"lags": [x[0] for x in lags_mom], "corrs": [x[1] for x in lags_mom], "band": band},
+                    {"figsize": (10, 6), "bbox_inches": "tight"},
+                    copies=(CHART_PATH,), web=web_lag_profile)
+
+    # Did the transmission lag itself move between regimes?
+    render([profile, lag_surface_chart(data)])
+
+if __name__ == "__main__":
+    main()
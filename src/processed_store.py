@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Every processed table is a Parquet file with an explicit schema: "date"
+# is a timestamp, the columns listed for the table have their own type and
+# every other column is float64. Floats are stored as computed, with no
+# text round trip between build stages. Each table is also exported as a
+# CSV next to it (same name, .csv) for the site's download page.
+DATE_TYPE = pa.timestamp("us")
+
+COLUMN_TYPES = {
+    "fx_daily_features_2020_2025": {
+        "currency": pa.string(),
+        "n_fixings": pa.int64(),
+        "n_jumps": pa.int64(),
+    },
+}
+
+
+def csv_export(path: Path) -> Path:
+    return Path(path).with_suffix(".csv")
+
+
+def schema(path: Path, columns) -> pa.Schema:
+    types = COLUMN_TYPES.get(Path(path).stem, {})
+    return pa.schema([(c, DATE_TYPE if c == "date" else types.get(c, pa.float64())) for c in columns])
+
+
+def _to_arrow(df: pd.DataFrame, path: Path) -> pa.Table:
+    df = df.assign(date=pd.to_datetime(df["date"]))
+    return pa.Table.from_pandas(df, schema=schema(path, df.columns), preserve_index=False)
+
+
+def _write_parquet(table: pa.Table, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(table, tmp)
+    tmp.replace(path)
+
+
+def write_table(df: pd.DataFrame, path: Path, metadata: dict = None) -> None:
+    """
+    Write df to the Parquet store at path (cast to its schema) and to the
+    CSV export. `metadata` ({str: str}) is kept in the Parquet schema.
+    """
+    table = _to_arrow(df, path)
+    if metadata:
+        table = table.replace_schema_metadata({**table.schema.metadata, **metadata})
+    _write_parquet(table, path)
+    table.to_pandas().to_csv(csv_export(path), index=False)
+
+
+def read_table(path: Path, columns: list = None, filters=None) -> pd.DataFrame:
+    """
+    A table from the Parquet store, memory-mapped. Only the requested
+    columns (and the row groups matching `filters`) are decoded.
+    """
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True).to_pandas()
+
+
+def table_metadata(path: Path) -> dict:
+    """The {str: str} metadata a table was written with (write_table(metadata=...))."""
+    meta = pq.read_schema(path).metadata or {}
+    return {key.decode(): value.decode() for key, value in meta.items() if key != b"pandas"}
+
+
+def update_csv(path: Path, rows: pd.DataFrame) -> None:
+    """
+    Replace the rows of the CSV at `path` from rows["date"].min() onwards.
+
+    Earlier lines are left untouched on disk: the file is truncated at the
+    first affected month and the new lines are appended.
+    """
+    first = rows["date"].min().strftime("%Y-%m-%d")
+    with open(path, "r+b") as f:
+        offset = None
+        pos = 0
+        for line in f:
+            if line.decode().split(",", 1)[0] >= first and pos > 0:
+                offset = pos
+                break
+            pos += len(line)
+        f.seek(pos if offset is None else offset)
+        f.truncate()
+        rows.to_csv(f, header=False, index=False, lineterminator="\n")
+
+
+def update_table(path: Path, rows: pd.DataFrame) -> None:
+    """
+    Replace the rows of a stored table from rows["date"].min() onwards with
+    `rows`. The Parquet file is rewritten (the tables are small); the CSV
+    export is only truncated and appended to. The table's metadata is kept.
+    """
+    old = pq.read_table(path, memory_map=True)
+    new = _to_arrow(rows, path).replace_schema_metadata(old.schema.metadata)
+    keep = old.filter(pc.less(old["date"], pa.scalar(rows["date"].min(), DATE_TYPE)))
+    _write_parquet(pa.concat_tables([keep, new]), path)
+    update_csv(csv_export(path), new.to_pandas())
@@ -1,21 +1,29 @@
-import pandas as pd
 import statsmodels.api as sm
 
+from datasets import Datasets
+
 LAG = 0  # set after lag_profile.py
 
-df = pd.read_csv("data/processed/merged_fx_cpi_2020_2025.csv")
-df["date"] = pd.to_datetime(df["date"])
-df = df.sort_values("date")
+# Any *_mom_pct column of the FX panel (e.g. "eur_mom_pct", "neer_mom_pct")
+FX_COL = "fx_mom_pct"
+
+def main(data=None, fx_col=FX_COL):
+    data = data or Datasets()
+    df = data.merged_panel
+
+    df["fx_lag"] = df[fx_col].shift(LAG)
+    df["infl_lag1"] = df["infl_mom_pct"].shift(1)
 
-df["fx_lag"] = df["fx_mom_pct"].shift(LAG)
-df["infl_lag1"] = df["infl_mom_pct"].shift(1)
+    d = df.dropna(subset=["infl_mom_pct", "fx_lag", "infl_lag1"])
 
-d = df.dropna(subset=["infl_mom_pct", "fx_lag", "infl_lag1"]).copy()
+    Y = d["infl_mom_pct"]
+    X = sm.add_constant(d[["fx_lag", "infl_lag1"]])
 
-Y = d["infl_mom_pct"]
-X = sm.add_constant(d[["fx_lag", "infl_lag1"]])
+    m = sm.OLS(Y, X).fit(cov_type="HAC", cov_kwds={"maxlags": 6})
 
-m = sm.OLS(Y, X).fit(cov_type="HAC", cov_kwds={"maxlags": 6})
+    print("FX regressor:", fx_col)
+    print("Observations:", len(d))
+    print(m.summary())
 
-print("Observations:", len(d))
-print(m.summary())
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,25 @@
-import pandas as pd
 import statsmodels.api as sm
 
+from datasets import Datasets
+
 LAG = 0  # change this after seeing lag correlations
 
-df = pd.read_csv("data/processed/merged_fx_cpi_2020_2025.csv")
-df["date"] = pd.to_datetime(df["date"])
+def main(data=None):
+    data = data or Datasets()
+    df = data.merged
+
+    df["fx_lag"] = df["fx_mom_pct"].shift(LAG)
 
-df["fx_lag"] = df["fx_mom_pct"].shift(LAG)
+    # Use MoM inflation baseline
+    df = df.dropna(subset=["infl_mom_pct", "fx_lag"])
 
-# Use MoM inflation baseline
-df = df.dropna(subset=["infl_mom_pct", "fx_lag"]).copy()
+    Y = df["infl_mom_pct"]
+    X = sm.add_constant(df["fx_lag"])
 
-Y = df["infl_mom_pct"]
-X = sm.add_constant(df["fx_lag"])
+    model = sm.OLS(Y, X).fit()
 
-model = sm.OLS(Y, X).fit()
+    print("Observations:", len(df))
+    print(model.summary())
 
-print("Observations:", len(df))
-print(model.summary())
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,24 @@
-import pandas as pd
 import statsmodels.api as sm
 
-df = pd.read_csv("data/processed/merged_fx_cpi_2020_2025.csv")
-df["date"] = pd.to_datetime(df["date"])
+from datasets import Datasets
 
-# Use MoM inflation
-df["fx_lag6"] = df["fx_mom_pct"].shift(6)
+def main(data=None):
+    data = data or Datasets()
+    df = data.merged
 
-df = df.dropna(subset=["infl_mom_pct", "fx_lag6"]).copy()
+    # Use MoM inflation
+    df["fx_lag6"] = df["fx_mom_pct"].shift(6)
 
-Y = df["infl_mom_pct"]
-X = df["fx_lag6"]
+    df = df.dropna(subset=["infl_mom_pct", "fx_lag6"])
 
-X = sm.add_constant(X)
+    Y = df["infl_mom_pct"]
+    X = df["fx_lag6"]
 
-model = sm.OLS(Y, X).fit()
+    X = sm.add_constant(X)
 
-print(model.summary())
+    model = sm.OLS(Y, X).fit()
+
+    print(model.summary())
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,118 @@
+import hashlib
+import json
+import sys
+
+import numpy as np
 import pandas as pd
 
-paths = [
-    "data/processed/cpi_inflation_mauritania_2020_2025.csv",
-    "data/processed/fx_usd_monthly_2020_2025.csv",
-    "data/processed/merged_fx_cpi_2020_2025.csv",
-]
+from content_hash import CACHE_DIR, file_digest
+from datasets import CATEGORIES_PATH, CPI_PATH, FX_PANEL_PATH, FX_PATH, MERGED_PATH, read_monthly
+
+# Result of the last validation, keyed by the digests of this script and the tables
+CACHE_PATH = CACHE_DIR / "validation.json"
+
+TABLES = [CPI_PATH, FX_PATH, MERGED_PATH, CATEGORIES_PATH, FX_PANEL_PATH]
+
+# MoM columns are recomputed as pct_change(level) * 100; they must agree to this (pp)
+MOM_TOL = 1e-9
+
+def check_dates(name: str, df: pd.DataFrame) -> list:
+    """No missing or duplicate dates, all on month starts, and no gap between the first and last month."""
+    dates = df["date"]
+    if dates.isna().any():
+        return [f"{name}: {dates.isna().sum()} missing dates"]
+    errors = []
+    off = dates != dates.dt.to_period("M").dt.to_timestamp()
+    if off.any():
+        errors.append(f"{name}: {off.sum()} dates not on a month start, first {dates[off].iloc[0].date()}")
+    months = (dates.dt.year * 12 + dates.dt.month).to_numpy()
+    step = np.diff(months)
+    if (step == 0).any():
+        dup = dates.iloc[1:][step == 0].dt.strftime("%Y-%m").unique()
+        errors.append(f"{name}: duplicate months {', '.join(dup)}")
+    if (step > 1).any():
+        gaps = dates.iloc[:-1][step > 1].dt.strftime("%Y-%m")
+        errors.append(f"{name}: {int((step[step > 1] - 1).sum())} missing months, after {', '.join(gaps)}")
+    return errors
+
+def check_mom(name: str, df: pd.DataFrame, pairs: dict) -> list:
+    """Every {mom column: level column} pair in one vectorised pass over the table."""
+    levels = df[list(pairs.values())].to_numpy(dtype=float)
+    mom = df[list(pairs)].to_numpy(dtype=float)
+    # The first month's change is on a month outside the table: not checked
+    expected = (levels[1:] / levels[:-1] - 1) * 100
+    bad = ~np.isclose(mom[1:], expected, rtol=0, atol=MOM_TOL, equal_nan=True)
+    errors = []
+    for j in np.flatnonzero(bad.any(axis=0)):
+        i = np.flatnonzero(bad[:, j])
+        errors.append(f"{name}: {list(pairs)[j]} differs from pct_change of {list(pairs.values())[j]} "
+                      f"in {len(i)} months, first {df['date'].iloc[i[0] + 1]:%Y-%m}")
+    return errors
+
+def check_merged(merged: pd.DataFrame, cpi: pd.DataFrame, fx: pd.DataFrame) -> list:
+    """merged must be exactly the inner join of its CPI and FX parents on date."""
+    expected = cpi.merge(fx, on="date", how="inner").sort_values("date").reset_index(drop=True)
+    if list(merged.columns) != list(expected.columns):
+        return [f"merged: columns {list(merged.columns)}, parents give {list(expected.columns)}"]
+    if len(merged) != len(expected) or not (merged["date"].to_numpy() == expected["date"].to_numpy()).all():
+        return [f"merged: {len(merged)} months, the CPI and FX parents share {len(expected)}"]
+    cols = [c for c in merged.columns if c != "date"]
+    a = merged[cols].to_numpy(dtype=float)
+    b = expected[cols].to_numpy(dtype=float)
+    diff = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    return [f"merged: {c} differs from its parent in {n} months"
+            for c, n in zip(cols, diff.sum(axis=0)) if n]
+
+def mom_pairs(columns, level_suffix: str, mom_suffix: str) -> dict:
+    """{mom column: level column} for every level column with a MoM counterpart."""
+    return {c[:-len(level_suffix)] + mom_suffix: c for c in columns
+            if c.endswith(level_suffix) and c[:-len(level_suffix)] + mom_suffix in columns}
+
+def validate() -> list:
+    tables = {p.stem: read_monthly(p) for p in TABLES}
+    cpi, fx, merged = tables[CPI_PATH.stem], tables[FX_PATH.stem], tables[MERGED_PATH.stem]
+    categories, panel = tables[CATEGORIES_PATH.stem], tables[FX_PANEL_PATH.stem]
+
+    errors = []
+    for name, df in tables.items():
+        errors += check_dates(name, df)
+        print(f"  {name:<40} {len(df):>3} rows  {df['date'].min():%Y-%m} to {df['date'].max():%Y-%m}")
+    if errors:
+        return errors  # values cannot be lined up on broken dates
+
+    levels = [c for c in categories.columns if f"{c}_infl_mom_pct" in categories.columns]
+    errors += check_mom(CPI_PATH.stem, cpi, {"infl_mom_pct": "cpi_index"})
+    errors += check_mom(FX_PATH.stem, fx, {"fx_mom_pct": "fx_usd_avg"})
+    errors += check_mom(CATEGORIES_PATH.stem, categories, {f"{c}_infl_mom_pct": c for c in levels})
+    errors += check_mom(FX_PANEL_PATH.stem, panel,
+                        {**mom_pairs(panel.columns, "_avg", "_mom_pct"), "neer_mom_pct": "neer"})
+    errors += check_merged(merged, cpi, fx)
+    return errors
+
+def inputs_digest() -> str:
+    h = hashlib.sha256(file_digest(__file__).encode())
+    for p in TABLES:
+        h.update(f"{p}:{file_digest(p)}\n".encode())
+    return h.hexdigest()
+
+def main():
+    digest = inputs_digest()
+    cached = json.loads(CACHE_PATH.read_text()) if CACHE_PATH.exists() else {}
+    if cached.get("digest") == digest:
+        print("Tables unchanged since the last validation")
+        errors = cached["errors"]
+    else:
+        print("Validating:")
+        errors = validate()
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_PATH.write_text(json.dumps({"digest": digest, "errors": errors}, indent=1))
 
-for p in paths:
-    df = pd.read_csv(p)
-    df["date"] = pd.to_datetime(df["date"])
-    print("\n", p)
-    print("rows:", len(df))
-    print("min:", df["date"].min(), "max:", df["date"].max())
-    print("missing dates:", df["date"].isna().sum())
+    if errors:
+        print(f"\nValidation FAILED ({len(errors)} problems):")
+        for e in errors:
+            print("  -", e)
+        sys.exit(1)
+    print("\nValidation passed: continuous monthly dates, merged == CPI x FX, MoM == pct_change(level)")
 
+if __name__ == "__main__":
+    main()
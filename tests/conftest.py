@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Stage modules import each other by bare name, as run_all.py runs them
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "analysis"))
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
@@ -0,0 +1,66 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from breaks import bai_interval, detect_breaks, optimal_breaks, segment_ssr
+
+MIN_LEN = 6
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    n = 48
+    x = rng.normal(size=n)
+    y = np.where(np.arange(n) < 20, 0.1 + 0.2 * x, 1.0 - 0.5 * x) + 0.3 * rng.normal(size=n)
+    return y, x
+
+
+def ols_ssr(y, x):
+    Z = np.column_stack([np.ones(len(y)), x])
+    resid = y - Z @ np.linalg.lstsq(Z, y, rcond=None)[0]
+    return float(resid @ resid)
+
+
+def test_segment_ssr_matches_lstsq(series):
+    y, x = series
+    ssr = segment_ssr(y, x, MIN_LEN)
+    n = len(y)
+    for i in range(n):
+        for j in range(n):
+            if j - i + 1 < MIN_LEN:
+                assert ssr[i, j] == np.inf
+            else:
+                assert ssr[i, j] == pytest.approx(ols_ssr(y[i:j + 1], x[i:j + 1]), rel=1e-9, abs=1e-9)
+
+
+def test_optimal_breaks_matches_brute_force(series):
+    y, x = series
+    n = len(y)
+    ssr = segment_ssr(y, x, MIN_LEN)
+    fits = optimal_breaks(ssr, max_breaks=3)
+
+    for m, (total, breaks) in enumerate(fits):
+        best = min(
+            (sum(ssr[a, b - 1] for a, b in zip((0,) + bs, bs + (n,))), list(bs))
+            for bs in combinations(range(1, n), m)
+        )
+        assert total == pytest.approx(best[0], rel=1e-12)
+        assert breaks == best[1]
+
+
+def test_detects_the_planted_break(series):
+    y, x = series
+    fit = detect_breaks(y, x)
+    assert fit["n_breaks"] == 1
+    b = fit["breaks"][0]
+    lo, hi = fit["ci"][0]
+    assert lo <= 20 <= hi and lo <= b <= hi
+
+
+def test_bai_interval_is_whole_sample_without_a_shift():
+    n = 40
+    x = np.random.default_rng(1).normal(size=n)
+    for y in (np.zeros(n), np.full(n, 3.0), 0.5 + 2.0 * x):
+        assert bai_interval(y, x, [20]) == [(0, n - 1)]
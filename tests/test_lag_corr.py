@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lag_corr import MAX_LAG, SURFACE_WINDOW, cross_corr, rolling_cross_corr
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 90
+    x = rng.normal(size=n)
+    df = pd.DataFrame({
+        "y1": 0.4 * np.roll(x, 2) + rng.normal(size=n),
+        "y2": rng.normal(size=n),
+        "x1": x,
+        "x2": rng.normal(size=n),
+    })
+    # Gaps in different places, so every lag has its own complete pairs
+    df.loc[[3, 4, 40], "y1"] = np.nan
+    df.loc[[20, 61], "x1"] = np.nan
+    df.loc[[75], "y2"] = np.nan
+    return df
+
+
+def test_cross_corr_matches_pandas(frame):
+    ys, xs = ["y1", "y2"], ["x1", "x2"]
+    corr, nobs = cross_corr(frame[ys], frame[xs], max_lag=MAX_LAG)
+
+    for i, y in enumerate(ys):
+        for j, x in enumerate(xs):
+            for lag in range(MAX_LAG + 1):
+                shifted = frame[x].shift(lag)
+                assert corr[i, j, lag] == pytest.approx(frame[y].corr(shifted), abs=1e-12)
+                assert nobs[i, j, lag] == (frame[y].notna() & shifted.notna()).sum()
+
+
+def test_rolling_cross_corr_matches_pandas(frame):
+    ys = ["y1", "y2"]
+    surface = rolling_cross_corr(frame[ys], frame["x1"], window=SURFACE_WINDOW, max_lag=MAX_LAG)
+
+    for i, y in enumerate(ys):
+        for lag in range(MAX_LAG + 1):
+            pairs = pd.DataFrame({"y": frame[y], "x": frame["x1"].shift(lag)})
+            complete = pairs.notna().all(axis=1).rolling(SURFACE_WINDOW).sum() == SURFACE_WINDOW
+            expected = pairs["y"].rolling(SURFACE_WINDOW).corr(pairs["x"]).where(complete)
+            np.testing.assert_allclose(surface[i, lag], expected, atol=1e-12, equal_nan=True)
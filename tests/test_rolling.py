@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+from rolling import HAC_MAXLAGS, rolling_ols, rolling_ols_batch
+
+WINDOW = 24
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    n = 120
+    X = rng.normal(size=(n, 2))
+    y = 0.3 + X @ [0.5, -0.2] + rng.normal(size=n)
+    return y, X
+
+
+def test_rolling_ols_matches_statsmodels_hac(data):
+    y, X = data
+    est = rolling_ols(y, X, window=WINDOW, hac_maxlags=HAC_MAXLAGS)
+
+    assert np.isnan(est.params[:WINDOW - 1]).all()
+    for t in range(WINDOW - 1, len(y)):
+        rows = slice(t - WINDOW + 1, t + 1)
+        fit = sm.OLS(y[rows], sm.add_constant(X[rows])).fit(cov_type="HAC", cov_kwds={"maxlags": HAC_MAXLAGS})
+        np.testing.assert_allclose(est.params[t], fit.params, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(est.bse[t], fit.bse, rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(est.resid_var[t], fit.scale, rtol=1e-10)
+        np.testing.assert_allclose(est.rsquared[t], fit.rsquared, rtol=1e-10, atol=1e-12)
+        assert est.nobs[t] == WINDOW
+
+
+def test_rolling_ols_skips_missing_rows_like_dropna(data):
+    y, X = data
+    y = y.copy()
+    X = X.copy()
+    y[[10, 11, 50]] = np.nan
+    X[[30, 70], 1] = np.nan
+    est = rolling_ols(y, X, window=WINDOW)
+
+    for t in range(WINDOW - 1, len(y)):
+        rows = np.arange(t - WINDOW + 1, t + 1)
+        ok = rows[np.isfinite(y[rows]) & np.isfinite(X[rows]).all(axis=1)]
+        fit = sm.OLS(y[ok], sm.add_constant(X[ok])).fit()
+        np.testing.assert_allclose(est.params[t], fit.params, rtol=1e-10, atol=1e-12)
+        assert est.nobs[t] == len(ok)
+
+
+def test_batch_matches_one_target_at_a_time(data):
+    y, X = data
+    rng = np.random.default_rng(1)
+    Y = np.column_stack([y, rng.normal(size=len(y))])
+    own = np.stack([X, rng.normal(size=X.shape)], axis=1)   # (n, K, p)
+    windows = [12, WINDOW]
+    batch = rolling_ols_batch(Y, own, windows, hac_maxlags=HAC_MAXLAGS)
+
+    for i in range(Y.shape[1]):
+        for j, w in enumerate(windows):
+            one = rolling_ols(Y[:, i], own[:, i], window=w, hac_maxlags=HAC_MAXLAGS)
+            np.testing.assert_allclose(batch.params[i, j], one.params, rtol=1e-12, atol=1e-12, equal_nan=True)
+            np.testing.assert_allclose(batch.bse[i, j], one.bse, rtol=1e-12, atol=1e-12, equal_nan=True)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from scipy.stats import multivariate_normal
+
+from tvp import DIFFUSE, fit_tvp, kalman_filter, rts_smoother
+
+
+@pytest.fixture
+def model():
+    rng = np.random.default_rng(0)
+    T = 30
+    Z = np.column_stack([np.ones(T), rng.normal(size=T)])
+    y = Z @ [0.2, 0.5] + 0.1 * np.cumsum(rng.normal(size=T)) * Z[:, 1] + rng.normal(size=T)
+    y[[7, 18]] = np.nan
+    return y, Z
+
+
+def test_loglik_matches_dense_gaussian(model):
+    """The prediction-error log-likelihood is log p(y) - log p(first k observed y)."""
+    y, Z = model
+    T, k = Z.shape
+    r, q, p0 = 0.8, np.array([0.05, 0.02]), np.array([2.0, 3.0])
+    ll = kalman_filter(y[None], Z[None], np.array([r]), q[None], p0[None])[4][0]
+
+    # theta(t) = theta(0) + eta(1) + ... + eta(t): Cov = diag(p0) + min(t, u) diag(q)
+    t = np.arange(T)
+    cov_theta = p0[None, None, :] + np.minimum.outer(t, t)[:, :, None] * q[None, None, :]
+    S = np.einsum("ti,tui,ui->tu", Z, cov_theta, Z) + r * np.eye(T)
+    obs = np.flatnonzero(np.isfinite(y))
+    first = obs[:k]
+
+    def logpdf(rows):
+        return multivariate_normal(np.zeros(len(rows)), S[np.ix_(rows, rows)]).logpdf(y[rows])
+
+    assert ll == pytest.approx(logpdf(obs) - logpdf(first), rel=1e-10)
+
+
+def test_constant_coefficients_reproduce_ols(model):
+    """With no state noise and a diffuse prior the smoothed path is full-sample OLS."""
+    y, Z = model
+    k = Z.shape[1]
+    ok = np.isfinite(y)
+    ols = np.linalg.lstsq(Z[ok], y[ok], rcond=None)[0]
+
+    scale = np.full((1, k), DIFFUSE)
+    theta, _ = rts_smoother(*kalman_filter(y[None], Z[None], np.array([1.0]), np.zeros((1, k)), scale)[:4])
+    np.testing.assert_allclose(theta[0], np.broadcast_to(ols, theta[0].shape), rtol=1e-5, atol=1e-5)
+
+
+def test_fit_does_not_depend_on_the_batch(model):
+    y, Z = model
+    rng = np.random.default_rng(1)
+    other_y = rng.normal(size=y.shape)
+    alone = fit_tvp(y[None], Z[None])
+    batch = fit_tvp(np.stack([other_y, y]), np.stack([Z, Z]))
+
+    for key in ("theta", "r", "q", "loglik"):
+        np.testing.assert_allclose(batch[key][1], alone[key][0], rtol=1e-12, atol=1e-14)
+    assert alone["converged"].all()